@@ -1,23 +1,36 @@
-from fastapi import FastAPI, File, UploadFile, Query, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
+from __future__ import annotations
+
+import time
+
+# Début de l'import du module, pour le rapport de démarrage
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, Query, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from paddleocr import PaddleOCR
-from pdf2image import convert_from_bytes
-from pdf2image.exceptions import (
-    PDFInfoNotInstalledError,
-    PDFPageCountError,
-    PDFSyntaxError,
-)
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 import tempfile
 import os
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import contextvars
+import copy
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Optional, Union
+import threading
+import queue
+import atexit
+import importlib.metadata
+from contextlib import contextmanager, nullcontext
+import multiprocessing
+from multiprocessing import shared_memory
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Union
 from pathlib import Path
 import mimetypes
-from contextlib import contextmanager
 import html
 import io
 from pydantic import BaseModel, Field, validator
@@ -25,24 +38,186 @@ from enum import Enum
 import sys
 import traceback
 import imghdr
+import functools
+import hashlib
+import heapq
+import itertools
+import hmac
+import json
+import math
+import re
+import sqlite3
+import subprocess
+import zlib
+import numpy as np
+
+# paddleocr (plusieurs secondes d'import) et pdf2image sont importés à la première utilisation
+if TYPE_CHECKING:
+    from paddleocr import PaddleOCR
+
+# Journalisation hors du chemin des requêtes: les enregistrements sont déposés dans une
+# file bornée et écrits (console, fichier JSON) par un thread dédié
+LOG_FILE = os.getenv("OCR_LOG_FILE", "ocr_api.log")
+LOG_FORMAT = os.getenv("OCR_LOG_FORMAT", "text")   # format de la console: text ou json
+LOG_QUEUE_SIZE = 10_000        # enregistrements en attente d'écriture au maximum (au-delà: abandonnés)
+LOG_RATE_WINDOW = 60.0         # fenêtre (s) de limitation des messages répétitifs
+LOG_RATE_BURST = 20            # messages par emplacement de code et par fenêtre (WARNING et moins)
+LOG_FIELDS = ("request_id", "profile", "tenant", "page", "duration", "timings", "suppressed")
+
+# Contexte de la requête courante (request_id, profile, tenant), ajouté à chaque enregistrement
+log_context: contextvars.ContextVar[Dict] = contextvars.ContextVar("log_context", default={})
+
+def set_log_context(**fields) -> None:
+    """Associe des champs aux journaux de la tâche courante (et des threads qu'elle lance)"""
+    log_context.set({**log_context.get(), **fields})
 
 # Configuration du logging détaillé
 class DetailedFormatter(logging.Formatter):
+    def formatMessage(self, record):
+        # Ajout d'informations contextuelles, sans modifier l'enregistrement partagé entre handlers
+        record = copy.copy(record)
+        context = " ".join(
+            f"p{record.page}" if key == "page" else str(getattr(record, key))
+            for key in ("request_id", "page") if getattr(record, key, None) is not None
+        )
+        if context:
+            record.message = f"[{context}] {record.message}"
+        if getattr(record, "suppressed", None):
+            record.message += f" ({record.suppressed} messages similaires supprimés)"
+        return super().formatMessage(record)
+
+class JSONFormatter(logging.Formatter):
+    """Un objet JSON par ligne: horodatage, niveau, message et champs structurés"""
+
     def format(self, record):
-        # Ajout d'informations contextuelles
-        if hasattr(record, 'request_id'):
-            record.msg = f"[{record.request_id}] {record.msg}"
-        return super().format(record)
-
-# Configuration logging avec handler personnalisé
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('ocr_api.log', encoding='utf-8')
-    ]
-)
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        for key in LOG_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class LogContextFilter(logging.Filter):
+    """Ajoute le contexte de requête (log_context) aux enregistrements qui ne le portent pas"""
+
+    def filter(self, record):
+        for key, value in log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Limite les messages répétitifs: au plus burst enregistrements par emplacement de code
+    (fichier, ligne) et par fenêtre; le suivant admis indique combien ont été supprimés.
+    Les erreurs ne sont jamais limitées."""
+
+    def __init__(self, window: float = LOG_RATE_WINDOW, burst: int = LOG_RATE_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self._sites: Dict[Tuple[str, int], List] = {}   # emplacement -> [début de fenêtre, admis, supprimés]
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record):
+        if record.levelno > logging.WARNING:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.setdefault((record.pathname, record.lineno), [now, 0, 0])
+            if now - site[0] >= self.window:
+                site[0], site[1] = now, 0
+            if site[1] >= self.burst:
+                site[2] += 1
+                self.suppressed += 1
+                return False
+            site[1] += 1
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class LogQueueHandler(QueueHandler):
+    """Dépôt non bloquant dans la file du thread d'écriture"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # File du même processus: l'enregistrement garde ses champs et son exception;
+        # seul le message est figé ici (ses arguments peuvent changer ensuite)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging() -> LogQueueHandler:
+    """Installe la file de journalisation sur le logger racine (remplace une installation précédente)"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, "ocr_listener", None) is not None:
+            root.removeHandler(handler)
+            handler.ocr_listener.stop()
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else DetailedFormatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+    ))
+    handlers = [console]
+    if LOG_FILE:
+        log_file = logging.FileHandler(LOG_FILE, encoding="utf-8")
+        log_file.setFormatter(JSONFormatter())
+        handlers.append(log_file)
+
+    handler = LogQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.rate_limit = RateLimitFilter()
+    handler.addFilter(handler.rate_limit)
+    handler.addFilter(LogContextFilter())
+    handler.ocr_listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    handler.ocr_listener.start()
+    handler.ocr_pid = os.getpid()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    return handler
+
+def _restart_log_listener() -> None:
+    """Après un fork (server.py), le thread d'écriture n'existe plus: nouvelle file et nouveau thread"""
+    handler = log_handler
+    # Le rechargement du module enregistre ce rappel plusieurs fois: un seul redémarrage
+    if handler not in logging.getLogger().handlers or handler.ocr_pid == os.getpid():
+        return
+    handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+    handler.ocr_listener = QueueListener(handler.queue, *handler.ocr_listener.handlers, respect_handler_level=True)
+    handler.ocr_listener.start()
+    handler.ocr_pid = os.getpid()
+
+log_handler = configure_logging()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: _restart_log_listener())
+
+@atexit.register
+def _stop_log_listener() -> None:
+    """Écrit les enregistrements encore en file avant la sortie du processus"""
+    root = logging.getLogger()
+    if log_handler in root.handlers:
+        root.removeHandler(log_handler)
+        log_handler.ocr_listener.stop()
+
 logger = logging.getLogger(__name__)
 
 # Modèles Pydantic pour validation
@@ -53,11 +228,15 @@ class OCRProfile(str, Enum):
     SCANNE = "scanned"
     ANGLAIS = "english"
     MULTILINGUE = "multilang"
+    RAPIDE = "fast"
 
 class OutputFormat(str, Enum):
     TEXT = "text"
     JSON = "json"
     HTML = "html"
+    HOCR = "hocr"   # sorties envoyées page par page
+    ALTO = "alto"
+    PDF = "pdf"     # PDF consultable (image + texte invisible)
 
 class Enhancement(str, Enum):
     CONTRAST = "contrast"
@@ -65,6 +244,15 @@ class Enhancement(str, Enum):
     BRIGHTNESS = "brightness"
     DEFLOUTAGE = "defloutage"
 
+class AngleClassification(str, Enum):
+    AUTO = "auto"      # pré-passe d'orientation, classifieur seulement si incertain
+    ALWAYS = "always"  # classifieur sur chaque ligne (comportement historique)
+    NEVER = "never"    # ni pré-passe ni classifieur
+
+class PriorityClass(str, Enum):
+    INTERACTIVE = "interactive"  # documents courts, servis en premier
+    BATCH = "batch"              # traitements de masse, capacité restante
+
 class OCRLine(BaseModel):
     text: str = Field(..., description="Texte OCR détecté")
     bbox: List[List[float]] = Field(default_factory=list, description="Coordonnées de la boîte englobante")
@@ -75,6 +263,7 @@ class OCRPageResult(BaseModel):
     lines: List[OCRLine] = Field(default_factory=list, description="Lignes détectées")
     status: str = Field(default="success", description="Statut du traitement")
     error: Optional[str] = Field(default=None, description="Message d'erreur si applicable")
+    timings: Optional[Dict[str, float]] = Field(default=None, description="Durées par étape (s), si debug_timings")
 
 class OCRMetadata(BaseModel):
     filename: str = Field(..., description="Nom du fichier traité")
@@ -83,6 +272,46 @@ class OCRMetadata(BaseModel):
     processing_time: float = Field(..., ge=0, description="Temps de traitement en secondes")
     total_pages: int = Field(..., ge=0, description="Nombre total de pages")
     total_lines: int = Field(..., ge=0, description="Nombre total de lignes détectées")
+    timings: Optional[Dict[str, float]] = Field(default=None, description="Durées cumulées par étape (s), si debug_timings")
+    cpu_profile: Optional[str] = Field(default=None, description="Profil CPU échantillonné (format folded pour flamegraph)")
+
+class DocumentInspection(BaseModel):
+    filename: str = Field(..., description="Nom du fichier inspecté")
+    kind: str = Field(..., description="Type de document: pdf ou image")
+    page_count: int = Field(..., ge=0, description="Nombre de pages du document")
+    pages_processed: int = Field(..., ge=0, description="Pages qui seraient traitées (limite MAX_PAGES)")
+    page_sizes: List[List[int]] = Field(default_factory=list, description="Dimensions (pixels) de chaque page rastérisée")
+    has_text_layer: Optional[bool] = Field(default=None, description="Couche texte présente (PDF), si détectable")
+    image_dpi: Optional[float] = Field(default=None, description="Résolution la plus faible des images (ppp), si connue")
+    estimated_seconds: float = Field(..., ge=0, description="Durée estimée du traitement, attente comprise")
+    estimated_memory_bytes: int = Field(..., ge=0, description="Mémoire réservée estimée pour le traitement")
+    predicted_wait: float = Field(..., ge=0, description="Attente prévue avant le début du traitement")
+
+class SearchLine(BaseModel):
+    page: int = Field(..., gt=0, description="Numéro de page")
+    line: int = Field(..., ge=0, description="Rang de la ligne dans la page")
+    text: str = Field(..., description="Texte de la ligne")
+    highlight: str = Field(..., description="Texte avec les termes trouvés entre [ ]")
+    bbox: List[List[float]] = Field(default_factory=list, description="Coordonnées de la boîte englobante")
+    confidence: float = Field(default=0.0, description="Score de confiance")
+
+class SearchDocument(BaseModel):
+    document_id: int = Field(..., description="Identifiant du document dans l'index")
+    filename: str = Field(..., description="Nom du fichier traité")
+    profile: str = Field(..., description="Profil OCR utilisé")
+    sha256: str = Field(..., description="Empreinte du contenu du fichier")
+    indexed_at: float = Field(..., description="Date d'indexation (timestamp Unix)")
+    total_pages: Optional[int] = Field(default=None, description="Nombre de pages (None pendant l'indexation)")
+    score: float = Field(..., description="Pertinence (bm25, plus faible = plus pertinent)")
+    hits: int = Field(..., ge=0, description="Nombre de lignes correspondantes")
+    lines: List[SearchLine] = Field(default_factory=list, description="Lignes correspondantes (les plus pertinentes)")
+
+class SearchResponse(BaseModel):
+    query: str = Field(..., description="Requête FTS5")
+    total: int = Field(..., ge=0, description="Nombre de documents correspondants")
+    offset: int = Field(..., ge=0)
+    limit: int = Field(..., ge=1)
+    results: List[SearchDocument] = Field(default_factory=list)
 
 class OCRResponse(BaseModel):
     status: str = Field(default="success", description="Statut de la réponse")
@@ -111,10 +340,62 @@ ALLOWED_MIME_TYPES = {
     'application/pdf'
 }
 MAX_PAGES = 100
+PDF_DPI = 200
+INSPECT_TOOL_TIMEOUT = 10  # durée maximale (s) de pdffonts / pdfimages lors d'une inspection
+A4_SIZE_POINTS = (595.0, 842.0)  # taille supposée si pdfinfo n'indique pas la taille de page
+
+# Budget de pixels par page à l'ouverture des images (photos de documents 12-48 Mpx)
+MAX_PAGE_PIXELS = 8_000_000                      # au-delà, la page est décodée à résolution réduite
+PIXEL_BUDGET_FORMATS = {"JPEG", "MPO", "WEBP"}   # formats soumis au budget par défaut (photos)
+
+# Pipeline rastérisation -> pré-traitement -> inférence -> assemblage
+PIPELINE_RASTERIZE_WORKERS = 2   # rastérisation des pages PDF (poppler) en parallèle
+PIPELINE_PREPROCESS_WORKERS = 2  # orientation, amélioration et encodage PNG
+PIPELINE_INFER_WORKERS = 1       # appels au moteur OCR (sérialisés par moteur)
+PIPELINE_QUEUE_SIZE = 2          # pages en attente entre deux étages
+
+# Budget mémoire global réservé par chaque requête avant rastérisation
+MEMORY_BUDGET_BYTES = 2 * 1024 ** 3  # 2 Go de pixels décodés simultanément
+MEMORY_BUDGET_WAIT = 30              # attente maximale (s) d'une réservation avant refus
+MEMORY_RETRY_AFTER = 10              # valeur de Retry-After (s) en cas de refus
+PAGE_WORKING_COPIES = 2              # copies d'une page en mémoire (brute + pré-traitée)
+                                     # (+1 segment partagé, +1 image source pour la seconde passe)
+
+# Délestage selon l'attente prévue
+MAX_QUEUE_WAIT = 60.0          # attente prévue (s) au-delà de laquelle /ocr refuse les requêtes
+DEFAULT_PAGE_SECONDS = 2.0     # temps par page supposé tant qu'aucune mesure n'est disponible
+PAGE_SECONDS_SMOOTHING = 0.2   # poids d'une nouvelle mesure dans la moyenne glissante
+
+# Inférence dans des processus dédiés (0 = dans le processus du serveur).
+# Les pages leur sont transmises par segments de mémoire partagée, sans sérialisation.
+OCR_PROCESS_WORKERS = 0
 
 # Pool de threads pour traitement parallèle
 executor = ThreadPoolExecutor(max_workers=4)
 
+# Ordonnancement des pages entre clients (tenants) et classes de priorité
+PRIORITY_CLASSES = tuple(priority.value for priority in PriorityClass)   # ordre de service strict
+INTERACTIVE_MAX_PAGES = 3                     # au-delà, un document passe en classe batch
+DEFAULT_TENANT = "default"
+# Poids des clients (JSON {"client": poids}, défaut 1): part du moteur au sein d'une classe
+TENANT_WEIGHTS: Dict[str, float] = json.loads(os.getenv("OCR_TENANT_WEIGHTS", "{}") or "{}")
+# Documents traités simultanément (un thread de coordination chacun), par classe: les
+# documents interactifs ont leurs propres threads et n'attendent pas qu'un document batch se termine
+PIPELINE_MAX_DOCUMENTS = 16
+PIPELINE_INTERACTIVE_DOCUMENTS = 4
+pipeline_executors = {
+    "interactive": ThreadPoolExecutor(max_workers=PIPELINE_INTERACTIVE_DOCUMENTS, thread_name_prefix="ocr-interactive"),
+    "batch": ThreadPoolExecutor(max_workers=PIPELINE_MAX_DOCUMENTS, thread_name_prefix="ocr-batch"),
+}
+
+# Découpage en tuiles des très grandes pages
+TILE_PIXEL_THRESHOLD = 16_000_000  # au-delà (en pixels), la page est découpée
+TILE_SIZE = 2048                   # côté d'une tuile en pixels
+TILE_OVERLAP = 256                 # recouvrement entre tuiles voisines
+TILE_WORKERS = 2                   # tuiles traitées en parallèle (un moteur par tuile)
+TILE_DEDUP_OVERLAP = 0.5           # recouvrement au-delà duquel deux lignes sont des doublons
+tile_executor = ThreadPoolExecutor(max_workers=TILE_WORKERS)
+
 # Configuration des profils OCR - compatibilité PaddleOCR v3.2.0+
 OCR_PROFILE_CONFIGS = {
     "printed": {"use_angle_cls": True, "lang": "fr", "show_log": False},
@@ -122,97 +403,541 @@ OCR_PROFILE_CONFIGS = {
     "legal": {"use_angle_cls": True, "lang": "fr", "det_db_thresh": 0.3, "show_log": False},
     "scanned": {"use_angle_cls": True, "lang": "fr", "det_db_box_thresh": 0.5, "show_log": False},
     "english": {"use_angle_cls": True, "lang": "en", "show_log": False},
-    "multilang": {"use_angle_cls": True, "lang": "fr", "show_log": False}
+    "multilang": {"use_angle_cls": True, "lang": "fr", "show_log": False},
+    # Moteur léger pour les documents imprimés propres: les pages dont la confiance
+    # reste sous escalate_below sont relues par le moteur du profil escalate_to
+    "fast": {"backend": "tesseract", "lang": "fra", "escalate_to": "printed", "escalate_below": 0.8},
 }
 
+# Clés de profil propres à l'API, non transmises au constructeur du moteur
+ENGINE_ROUTING_KEYS = {"backend", "escalate_to", "escalate_below"}
+DEFAULT_ENGINE_BACKEND = "paddleocr"
+
+# Réglages CPU calibrés par tune_profiles.py, appliqués aux profils au chargement du module
+OCR_TUNED_PROFILES = os.getenv("OCR_TUNED_PROFILES", "tuned_profiles.json")
+TUNABLE_ENGINE_SETTINGS = {"cpu_threads", "enable_mkldnn", "rec_batch_num", "det_limit_side_len"}
+
+def load_tuned_profiles(path: str = OCR_TUNED_PROFILES) -> Dict[str, Dict]:
+    """Fusionne dans OCR_PROFILE_CONFIGS les réglages calibrés du fichier path, s'il existe.
+
+    Seuls les réglages de TUNABLE_ENGINE_SETTINGS sont repris; renvoie ceux appliqués.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as handle:
+            tuned = json.load(handle)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Réglages calibrés illisibles ({path}): {e}")
+        return {}
+    host_cpus = tuned.get("host", {}).get("cpu_count")
+    if host_cpus and host_cpus != os.cpu_count():
+        logger.warning(f"Réglages calibrés sur {host_cpus} CPU, cette machine en a {os.cpu_count()}")
+    applied = {}
+    for profile, settings in tuned.get("profiles", {}).items():
+        if profile not in OCR_PROFILE_CONFIGS:
+            logger.warning(f"Réglages calibrés pour un profil inconnu ignorés: {profile}")
+            continue
+        applied[profile] = {k: v for k, v in settings.get("settings", {}).items() if k in TUNABLE_ENGINE_SETTINGS}
+        OCR_PROFILE_CONFIGS[profile].update(applied[profile])
+    if applied:
+        logger.info(f"Réglages calibrés chargés depuis {path}: {applied}")
+    return applied
+
+load_tuned_profiles()
+
 # Cache des moteurs OCR initialisés
 ocr_engines_cache: Dict[str, PaddleOCR] = {}
+# Moteurs supplémentaires pour le traitement parallèle des tuiles
+tile_engines_cache: Dict[str, List[PaddleOCR]] = {}
+tile_engines_lock = threading.Lock()
+# Erreurs d'initialisation par profil, exposées par /health
+ocr_engine_errors: Dict[str, str] = {}
+
+# Serveur pre-fork (server.py): état de chaque worker publié dans un répertoire partagé
+WORKER_HEARTBEAT_INTERVAL = 5.0  # période (s) de publication de l'état d'un worker
+WORKER_STALE_AFTER = 3           # périodes sans publication avant qu'un worker soit signalé
+
+# Pré-passe d'orientation sur image réduite
+ORIENTATION_MAX_SIDE = 400     # plus grand côté de la vignette analysée
+ORIENTATION_MIN_INK = 0.002    # proportion minimale de pixels encrés pour conclure
+ORIENTATION_AXIS_RATIO = 1.5   # écart requis entre projections horizontale et verticale
+ORIENTATION_EDGE_RATIO = 1.5   # écart requis entre dispersion des marges opposées
+ORIENTATION_MIN_SPREAD = 2.0   # dispersion minimale (pixels) d'une marge non alignée
+
+# Seconde passe sélective sur les lignes peu fiables
+REFINE_CONFIDENCE_THRESHOLD = 0.8  # seuil par défaut en dessous duquel une ligne est relue
+REFINE_DPI = 400                   # résolution de re-rendu (PDF) des lignes relues
+REFINE_RENDER_TIMEOUT = 10         # durée maximale (s) du re-rendu d'une ligne par pdftoppm
+REFINE_PADDING = 4                 # marge (pixels) autour de la boîte recadrée
+REFINE_ENHANCEMENT = "defloutage"  # pré-traitement appliqué au recadrage
+
+# Mémo de reconnaissance des lignes récurrentes (en-têtes, pieds de page, mentions légales)
+RECOGNITION_MEMO_SIZE = int(os.getenv("OCR_RECOGNITION_MEMO", "0"))  # lectures mémorisées (0: désactivé)
+RECOGNITION_MEMO_HEIGHT = 32   # hauteur (pixels) du recadrage normalisé servant de clé
+RECOGNITION_MEMO_LEVELS = 16   # niveaux de gris conservés: le bruit de numérisation est ignoré
+RECOGNITION_DROP_SCORE = 0.5   # lectures écartées sous ce score (drop_score de PaddleOCR)
+
+# Compteurs exposés par /stats
+ocr_stats = {
+    "orientation": {
+        "pages": 0,
+        "cls_used": 0,
+        "cls_skipped": 0,
+        "pages_rotated": 0,
+    },
+    "refine": {
+        "lines_retried": 0,
+        "lines_improved": 0,
+    },
+    "tiling": {
+        "pages": 0,
+        "tiles": 0,
+        "duplicates_removed": 0,
+    },
+    "coalescing": {
+        "executions": 0,
+        "coalesced": 0,
+    },
+    "memory": {
+        "admitted": 0,
+        "queued": 0,
+        "rejected": 0,
+    },
+    "load": {
+        "shed": 0,
+        "deadline_rejected": 0,
+    },
+    "cancellation": {
+        "requests": 0,
+        "pages_skipped": 0,
+    },
+    "engines": {
+        "light_pages": 0,
+        "escalated": 0,
+    },
+    "scheduling": {
+        "interactive_pages": 0,
+        "batch_pages": 0,
+    },
+    "recognition_memo": {
+        "lines": 0,
+        "hits": 0,
+        "evictions": 0,
+    },
+}
+ocr_stats_lock = threading.Lock()
 
-def check_paddleocr_compatibility():
-    """Vérifie la compatibilité de PaddleOCR - ERREURS EXPLICITES"""
-    try:
-        from paddleocr import PaddleOCR
-        import paddleocr
+def increment_stat(section: str, key: str, value: int = 1) -> None:
+    """Incrémente un compteur de /stats de façon thread-safe"""
+    with ocr_stats_lock:
+        ocr_stats[section][key] += value
 
-        # Version de PaddleOCR
-        version = getattr(paddleocr, '__version__', 'unknown')
-        logger.info(f"Version PaddleOCR détectée: {version}")
+# Modèles PaddleOCR attendus sur disque (OCR_MODEL_DIR, sinon caches PaddleOCR 2.x et 3.x)
+OCR_MODEL_DIRS = [os.getenv("OCR_MODEL_DIR")] if os.getenv("OCR_MODEL_DIR") else [
+    str(Path.home() / ".paddleocr" / "whl"),
+    str(Path.home() / ".paddlex" / "official_models"),
+]
+MODEL_ROLE_TOKENS = {"det": "det", "rec": "rec", "cls": "cls", "ori": "cls"}
 
-        # Test d'initialisation basique (compatible v3.2.0+)
-        test_ocr = PaddleOCR(lang="fr")
-        logger.info("Test d'initialisation PaddleOCR réussi")
+# Rapport de démarrage par phase (import, vérification des modèles, préchargement, ...)
+STARTUP_BUDGET_SECONDS = float(os.getenv("OCR_STARTUP_BUDGET", "10"))
+startup_phases: Dict[str, float] = {}
 
-        return True
-    except ImportError as e:
-        logger.error(f"PaddleOCR NON INSTALLÉ: {e}")
+@contextmanager
+def startup_phase(name: str):
+    """Mesure une phase du démarrage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_phases[name] = startup_phases.get(name, 0.0) + time.perf_counter() - started
+
+def startup_report() -> Dict[str, float]:
+    report = {phase: round(duration, 3) for phase, duration in startup_phases.items()}
+    report["total"] = round(sum(startup_phases.values()), 3)
+    return report
+
+def paddleocr_version() -> Optional[str]:
+    """Version de PaddleOCR installée, sans importer le paquet (None s'il est absent)"""
+    module = sys.modules.get("paddleocr")
+    if module is not None:
+        return getattr(module, "__version__", "unknown")
+    try:
+        return importlib.metadata.version("paddleocr")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def check_model_bundle() -> Dict:
+    """Vérifie que les modèles (détection, reconnaissance, orientation) sont présents localement.
+
+    Seule l'arborescence est parcourue: aucun modèle n'est chargé ni téléchargé.
+    """
+    found: Dict[str, List[str]] = {}
+    for root in OCR_MODEL_DIRS:
+        if not os.path.isdir(root):
+            continue
+        for params in sorted(Path(root).rglob("*.pdiparams")):
+            model_dir = params.parent.relative_to(root)
+            tokens = re.split(r"[\\/_.\-]+", str(model_dir).lower())
+            for token in tokens:
+                role = MODEL_ROLE_TOKENS.get(token)
+                if role and str(model_dir) not in found.get(role, []):
+                    found.setdefault(role, []).append(str(model_dir))
+    required = {"det", "rec"}
+    if any(config.get("use_angle_cls") for config in OCR_PROFILE_CONFIGS.values()):
+        required.add("cls")
+    missing = sorted(required - set(found))
+    return {"directories": OCR_MODEL_DIRS, "models": found, "missing": missing, "ok": not missing}
+
+def check_paddleocr_compatibility():
+    """Vérifie que PaddleOCR est installé et que ses modèles sont présents - sans l'initialiser"""
+    version = paddleocr_version()
+    if version is None:
+        logger.error("PaddleOCR NON INSTALLÉ")
         raise ImportError(f"PaddleOCR requis. Installez avec: pip install paddleocr")
-    except Exception as e:
-        logger.error(f"ERREUR PaddleOCR: {e}")
-        raise Exception(f"Problème PaddleOCR: {e}")
+    logger.info(f"Version PaddleOCR détectée: {version}")
+
+    bundle = check_model_bundle()
+    if bundle["ok"]:
+        logger.info(f"Modèles PaddleOCR présents: {sorted(bundle['models'])}")
+    else:
+        logger.warning(
+            f"Modèles PaddleOCR absents de {OCR_MODEL_DIRS}: {bundle['missing']} "
+            f"(téléchargés à la première initialisation d'un moteur)"
+        )
+    return bundle["ok"]
 
+model_bundle_status: Optional[Dict] = None
 
-def get_ocr_engine(profile: str) -> PaddleOCR:
-    """Obtient ou initialise un moteur OCR pour le profil donné"""
-    if profile not in ocr_engines_cache:
-        if profile not in OCR_PROFILE_CONFIGS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Profil OCR non supporté: {profile}"
-            )
 
-        logger.info(f"Initialisation du moteur OCR pour le profil: {profile}")
-        config = OCR_PROFILE_CONFIGS[profile].copy()
+# Classe de moteur transmise aux processus d'inférence (None: PaddleOCR)
+ocr_engine_class: Optional[type] = None
+
+def get_ocr_engine_class() -> type:
+    """Classe utilisée pour instancier les moteurs OCR"""
+    if ocr_engine_class is not None:
+        return ocr_engine_class
+    from paddleocr import PaddleOCR
+    return PaddleOCR
+
+# Source d'inférence: chemin d'un fichier image, image PIL ou tableau RGB (hauteur, largeur, 3)
+EngineSource = Union[str, Image.Image, np.ndarray]
+
+def source_image(source: EngineSource) -> Image.Image:
+    """Image PIL d'une source d'inférence"""
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(source)
+    if isinstance(source, Image.Image):
+        return source
+    with Image.open(source) as img:
+        img.load()
+        return img
+
+class OCREngine(ABC):
+    """Interface commune des moteurs OCR.
 
+    infer détecte et reconnaît les lignes d'une page ({text, bbox, confidence});
+    detect ne renvoie que les boîtes des lignes (None si le moteur ne sait pas les
+    séparer de la reconnaissance); recognize lit un recadrage de ligne sans
+    détection. native est l'objet de la bibliothèque sous-jacente.
+    """
+    backend = "base"
+    use_angle_cls = False
+
+    def __init__(self, native=None):
+        self.native = native
+
+    @abstractmethod
+    def infer(self, source: EngineSource, use_cls: bool = False) -> List[Dict]:
+        ...
+
+    def infer_batch(self, sources: List[EngineSource], use_cls: bool = False) -> List[List[Dict]]:
+        return [self.infer(source, use_cls) for source in sources]
+
+    def detect(self, source: EngineSource) -> Optional[List[List]]:
+        return None
+
+    @abstractmethod
+    def recognize(self, source: EngineSource, use_cls: bool = False) -> Optional[Tuple[str, float]]:
+        ...
+
+class PaddleOCREngine(OCREngine):
+    """Adaptateur d'un moteur PaddleOCR (API ocr() de PaddleOCR 2.x)"""
+    backend = "paddleocr"
+
+    @classmethod
+    def load(cls, config: Dict):
+        return get_ocr_engine_class()(**config)
+
+    @property
+    def use_angle_cls(self) -> bool:
+        return bool(getattr(self.native, "use_angle_cls", False))
+
+    def _run(self, source: EngineSource, **kwargs):
+        if isinstance(source, np.ndarray):
+            # PaddleOCR attend un tableau BGR: vue inversée, sans copie
+            return self.native.ocr(source[:, :, ::-1], **kwargs)
+        if isinstance(source, Image.Image):
+            path = save_temporary_png(source)
+            try:
+                return self.native.ocr(path, **kwargs)
+            finally:
+                remove_temporary_file(path)
+        return self.native.ocr(source, **kwargs)
+
+    def infer(self, source: EngineSource, use_cls: bool = False) -> List[Dict]:
+        return self.parse_lines(self._run(source, cls=use_cls))
+
+    def detect(self, source: EngineSource) -> Optional[List[List]]:
+        ocr_result = self._run(source, rec=False, cls=False)
+        if not ocr_result or not ocr_result[0]:
+            return []
+        return [[[float(x), float(y)] for x, y in box] for box in ocr_result[0] if box is not None and len(box) == 4]
+
+    def recognize(self, source: EngineSource, use_cls: bool = False) -> Optional[Tuple[str, float]]:
+        ocr_result = self._run(source, det=False, cls=use_cls)
         try:
-            # Import et initialisation directe de PaddleOCR
-            from paddleocr import PaddleOCR
-            ocr_engines_cache[profile] = PaddleOCR(**config)
-            logger.info(f"Moteur OCR '{profile}' initialisé avec succès")
+            text, confidence = ocr_result[0][0][0], ocr_result[0][0][1]
+            return str(text or ""), float(confidence)
+        except (TypeError, IndexError, ValueError):
+            return None
+
+    @staticmethod
+    def parse_lines(ocr_result) -> List[Dict]:
+        """Convertit la sortie brute de PaddleOCR en lignes {text, bbox, confidence}"""
+        page_lines = []
+        malformed = 0
+        if ocr_result and ocr_result[0]:  # Vérification que le résultat n'est pas None ou vide
+            for line in ocr_result[0]:
+                try:
+                    # Vérifications complètes de la structure OCR
+                    if (line and len(line) >= 2 and
+                        line[1] and isinstance(line[1], (list, tuple)) and
+                        len(line[1]) >= 1):
 
+                        # Extraction sécurisée du texte et de la confiance
+                        text = str(line[1][0]) if line[1][0] is not None else ""
+                        confidence = float(line[1][1]) if len(line[1]) > 1 and isinstance(line[1][1], (int, float)) else 0.0
+                        bbox = line[0] if line[0] and isinstance(line[0], (list, tuple)) else []
+
+                        page_lines.append({
+                            "text": text,
+                            "bbox": bbox,
+                            "confidence": confidence
+                        })
+                except (TypeError, IndexError, ValueError) as e:
+                    malformed += 1
+                    last_error = e
+                    continue
+        if malformed:
+            # Un seul message par page, quel que soit le nombre de lignes concernées
+            logger.warning(f"Format OCR inattendu pour {malformed} ligne(s): {last_error} - Lignes ignorées")
+        return page_lines
+
+class TesseractEngine(OCREngine):
+    """Moteur léger Tesseract (pytesseract): beaucoup moins coûteux sur les imprimés propres"""
+    backend = "tesseract"
+
+    def __init__(self, lang: str = "fra", config: str = ""):
+        import pytesseract  # dépendance optionnelle
+        super().__init__(pytesseract)
+        self.lang = lang
+        self.config = config
+
+    @classmethod
+    def load(cls, config: Dict) -> "TesseractEngine":
+        engine = cls(**config)
+        try:
+            # pytesseract peut être installé sans le binaire tesseract
+            engine.native.get_tesseract_version()
+        except OSError as e:  # TesseractNotFoundError
+            raise ImportError(f"binaire tesseract introuvable ({e})") from e
+        return engine
+
+    def _words(self, source: EngineSource, config: str) -> List[Dict]:
+        data = self.native.image_to_data(
+            source_image(source), lang=self.lang, config=config, output_type=self.native.Output.DICT
+        )
+        words = []
+        for i, text in enumerate(data["text"]):
+            confidence = float(data["conf"][i])
+            if not str(text).strip() or confidence < 0:
+                continue
+            words.append({
+                "key": (data["block_num"][i], data["par_num"][i], data["line_num"][i]),
+                "text": str(text).strip(),
+                "box": (data["left"][i], data["top"][i],
+                        data["left"][i] + data["width"][i], data["top"][i] + data["height"][i]),
+                "confidence": confidence / 100,
+            })
+        return words
+
+    def infer(self, source: EngineSource, use_cls: bool = False) -> List[Dict]:
+        lines: Dict[Tuple, List[Dict]] = {}
+        for word in self._words(source, self.config):
+            lines.setdefault(word["key"], []).append(word)
+        page_lines = []
+        for words in lines.values():
+            left = min(w["box"][0] for w in words)
+            top = min(w["box"][1] for w in words)
+            right = max(w["box"][2] for w in words)
+            bottom = max(w["box"][3] for w in words)
+            page_lines.append({
+                "text": " ".join(w["text"] for w in words),
+                "bbox": [[left, top], [right, top], [right, bottom], [left, bottom]],
+                "confidence": sum(w["confidence"] for w in words) / len(words),
+            })
+        return page_lines
+
+    def recognize(self, source: EngineSource, use_cls: bool = False) -> Optional[Tuple[str, float]]:
+        # --psm 7: le recadrage est traité comme une seule ligne de texte
+        words = self._words(source, f"{self.config} --psm 7".strip())
+        if not words:
+            return None
+        return " ".join(w["text"] for w in words), sum(w["confidence"] for w in words) / len(words)
+
+# Moteurs disponibles, sélectionnés par la clé "backend" du profil
+OCR_ENGINE_BACKENDS: Dict[str, type] = {
+    PaddleOCREngine.backend: PaddleOCREngine,
+    TesseractEngine.backend: TesseractEngine,
+}
+
+def profile_backend(profile: str) -> str:
+    return OCR_PROFILE_CONFIGS.get(profile, {}).get("backend", DEFAULT_ENGINE_BACKEND)
+
+def load_ocr_engine(config: Dict):
+    """Instancie le moteur d'une configuration de profil.
+
+    Un moteur PaddleOCR est renvoyé tel quel (objet natif, partageable entre processus
+    par sa classe); les autres moteurs sont des OCREngine.
+    """
+    backend = config.get("backend", DEFAULT_ENGINE_BACKEND)
+    if backend not in OCR_ENGINE_BACKENDS:
+        raise ValueError(f"Moteur OCR inconnu: {backend}")
+    settings = {k: v for k, v in config.items() if k not in ENGINE_ROUTING_KEYS}
+    return OCR_ENGINE_BACKENDS[backend].load(settings)
+
+def as_ocr_engine(ocr_engine) -> OCREngine:
+    """Interface OCREngine d'un moteur (les moteurs PaddleOCR natifs sont adaptés)"""
+    if isinstance(ocr_engine, OCREngine):
+        return ocr_engine
+    return PaddleOCREngine(ocr_engine)
+
+def create_ocr_engine(profile: str) -> PaddleOCR:
+    """Initialise un nouveau moteur OCR pour le profil donné"""
+    if profile not in OCR_PROFILE_CONFIGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Profil OCR non supporté: {profile}"
+        )
+
+    logger.info(f"Initialisation du moteur OCR pour le profil: {profile}")
+    config = OCR_PROFILE_CONFIGS[profile].copy()
+
+    backend = profile_backend(profile)
+    if backend != DEFAULT_ENGINE_BACKEND:
+        try:
+            engine = load_ocr_engine(config)
+            logger.info(f"Moteur OCR '{profile}' ({backend}) initialisé avec succès")
+            return engine
         except ImportError as import_error:
-            logger.error(f"PaddleOCR non installé: {import_error}")
+            # Moteur léger absent: le profil est servi par son moteur d'escalade
+            fallback = config.get("escalate_to")
+            if not fallback:
+                raise HTTPException(status_code=500, detail=f"Moteur '{backend}' non installé: {import_error}")
+            logger.warning(f"Moteur '{backend}' non installé pour '{profile}', moteur du profil '{fallback}' utilisé")
+            return get_ocr_engine(fallback)
+        except Exception as e:
+            logger.error(f"Erreur initialisation OCR '{profile}' ({backend}): {e}")
+            raise HTTPException(status_code=500, detail=f"Impossible d'initialiser le moteur '{backend}' pour '{profile}': {e}")
+
+    try:
+        # Import et initialisation directe de PaddleOCR
+        engine = load_ocr_engine(config)
+        logger.info(f"Moteur OCR '{profile}' initialisé avec succès")
+        return engine
+
+    except ImportError as import_error:
+        logger.error(f"PaddleOCR non installé: {import_error}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"PaddleOCR non installé. Installez avec: pip install paddleocr"
+        )
+
+    except Exception as e:
+        logger.error(f"Erreur initialisation OCR '{profile}': {e}")
+        logger.error(f"Stack trace: {traceback.format_exc()}")
+
+        # UN SEUL fallback: Configuration ultra-minimale
+        try:
+            minimal_config = {
+                "lang": config.get("lang", "fr"),
+                "use_angle_cls": config.get("use_angle_cls", False),
+                "show_log": False,
+            }
+            engine = get_ocr_engine_class()(**minimal_config)
+            logger.warning(f"Fallback réussi pour '{profile}' avec config ultra-minimale")
+            return engine
+        except Exception as minimal_error:
+            logger.error(f"Fallback échec pour '{profile}': {minimal_error}")
             raise HTTPException(
                 status_code=500,
-                detail=f"PaddleOCR non installé. Installez avec: pip install paddleocr"
+                detail=f"Impossible d'initialiser PaddleOCR pour '{profile}'. Erreur: {str(e)}. Fallback: {str(minimal_error)}"
             )
 
-        except Exception as e:
-            logger.error(f"Erreur initialisation OCR '{profile}': {e}")
-            logger.error(f"Stack trace: {traceback.format_exc()}")
-
-            # UN SEUL fallback: Configuration ultra-minimale
-            try:
-                minimal_config = {
-                    "lang": config.get("lang", "fr"),
-                    "use_angle_cls": config.get("use_angle_cls", False),
-                    "show_log": False,
-                }
-                from paddleocr import PaddleOCR
-                ocr_engines_cache[profile] = PaddleOCR(**minimal_config)
-                logger.warning(f"Fallback réussi pour '{profile}' avec config ultra-minimale")
-            except Exception as minimal_error:
-                logger.error(f"Fallback échec pour '{profile}': {minimal_error}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Impossible d'initialiser PaddleOCR pour '{profile}'. Erreur: {str(e)}. Fallback: {str(minimal_error)}"
-                )
+def get_ocr_engine(profile: str) -> PaddleOCR:
+    """Obtient ou initialise un moteur OCR pour le profil donné"""
+    if profile not in ocr_engines_cache:
+        try:
+            ocr_engines_cache[profile] = create_ocr_engine(profile)
+        except HTTPException as e:
+            ocr_engine_errors[profile] = str(e.detail)
+            raise
+        ocr_engine_errors.pop(profile, None)
 
     return ocr_engines_cache[profile]
 
-@contextmanager
-def temporary_file(suffix: str = ".png"):
-    """Gestionnaire de contexte pour fichiers temporaires"""
-    temp_file = None
-    try:
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        yield temp_file
-    finally:
-        if temp_file:
-            temp_file.close()
-            try:
-                os.remove(temp_file.name)
-            except OSError as e:
-                logger.warning(f"Impossible de supprimer le fichier temporaire {temp_file.name}: {e}")
+def preload_ocr_engines(profiles: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Initialise à l'avance les moteurs des profils donnés (tous par défaut).
+
+    Un profil en échec n'interrompt pas le préchargement: il est signalé par
+    ocr_engine_health() et sera retenté à la première requête.
+    """
+    for profile in profiles or list(OCR_PROFILE_CONFIGS):
+        try:
+            get_ocr_engine(profile)
+        except HTTPException as e:
+            logger.error(f"Préchargement du profil '{profile}' impossible: {e.detail}")
+    return ocr_engine_health()
+
+def ocr_engine_health() -> Dict[str, Dict]:
+    """État des moteurs de ce processus: chargé, en erreur ou non chargé"""
+    health = {}
+    for profile in OCR_PROFILE_CONFIGS:
+        if profile in ocr_engines_cache:
+            health[profile] = {"status": "ready"}
+        elif profile in ocr_engine_errors:
+            health[profile] = {"status": "error", "error": ocr_engine_errors[profile]}
+        else:
+            health[profile] = {"status": "not_loaded"}
+    return health
+
+def engine_uses_angle_cls(ocr_engine: Optional[PaddleOCR], profile: Optional[str]) -> bool:
+    """Classifieur d'angle actif: lu sur le moteur local, sinon dans la configuration du profil"""
+    if ocr_engine is not None:
+        return bool(getattr(ocr_engine, "use_angle_cls", False))
+    return bool(OCR_PROFILE_CONFIGS.get(profile, {}).get("use_angle_cls", False))
+
+def get_tile_engines(ocr_engine: PaddleOCR, profile: Optional[str]) -> List[PaddleOCR]:
+    """Moteurs utilisables en parallèle pour les tuiles: le moteur principal plus des moteurs dédiés"""
+    if not profile or profile not in OCR_PROFILE_CONFIGS:
+        return [ocr_engine]
+    with tile_engines_lock:
+        extra = tile_engines_cache.setdefault(profile, [])
+        while len(extra) < TILE_WORKERS - 1:
+            extra.append(create_ocr_engine(profile))
+        return [ocr_engine] + extra
 
 def validate_file(file: UploadFile, file_bytes: Optional[bytes] = None) -> None:
     """Valide le fichier uploadé"""
@@ -288,158 +1013,2362 @@ def preprocess_image(img: Image.Image, enhance: Optional[str] = None) -> Image.I
         logger.warning(f"Échec du pré-traitement '{enhance}': {e}")
         return img  # Retourne l'image originale en cas d'erreur
 
-def convert_bytes_to_images(file_bytes: bytes) -> List[Image.Image]:
-    """Convertit les bytes en images avec gestion d'erreurs robuste"""
-    images = []
+class DocumentPages:
+    """Accès page par page à un document: les pages ne sont décodées qu'à la demande"""
+
+    def __init__(
+        self,
+        kind: str,
+        page_count: int,
+        loader,
+        page_size: Tuple[int, int] = (0, 0),
+        on_close=None,
+        page_sizes: Optional[List[Tuple[int, int]]] = None,
+        path: Optional[str] = None,
+        first_page: int = 1,
+    ):
+        self.kind = kind
+        self.page_count = page_count
+        self.total_pages = page_count  # avant limitation à MAX_PAGES et sélection de pages
+        # Pages traitées: first_page à first_page + page_count - 1 (numérotation du document)
+        self.first_page = first_page
+        self._loader = loader
+        # Dimensions estimées (pixels) d'une page décodée, connues sans décodage
+        self.page_size = page_size
+        self.page_sizes = page_sizes or [page_size] * page_count
+        self.path = path  # fichier source sur disque (PDF), le temps que le document est ouvert
+        self.dpi: Optional[float] = None  # résolution déclarée dans l'en-tête (images)
+        # Facteurs (x, y) ramenant les coordonnées d'une page réduite à l'image d'origine
+        self.scales: Dict[int, Tuple[float, float]] = {}
+        self._on_close = on_close
+
+    def load(self, page_num: int) -> Image.Image:
+        """Décode la page page_num de la sélection (1 = first_page du document)"""
+        return self._loader(self.document_page(page_num))
+
+    def document_page(self, page_num: int) -> int:
+        """Numéro dans le document de la page page_num de la sélection"""
+        return page_num + self.first_page - 1
+
+    def close(self) -> None:
+        """Libère les ressources du document (fichier temporaire du PDF)"""
+        on_close, self._on_close = self._on_close, None
+        if on_close:
+            on_close()
+
+def pdfinfo_from_path(*args, **kwargs) -> Dict:
+    from pdf2image import pdfinfo_from_path as _pdfinfo_from_path
+    return _pdfinfo_from_path(*args, **kwargs)
+
+def convert_from_path(*args, **kwargs) -> List[Image.Image]:
+    from pdf2image import convert_from_path as _convert_from_path
+    return _convert_from_path(*args, **kwargs)
+
+def convert_from_bytes(*args, **kwargs) -> List[Image.Image]:
+    from pdf2image import convert_from_bytes as _convert_from_bytes
+    return _convert_from_bytes(*args, **kwargs)
+
+def pdf_dependency_errors() -> Tuple[type, ...]:
+    """Erreurs pdf2image signalant poppler absent ou un PDF illisible"""
+    from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError, PDFSyntaxError
+    return PDFInfoNotInstalledError, PDFPageCountError, PDFSyntaxError
+
+def _pdf_size_points(value) -> Optional[Tuple[float, float]]:
+    match = re.match(r"\s*([\d.]+)\s*x\s*([\d.]+)", str(value))
+    return (float(match.group(1)), float(match.group(2))) if match else None
+
+def pdf_page_sizes_pixels(
+    info: Dict, page_count: int, dpi: int = PDF_DPI, first_page: int = 1
+) -> List[Tuple[int, int]]:
+    """Dimensions en pixels des pages first_page à first_page + page_count - 1, d'après les
+    champs « Page N size » de pdfinfo"""
+    default = _pdf_size_points(info.get("Page size", "")) or A4_SIZE_POINTS
+    sizes = {}
+    for key, value in info.items():
+        match = re.fullmatch(r"Page\s+(\d+)\s+size", key)
+        if match and _pdf_size_points(value):
+            sizes[int(match.group(1))] = _pdf_size_points(value)
+    return [
+        (int(width / 72 * dpi), int(height / 72 * dpi))
+        for width, height in (
+            sizes.get(page_num, default) for page_num in range(first_page, first_page + page_count)
+        )
+    ]
+
+def pdf_page_size_pixels(info: Dict, dpi: int = PDF_DPI) -> Tuple[int, int]:
+    """Dimensions en pixels de la plus grande page rastérisée, d'après pdfinfo.
 
+    Les champs « Page N size » (pdfinfo -f/-l) sont pris en compte en plus de
+    « Page size », qui ne décrit que la première page.
+    """
+    sizes = [
+        _pdf_size_points(value) for key, value in info.items()
+        if re.fullmatch(r"Page(\s+\d+)?\s+size", key) and _pdf_size_points(value)
+    ]
+    width_pts, height_pts = max(sizes, key=lambda size: size[0] * size[1]) if sizes else A4_SIZE_POINTS
+    return int(width_pts / 72 * dpi), int(height_pts / 72 * dpi)
+
+def page_selection(total_pages: int, first_page: int = 1, last_page: Optional[int] = None) -> Tuple[int, int]:
+    """Première page et nombre de pages de la plage demandée dans un document"""
+    last = min(last_page or total_pages, total_pages)
+    return first_page, max(0, last - first_page + 1)
+
+def _open_pdf(file_bytes: bytes, first_page: int = 1, last_page: Optional[int] = None) -> DocumentPages:
+    # Un seul fichier temporaire par document: rastériser depuis les bytes réécrirait
+    # le PDF entier sur disque à chaque page
+    path = save_temporary_file(file_bytes, ".pdf")
     try:
-        # Tentative de conversion PDF avec pdf2image
-        images = convert_from_bytes(file_bytes, dpi=200, fmt='PNG')
-        logger.info(f"PDF converti en {len(images)} page(s)")
-    except (PDFInfoNotInstalledError, PDFPageCountError, PDFSyntaxError) as pdf_dependency_error:
-        logger.error(
-            "Échec critique conversion PDF: %s. Dépendances manquantes ou PDF invalide.",
-            pdf_dependency_error,
+        info = pdfinfo_from_path(path)
+        page_count = int(info["Pages"])
+        first, selected = page_selection(page_count, first_page, last_page)
+        if page_count > 1 and selected:
+            # Tailles de chaque page: un PDF mixte (couverture A4, plans A0) est fréquent
+            info.update(pdfinfo_from_path(path, first_page=first, last_page=first + min(selected, MAX_PAGES) - 1))
+    except Exception:
+        remove_temporary_file(path)
+        raise
+    logger.info(f"PDF de {page_count} page(s)")
+
+    def load(page_num: int) -> Image.Image:
+        # Le format ppm évite un encodage/décodage PNG inutile entre poppler et Pillow
+        pages = convert_from_path(
+            path, dpi=PDF_DPI, fmt="ppm", first_page=page_num, last_page=page_num
         )
-        raise HTTPException(
-            status_code=503,
-            detail=(
-                "Conversion PDF impossible côté serveur. "
-                "Vérifiez l'installation des dépendances (ex: poppler)."
-            ),
-        ) from pdf_dependency_error
-    except Exception as pdf_error:
-        logger.info(f"Échec conversion PDF: {pdf_error}. Tentative image directe.")
+        if not pages:
+            raise ValueError(f"Page {page_num} introuvable")
+        return pages[0]
+
+    document = DocumentPages(
+        "pdf", page_count, load, pdf_page_size_pixels(info), lambda: remove_temporary_file(path),
+        page_sizes=pdf_page_sizes_pixels(info, min(selected, MAX_PAGES), first_page=first), path=path,
+        first_page=first,
+    )
+    document.page_count = selected
+    return document
+
+def page_pixel_budget(image_format: Optional[str], max_pixels: Optional[int] = None) -> Optional[int]:
+    """Budget de pixels d'une page: celui de la requête, sinon MAX_PAGE_PIXELS pour les photos"""
+    if max_pixels:
+        return max_pixels
+    return MAX_PAGE_PIXELS if image_format in PIXEL_BUDGET_FORMATS else None
+
+def budget_size(size: Tuple[int, int], max_pixels: Optional[int]) -> Tuple[int, int]:
+    """Dimensions d'une page ramenée au budget de pixels (proportions conservées)"""
+    width, height = size
+    if not max_pixels or width * height <= max_pixels:
+        return size
+    ratio = math.sqrt(max_pixels / (width * height))
+    return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+def fit_pixel_budget(img: Image.Image, max_pixels: Optional[int]) -> Tuple[Image.Image, Optional[Tuple[float, float]]]:
+    """Réduit une image non décodée au budget de pixels.
+
+    Un JPEG est décodé directement à 1/2, 1/4 ou 1/8 de sa résolution (draft), puis
+    ajusté. Renvoie l'image et les facteurs vers les coordonnées d'origine (None si
+    l'image est conservée telle quelle).
+    """
+    original = img.size
+    target = budget_size(original, max_pixels)
+    if target == original:
+        return img, None
+    if img.format in ("JPEG", "MPO"):
+        img.draft(img.mode, target)
+    if img.size != target:
+        img = img.resize(target, Image.LANCZOS, reducing_gap=2.0)
+    return img, (original[0] / img.width, original[1] / img.height)
+
+def _open_image(
+    file_bytes: bytes, max_pixels: Optional[int] = None, first_page: int = 1, last_page: Optional[int] = None
+) -> DocumentPages:
+    # Vérification de l'intégrité sans décoder les pixels (verify() rend l'objet inutilisable)
+    Image.open(io.BytesIO(file_bytes)).verify()
+    # Ouverture directe depuis les bytes (sans fichier temporaire): seul l'en-tête est lu,
+    # les pixels sont décodés au premier accès
+    img = Image.open(io.BytesIO(file_bytes))
+    dpi = img.info.get("dpi")
+    budget = page_pixel_budget(img.format, max_pixels)
+    frame_count = getattr(img, "n_frames", 1) if img.format == "TIFF" else 1
+    if frame_count == 1:
+        logger.info("Image directe ouverte avec succès")
+    else:
+        # TIFF multi-pages (fax): seuls les en-têtes des pages retenues sont lus ici
+        logger.info(f"TIFF de {frame_count} page(s)")
+
+    first, selected = page_selection(frame_count, first_page, last_page)
+    sizes = []
+    for frame in range(first - 1, first - 1 + min(selected, MAX_PAGES)):
+        if frame_count > 1:
+            img.seek(frame)
+        sizes.append(budget_size(img.size, budget))
+    if sizes and sizes[0] != img.size and frame_count == 1:
+        logger.info(f"Image {img.width}x{img.height} réduite à {sizes[0][0]}x{sizes[0][1]} (budget de pixels)")
+    frame_lock = threading.Lock()
+    scales: Dict[int, Tuple[float, float]] = {}
+
+    def load(page_num: int) -> Image.Image:
+        # Une page n'est décodée qu'à la demande
+        with frame_lock:
+            if frame_count > 1:
+                img.seek(page_num - 1)
+            page, scale = fit_pixel_budget(img, budget)
+            if scale:
+                scales[page_num] = scale
+            # La copie détache un cadre TIFF du fichier (le cadre courant change au prochain seek)
+            return page.copy() if frame_count > 1 and page is img else page
+
+    document = DocumentPages(
+        "image", frame_count, load, max(sizes, key=lambda size: size[0] * size[1], default=(0, 0)),
+        page_sizes=sizes, first_page=first,
+    )
+    document.page_count = selected
+    document.scales = scales
+    if dpi:
+        document.dpi = float(min(dpi))
+    return document
+
+def open_document(
+    file_bytes: bytes, max_pixels: Optional[int] = None, first_page: int = 1, last_page: Optional[int] = None
+) -> DocumentPages:
+    """Ouvre un PDF ou une image sans rastériser les pages.
+
+    max_pixels remplace le budget de pixels par page appliqué aux images. first_page et
+    last_page restreignent le traitement à une plage de pages (PDF, TIFF multi-pages).
+    """
+    pdf_error: Optional[Exception] = None
+    if file_bytes.startswith(b"%PDF-"):
         try:
-            # Tentative d'ouverture directe depuis les bytes (sans fichier temporaire)
-            img_bytes = io.BytesIO(file_bytes)
-            img = Image.open(img_bytes)
-            # Vérification de l'intégrité de l'image en créant une copie
-            img_copy = img.copy()
-            img_copy.verify()
-            # Utilisation de l'image originale (non fermée par verify)
-            images = [img]
-            logger.info("Image directe ouverte avec succès")
-        except Exception as img_error:
-            logger.error(f"Échec ouverture image: {img_error}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Format de fichier non supporté. Erreurs: PDF={str(pdf_error)[:100]}, Image={str(img_error)[:100]}"
+            document = _open_pdf(file_bytes, first_page, last_page)
+        except pdf_dependency_errors() as pdf_dependency_error:
+            logger.error(
+                "Échec critique conversion PDF: %s. Dépendances manquantes ou PDF invalide.",
+                pdf_dependency_error,
             )
+            raise HTTPException(
+                status_code=503,
+                detail=(
+                    "Conversion PDF impossible côté serveur. "
+                    "Vérifiez l'installation des dépendances (ex: poppler)."
+                ),
+            ) from pdf_dependency_error
+        except Exception as error:
+            logger.info(f"Échec conversion PDF: {error}. Tentative image directe.")
+            pdf_error = error
+        else:
+            return check_page_selection(limit_document_pages(document))
 
-    if len(images) > MAX_PAGES:
-        logger.warning(f"Document avec {len(images)} pages, limité à {MAX_PAGES}")
-        images = images[:MAX_PAGES]
+    try:
+        document = _open_image(file_bytes, max_pixels, first_page, last_page)
+    except Exception as img_error:
+        logger.error(f"Échec ouverture image: {img_error}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format de fichier non supporté. Erreurs: PDF={str(pdf_error)[:100]}, Image={str(img_error)[:100]}"
+        )
+    return check_page_selection(limit_document_pages(document))
 
+def check_page_selection(document: DocumentPages) -> DocumentPages:
+    """Refuse une plage de pages qui commence après la fin du document"""
+    if document.first_page > document.total_pages:
+        document.close()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Page {document.first_page} demandée, le document en compte {document.total_pages}",
+        )
+    return document
+
+def limit_document_pages(document: DocumentPages) -> DocumentPages:
+    """Limite le document à MAX_PAGES pages (les suivantes ne sont jamais décodées)"""
+    if document.page_count > MAX_PAGES:
+        logger.warning(f"Document avec {document.page_count} pages, limité à {MAX_PAGES}")
+        document.page_count = MAX_PAGES
+        document.page_sizes = document.page_sizes[:MAX_PAGES]
+    return document
+
+def convert_bytes_to_images(file_bytes: bytes) -> List[Image.Image]:
+    """Convertit les bytes en images avec gestion d'erreurs robuste"""
+    document = open_document(file_bytes)
+    try:
+        images = [document.load(page_num) for page_num in range(1, document.page_count + 1)]
+    finally:
+        document.close()
+    logger.info(f"Document converti en {len(images)} page(s)")
     return images
 
-def process_single_page(args) -> Dict:
-    """Traite une seule page pour traitement parallèle"""
-    page_num, img, enhance, ocr_engine = args
+def run_poppler_tool(args: List[str]) -> Optional[str]:
+    """Exécute un utilitaire poppler (pdffonts, pdfimages); None s'il est absent ou en échec"""
+    try:
+        completed = subprocess.run(args, capture_output=True, text=True, timeout=INSPECT_TOOL_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"{args[0]} indisponible: {e}")
+        return None
+    if completed.returncode != 0:
+        logger.warning(f"{args[0]} en échec: {completed.stderr.strip()[:200]}")
+        return None
+    return completed.stdout
+
+def _tool_rows(output: str) -> List[List[str]]:
+    """Lignes de données d'un tableau pdffonts / pdfimages -list (après la ligne de tirets)"""
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if line.startswith("---"):
+            return [row.split() for row in lines[index + 1:] if row.strip()]
+    return []
+
+def pdf_has_text_layer(path: str, page_count: int) -> Optional[bool]:
+    """Présence de polices (donc de texte) dans les pages, d'après pdffonts"""
+    output = run_poppler_tool(["pdffonts", "-l", str(page_count), path])
+    return None if output is None else bool(_tool_rows(output))
+
+def pdf_min_image_dpi(path: str, page_count: int) -> Optional[float]:
+    """Plus faible résolution des images intégrées, d'après pdfimages -list"""
+    output = run_poppler_tool(["pdfimages", "-list", "-l", str(page_count), path])
+    if output is None:
+        return None
+    dpis = []
+    for row in _tool_rows(output):
+        # page num type width height color comp bpc enc interp object ID x-ppi y-ppi size ratio
+        if len(row) >= 14 and row[2] == "image":
+            try:
+                dpis.append(min(float(row[12]), float(row[13])))
+            except ValueError:
+                continue
+    return min(dpis) if dpis else None
+
+def inspect_document(file_bytes: bytes, options: Optional[Dict] = None) -> Dict:
+    """Métadonnées et coût estimé d'un document, sans décoder ses pages"""
+    document = open_document(file_bytes, (options or {}).get("max_pixels"))
+    try:
+        inspection = {
+            "kind": document.kind,
+            "page_count": document.total_pages,
+            "pages_processed": document.page_count,
+            "page_sizes": [list(size) for size in document.page_sizes],
+            "has_text_layer": None,
+            "image_dpi": None,
+        }
+        if document.path:
+            inspection["has_text_layer"] = pdf_has_text_layer(document.path, document.page_count)
+            inspection["image_dpi"] = pdf_min_image_dpi(document.path, document.page_count)
+        else:
+            inspection["image_dpi"] = document.dpi
+        priority = resolve_schedule(None, document.page_count)["priority"]
+        inspection.update({
+            "estimated_seconds": round(load_tracker.estimated_finish(document.page_count, priority), 2),
+            "estimated_memory_bytes": estimate_document_memory(document, options),
+            "predicted_wait": round(load_tracker.predicted_wait(priority), 2),
+        })
+        return inspection
+    finally:
+        document.close()
+
+def _margin_spread(ink: np.ndarray) -> Tuple[float, float]:
+    """Dispersion des premières et dernières colonnes encrées de chaque ligne de pixels"""
+    rows = ink[ink.any(axis=1)]
+    if rows.shape[0] < 2:
+        return 0.0, 0.0
+    first = rows.argmax(axis=1)
+    last = rows.shape[1] - 1 - rows[:, ::-1].argmax(axis=1)
+    return float(first.std()), float(last.std())
+
+def estimate_page_orientation(img: Image.Image) -> Optional[int]:
+    """Estime l'angle (0, 90, 180, 270) à appliquer via rotate() pour redresser la page.
+
+    L'analyse porte sur une vignette en niveaux de gris: l'axe des lignes de texte est
+    donné par les profils de projection, le sens par l'alignement de la marge gauche.
+    Retourne None lorsque l'estimation n'est pas fiable.
+    """
+    thumb = img.convert("L")
+    thumb.thumbnail((ORIENTATION_MAX_SIDE, ORIENTATION_MAX_SIDE))
+    pixels = np.asarray(thumb, dtype=np.float32)
+    ink = pixels < pixels.mean() * 0.8
+    if ink.mean() < ORIENTATION_MIN_INK:
+        return None
+
+    def projection_score(profile: np.ndarray) -> float:
+        mean = profile.mean()
+        return float(profile.var() / (mean * mean)) if mean > 0 else 0.0
+
+    row_score = projection_score(ink.sum(axis=1))
+    col_score = projection_score(ink.sum(axis=0))
+
+    if row_score >= col_score * ORIENTATION_AXIS_RATIO:
+        # Lignes horizontales: marge gauche alignée => page droite
+        start_spread, end_spread = _margin_spread(ink)
+        upright, flipped = 0, 180
+    elif col_score >= row_score * ORIENTATION_AXIS_RATIO:
+        # Lignes verticales: la marge gauche se retrouve en haut ou en bas
+        start_spread, end_spread = _margin_spread(ink.T)
+        upright, flipped = 90, 270
+    else:
+        return None
+
+    if end_spread >= ORIENTATION_MIN_SPREAD and start_spread * ORIENTATION_EDGE_RATIO <= end_spread:
+        return upright
+    if start_spread >= ORIENTATION_MIN_SPREAD and end_spread * ORIENTATION_EDGE_RATIO <= start_spread:
+        return flipped
+    return None
+
+def unrotate_bbox(bbox: List, angle: int, size: Tuple[int, int]) -> List:
+    """Ramène une boîte détectée sur la page redressée dans le repère de la page d'origine"""
+    width, height = size
+    if angle == 90:
+        return [[width - y, x] for x, y in bbox]
+    if angle == 180:
+        return [[width - x, height - y] for x, y in bbox]
+    if angle == 270:
+        return [[y, height - x] for x, y in bbox]
+    return bbox
+
+def save_temporary_file(data: bytes, suffix: str) -> str:
+    """Écrit des données dans un fichier temporaire à supprimer par l'appelant"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+    except Exception:
+        remove_temporary_file(path)
+        raise
+    return path
 
+def save_temporary_png(img: Image.Image) -> str:
+    """Encode l'image dans un fichier PNG temporaire à supprimer par l'appelant"""
+    fd, path = tempfile.mkstemp(suffix=".png")
     try:
-        # Pré-traitement si demandé
-        if enhance:
-            img = preprocess_image(img, enhance)
-
-        # Sauvegarde temporaire pour OCR
-        with temporary_file(".png") as temp_file:
-            img.save(
-                temp_file.name,
-                format="PNG",  # optimize=True n'est pas supporté pour PNG
-            )
-            use_cls = getattr(ocr_engine, "use_angle_cls", False)
-            ocr_result = ocr_engine.ocr(temp_file.name, cls=use_cls)
+        with os.fdopen(fd, "wb") as handle:
+            img.save(handle, format="PNG")  # optimize=True n'est pas supporté pour PNG
+    except Exception:
+        remove_temporary_file(path)
+        raise
+    return path
 
-        # Traitement des résultats OCR avec vérifications robustes
-        page_lines = []
-        if ocr_result and ocr_result[0]:  # Vérification que le résultat n'est pas None ou vide
-            for line in ocr_result[0]:
-                try:
-                    # Vérifications complètes de la structure OCR
-                    if (line and len(line) >= 2 and
-                        line[1] and isinstance(line[1], (list, tuple)) and
-                        len(line[1]) >= 1):
+def remove_temporary_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.warning(f"Impossible de supprimer le fichier temporaire {path}: {e}")
+
+def recognize_page(ocr_engine: PaddleOCR, img: Image.Image, use_cls: bool) -> List[Dict]:
+    """Détection + reconnaissance d'une image complète"""
+    return as_ocr_engine(ocr_engine).infer(img, use_cls)
+
+def _tile_spans(length: int) -> List[Tuple[int, int, int, int]]:
+    """Découpe un axe en segments recouvrants: (début, fin, début utile, fin utile)"""
+    if length <= TILE_SIZE:
+        return [(0, length, 0, length)]
+    step = TILE_SIZE - TILE_OVERLAP
+    starts = list(range(0, length - TILE_SIZE, step)) + [length - TILE_SIZE]
+    spans = []
+    for index, start in enumerate(starts):
+        end = start + TILE_SIZE
+        # Chaque tuile « possède » la zone jusqu'au milieu du recouvrement avec ses voisines
+        core_start = 0 if index == 0 else (start + starts[index - 1] + TILE_SIZE) // 2
+        core_end = length if index == len(starts) - 1 else (end + starts[index + 1]) // 2
+        spans.append((start, end, core_start, core_end))
+    return spans
+
+def _bbox_rect(bbox: List) -> Tuple[float, float, float, float]:
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def deduplicate_lines(lines: List[Dict]) -> List[Dict]:
+    """Fusionne les lignes détectées deux fois de part et d'autre d'une frontière de tuiles.
+
+    La détection conservée est étendue à l'union des deux boîtes et marquée
+    « _merged » lorsque l'autre détection la dépasse, pour être relue en entier.
+    """
+    kept: List[Dict] = []
+    kept_rects: List[List[float]] = []
+    for line in sorted(lines, key=lambda l: (-len(l["text"]), -l["confidence"])):
+        rect = _bbox_rect(line["bbox"])
+        area = max((rect[2] - rect[0]) * (rect[3] - rect[1]), 1e-6)
+        for index, other in enumerate(kept_rects):
+            inter_w = min(rect[2], other[2]) - max(rect[0], other[0])
+            inter_h = min(rect[3], other[3]) - max(rect[1], other[1])
+            if inter_w <= 0 or inter_h <= 0:
+                continue
+            other_area = max((other[2] - other[0]) * (other[3] - other[1]), 1e-6)
+            if inter_w * inter_h / min(area, other_area) > TILE_DEDUP_OVERLAP:
+                union = [min(rect[0], other[0]), min(rect[1], other[1]),
+                         max(rect[2], other[2]), max(rect[3], other[3])]
+                if union != other:
+                    kept_rects[index] = union
+                    left, top, right, bottom = union
+                    kept[index]["bbox"] = [[left, top], [right, top], [right, bottom], [left, bottom]]
+                    kept[index]["_merged"] = True
+                break
+        else:
+            kept.append(line)
+            kept_rects.append(list(rect))
+    removed = len(lines) - len(kept)
+    if removed:
+        increment_stat("tiling", "duplicates_removed", removed)
+    kept.sort(key=lambda l: (_bbox_rect(l["bbox"])[1], _bbox_rect(l["bbox"])[0]))
+    return kept
+
+def recognize_tiled(engines: List[PaddleOCR], img: Image.Image, use_cls: bool) -> List[Dict]:
+    """OCR d'une très grande page par tuiles recouvrantes traitées en parallèle"""
+    tiles = [
+        (x_span, y_span)
+        for y_span in _tile_spans(img.height)
+        for x_span in _tile_spans(img.width)
+    ]
+    increment_stat("tiling", "pages")
+    increment_stat("tiling", "tiles", len(tiles))
+    logger.info(f"Page {img.width}x{img.height} découpée en {len(tiles)} tuiles")
 
-                        # Extraction sécurisée du texte et de la confiance
-                        text = str(line[1][0]) if line[1][0] is not None else ""
-                        confidence = float(line[1][1]) if len(line[1]) > 1 and isinstance(line[1][1], (int, float)) else 0.0
-                        bbox = line[0] if line[0] and isinstance(line[0], (list, tuple)) else []
+    available = queue.Queue()
+    for engine in engines:
+        available.put(engine)
 
-                        page_lines.append({
-                            "text": text,
-                            "bbox": bbox,
-                            "confidence": confidence
-                        })
-                except (TypeError, IndexError, ValueError) as e:
-                    logger.warning(f"Format OCR inattendu pour une ligne: {e} - Ligne ignorée")
-                    continue
+    def process_tile(tile) -> List[Dict]:
+        (x0, x1, core_x0, core_x1), (y0, y1, core_y0, core_y1) = tile
+        engine = available.get()
+        try:
+            tile_lines = recognize_page(engine, img.crop((x0, y0, x1, y1)), use_cls)
+        finally:
+            available.put(engine)
+        owned = []
+        for line in tile_lines:
+            if not line["bbox"]:
+                continue
+            line["bbox"] = [[point[0] + x0, point[1] + y0] for point in line["bbox"]]
+            left, top, right, bottom = _bbox_rect(line["bbox"])
+            center_x, center_y = (left + right) / 2, (top + bottom) / 2
+            if core_x0 <= center_x < core_x1 and core_y0 <= center_y < core_y1:
+                owned.append(line)
+        return owned
+
+    page_lines: List[Dict] = []
+    for tile_lines in tile_executor.map(process_tile, tiles):
+        page_lines.extend(tile_lines)
+    page_lines = deduplicate_lines(page_lines)
+
+    # Les lignes coupées par une frontière sont relues sur leur boîte complète
+    for line in page_lines:
+        if line.pop("_merged", False):
+            reading = recognize_crop(engines[0], img.crop(tuple(int(v) for v in _bbox_rect(line["bbox"]))))
+            if reading:
+                line["text"], line["confidence"] = reading
+    return page_lines
+
+def recognize_crop(ocr_engine: PaddleOCR, img: Image.Image) -> Optional[Tuple[str, float]]:
+    """Reconnaissance seule (sans détection) d'un recadrage de ligne"""
+    return as_ocr_engine(ocr_engine).recognize(img)
+
+def render_pdf_region(path: str, page: int, box: Tuple[int, int, int, int], dpi: int = REFINE_DPI) -> Optional[Image.Image]:
+    """Rend une zone d'une page PDF à dpi (pdftoppm -x/-y/-W/-H).
+
+    box est en pixels de la page rastérisée à PDF_DPI. None si pdftoppm est absent ou en échec.
+    """
+    factor = dpi / PDF_DPI
+    left, top, right, bottom = (round(value * factor) for value in box)
+    args = [
+        "pdftoppm", "-r", str(dpi), "-f", str(page), "-l", str(page),
+        "-x", str(left), "-y", str(top), "-W", str(right - left), "-H", str(bottom - top), path,
+    ]
+    try:
+        completed = subprocess.run(args, capture_output=True, timeout=REFINE_RENDER_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"pdftoppm indisponible: {e}")
+        return None
+    if completed.returncode != 0 or not completed.stdout:
+        logger.warning(f"pdftoppm en échec: {completed.stderr.decode(errors='replace').strip()[:200]}")
+        return None
+    return Image.open(io.BytesIO(completed.stdout)).convert("RGB")
+
+def render_pdf_line(pdf_source: Dict, angle: int, size: Tuple[int, int], box: Tuple[int, int, int, int]) -> Optional[Image.Image]:
+    """Re-rendu d'une zone de la page redressée (angle) depuis le PDF, dans la même orientation"""
+    left, top, right, bottom = box
+    corners = unrotate_bbox([[left, top], [right, top], [right, bottom], [left, bottom]], angle, size)
+    region = tuple(int(value) for value in _bbox_rect(corners))
+    crop = render_pdf_region(pdf_source["path"], pdf_source["page"], region)
+    if crop is not None and angle:
+        crop = crop.rotate(angle, expand=True)
+    return crop
+
+def refine_low_confidence_lines(
+    ocr_engine: PaddleOCR,
+    img: Image.Image,
+    page_lines: List[Dict],
+    threshold: float,
+    render=None,
+) -> None:
+    """Relit les lignes sous le seuil de confiance et garde la meilleure lecture.
+
+    render(box), s'il est fourni, renvoie la zone re-rendue à plus haute résolution
+    (PDF); sinon, ou s'il échoue, la ligne est relue sur un recadrage de img à sa
+    résolution: l'agrandir n'apporterait rien, le moteur ramène les lignes à hauteur fixe.
+    """
+    for line in page_lines:
+        if line["confidence"] >= threshold or not line["bbox"]:
+            continue
+        try:
+            xs = [point[0] for point in line["bbox"]]
+            ys = [point[1] for point in line["bbox"]]
+            box = (
+                max(0, int(min(xs)) - REFINE_PADDING),
+                max(0, int(min(ys)) - REFINE_PADDING),
+                min(img.width, int(max(xs)) + REFINE_PADDING),
+                min(img.height, int(max(ys)) + REFINE_PADDING),
+            )
+            if box[2] <= box[0] or box[3] <= box[1]:
+                continue
+            crop = render(box) if render else None
+            if crop is None:
+                crop = img.crop(box)
+            crop = preprocess_image(crop, REFINE_ENHANCEMENT)
+            increment_stat("refine", "lines_retried")
+            reading = recognize_crop(ocr_engine, crop)
+        except Exception as e:
+            logger.warning(f"Relecture impossible pour une ligne: {e}")
+            continue
+        if reading and reading[1] > line["confidence"]:
+            line["text"], line["confidence"] = reading
+            increment_stat("refine", "lines_improved")
+
+class RecognitionMemo:
+    """Lectures (texte, confiance) des recadrages de ligne déjà reconnus, éviction LRU.
+
+    La clé est une empreinte du recadrage normalisé (niveaux de gris, hauteur fixe,
+    niveaux réduits) et du profil: une ligne identique d'un document à l'autre
+    (en-tête, pied de page, mention légale) n'est reconnue qu'une fois.
+    """
+
+    def __init__(self, max_entries: int = RECOGNITION_MEMO_SIZE):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, Tuple[str, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(crop: Image.Image, profile: Optional[str], use_cls: bool) -> bytes:
+        gray = crop.convert("L")
+        width = max(1, round(gray.width * RECOGNITION_MEMO_HEIGHT / max(gray.height, 1)))
+        pixels = np.asarray(ImageOps.autocontrast(gray.resize((width, RECOGNITION_MEMO_HEIGHT), Image.BILINEAR)))
+        levels = (pixels // (256 // RECOGNITION_MEMO_LEVELS)).astype(np.uint8)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{profile}|{int(use_cls)}|{width}".encode())
+        digest.update(levels.tobytes())
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[str, float]]:
+        with self.lock:
+            reading = self.entries.get(key)
+            if reading is not None:
+                self.entries.move_to_end(key)
+        increment_stat("recognition_memo", "lines")
+        if reading is not None:
+            increment_stat("recognition_memo", "hits")
+        return reading
+
+    def put(self, key: bytes, reading: Tuple[str, float]) -> None:
+        evicted = 0
+        with self.lock:
+            self.entries[key] = reading
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            increment_stat("recognition_memo", "evictions", evicted)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+recognition_memo = RecognitionMemo()
+
+def line_crop(img: Image.Image, bbox: List) -> Image.Image:
+    """Recadrage redressé d'une boîte de ligne (quadrilatère haut-gauche, haut-droit, bas-droit, bas-gauche)"""
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = bbox
+    width = max(1, round(max(np.hypot(x1 - x0, y1 - y0), np.hypot(x2 - x3, y2 - y3))))
+    height = max(1, round(max(np.hypot(x3 - x0, y3 - y0), np.hypot(x2 - x1, y2 - y1))))
+    crop = img.transform((width, height), Image.QUAD, (x0, y0, x3, y3, x2, y2, x1, y1), Image.BICUBIC)
+    # Ligne verticale: lue couchée, comme dans le pipeline de PaddleOCR
+    if height >= 1.5 * width:
+        crop = crop.transpose(Image.ROTATE_90)
+    return crop
+
+def infer_memoized(ocr_engine: PaddleOCR, source: EngineSource, profile: Optional[str], use_cls: bool) -> Optional[List[Dict]]:
+    """Détection seule, puis reconnaissance des seules lignes absentes du mémo.
+
+    Renvoie None si le moteur ne sépare pas détection et reconnaissance.
+    """
+    engine = as_ocr_engine(ocr_engine)
+    boxes = engine.detect(source)
+    if boxes is None:
+        return None
+    img = source_image(source).convert("RGB") if boxes else None
+    page_lines = []
+    for bbox in sorted(boxes, key=lambda box: (_bbox_rect(box)[1], _bbox_rect(box)[0])):
+        crop = line_crop(img, bbox)
+        key = recognition_memo.key(crop, profile, use_cls)
+        reading = recognition_memo.get(key)
+        if reading is None:
+            # Pixels RGB passés directement au moteur (aucun fichier temporaire par ligne)
+            reading = engine.recognize(np.asarray(crop), use_cls)
+            if reading is None:
+                continue
+            recognition_memo.put(key, reading)
+        if reading[1] < RECOGNITION_DROP_SCORE:
+            continue
+        page_lines.append({"text": reading[0], "bbox": bbox, "confidence": reading[1]})
+    return page_lines
+
+def resolve_angle_classification(img: Image.Image, engine_cls: bool, mode: str) -> Tuple[Image.Image, int, bool]:
+    """Décide du classifieur d'angle pour une page et la redresse si nécessaire.
+
+    Retourne (image, angle appliqué, utilisation du classifieur).
+    """
+    if not engine_cls:
+        return img, 0, False
+    if mode == AngleClassification.ALWAYS.value:
+        increment_stat("orientation", "cls_used")
+        return img, 0, True
+    if mode == AngleClassification.NEVER.value:
+        increment_stat("orientation", "cls_skipped")
+        return img, 0, False
+
+    increment_stat("orientation", "pages")
+    angle = estimate_page_orientation(img)
+    if angle == 0:
+        increment_stat("orientation", "cls_skipped")
+        return img, 0, False
+
+    # Le sens déduit des marges n'est pas fiable (texte aligné à droite): la page est
+    # seulement ramenée à l'horizontale et le classifieur tranche entre 0 et 180 degrés
+    increment_stat("orientation", "cls_used")
+    if angle in (90, 270):
+        increment_stat("orientation", "pages_rotated")
+        return img.rotate(angle, expand=True), angle, True
+    return img, 0, True
+
+def prepare_page(
+    page_num: int,
+    img: Image.Image,
+    enhance: Optional[str],
+    ocr_engine: Optional[PaddleOCR],
+    options: Dict,
+    transport: str = "file",
+) -> Dict:
+    """Étage de pré-traitement: orientation, amélioration et encodage pour le moteur.
+
+    transport vaut "file" (PNG temporaire, inférence locale) ou "shared" (segment de
+    mémoire partagée lu par un processus d'inférence). En mode "shared", ocr_engine
+    peut être None: la configuration du profil indique alors le classifieur d'angle.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    original_size = img.size
+    img, angle, use_cls = resolve_angle_classification(
+        img,
+        engine_uses_angle_cls(ocr_engine, options.get("profile")),
+        options.get("angle_cls", AngleClassification.AUTO.value),
+    )
+    source = img
+    timings["orientation"] = time.perf_counter() - started
+
+    # Pré-traitement si demandé
+    if enhance:
+        started = time.perf_counter()
+        img = preprocess_image(img, enhance)
+        timings["preprocess"] = time.perf_counter() - started
+
+    prepared = {
+        "page": page_num,
+        "original_size": original_size,
+        "angle": angle,
+        "use_cls": use_cls,
+        "timings": timings,
+    }
+    started = time.perf_counter()
+    tiled = img.width * img.height > TILE_PIXEL_THRESHOLD
+    if transport == "shared":
+        prepared["tiled"] = tiled
+        prepared["shared_image"] = put_shared_page(img)
+        if options.get("refine"):
+            prepared["shared_source"] = put_shared_page(source)
+        timings["encode"] = time.perf_counter() - started
+        return prepared
+
+    if tiled:
+        # Les tuiles sont encodées séparément au moment de l'inférence
+        prepared["image"] = img
+    else:
+        prepared["png_path"] = save_temporary_png(img)
+        timings["encode"] = time.perf_counter() - started
+    # L'image non traitée n'est conservée que pour la seconde passe
+    if options.get("refine"):
+        prepared["source"] = source
+    return prepared
+
+def page_confidence(page_lines: List[Dict]) -> float:
+    """Confiance d'une page: moyenne des lignes pondérée par leur longueur (0 sans texte)"""
+    weights = sum(len(line["text"]) for line in page_lines)
+    if not weights:
+        return 0.0
+    return sum(line["confidence"] * len(line["text"]) for line in page_lines) / weights
+
+def infer_lines(prepared: Dict, ocr_engine: PaddleOCR, profile: Optional[str], use_cls: bool) -> List[Dict]:
+    """OCR de la page préparée avec un moteur (fichier, pixels partagés ou tuiles)"""
+    source = prepared.get("png_path", prepared.get("pixels"))
+    if source is not None:
+        if recognition_memo.max_entries > 0:
+            page_lines = infer_memoized(ocr_engine, source, profile, use_cls)
+            if page_lines is not None:
+                return page_lines
+        return as_ocr_engine(ocr_engine).infer(source, use_cls)
+    engines = get_tile_engines(ocr_engine, profile)
+    return recognize_tiled(engines, prepared["image"], use_cls)
+
+def infer_page(prepared: Dict, ocr_engine: PaddleOCR, options: Dict) -> Dict:
+    """Étage d'inférence: OCR de la page préparée puis post-traitement des lignes"""
+    page_num = prepared["page"]
+    timings = prepared.get("timings", {})
+    profile = options.get("profile")
+    heavy_lock = None
+    try:
+        started = time.perf_counter()
+        page_lines = infer_lines(prepared, ocr_engine, profile, prepared["use_cls"])
+        timings["inference"] = time.perf_counter() - started
+
+        # Moteur léger: une page peu fiable est relue par le moteur d'escalade du profil
+        config = OCR_PROFILE_CONFIGS.get(profile, {})
+        if config.get("escalate_to"):
+            heavy = get_ocr_engine(config["escalate_to"])
+            if heavy is not ocr_engine:
+                increment_stat("engines", "light_pages")
+                if page_confidence(page_lines) < config.get("escalate_below", REFINE_CONFIDENCE_THRESHOLD):
+                    started = time.perf_counter()
+                    use_cls = prepared["use_cls"] or (
+                        options.get("angle_cls") != AngleClassification.NEVER.value
+                        and engine_uses_angle_cls(heavy, None)
+                    )
+                    heavy_lock = get_engine_lock(heavy)
+                    with heavy_lock:
+                        page_lines = infer_lines(prepared, heavy, config["escalate_to"], use_cls)
+                    ocr_engine = heavy
+                    increment_stat("engines", "escalated")
+                    timings["escalation"] = time.perf_counter() - started
+
+        # Seconde passe ciblée sur les lignes peu fiables, à partir de l'image non traitée
+        if options.get("refine"):
+            started = time.perf_counter()
+            render = None
+            if prepared.get("pdf_source"):
+                render = functools.partial(
+                    render_pdf_line, prepared["pdf_source"], prepared["angle"], prepared["original_size"]
+                )
+            with heavy_lock or nullcontext():
+                refine_low_confidence_lines(
+                    ocr_engine,
+                    prepared["source"],
+                    page_lines,
+                    options.get("refine_threshold", REFINE_CONFIDENCE_THRESHOLD),
+                    render,
+                )
+            timings["refine"] = time.perf_counter() - started
+
+        if prepared["angle"]:
+            for line in page_lines:
+                line["bbox"] = unrotate_bbox(line["bbox"], prepared["angle"], prepared["original_size"])
 
         return {
             "page": page_num,
             "lines": page_lines,
-            "status": "success"
+            "status": "success",
+            "size": prepared["original_size"],
+            "timings": timings,
         }
+    finally:
+        release_prepared_page(prepared)
+
+def release_prepared_page(prepared: Dict) -> None:
+    """Libère le fichier temporaire, les segments partagés et les images d'une page préparée"""
+    path = prepared.pop("png_path", None)
+    if path:
+        remove_temporary_file(path)
+    for key in ("shared_image", "shared_source"):
+        handle = prepared.pop(key, None)
+        if handle:
+            release_shared_page(handle)
+    prepared.pop("pixels", None)
+    prepared.pop("image", None)
+    prepared.pop("source", None)
+
+# Segments de mémoire partagée créés par ce processus, par nom
+shared_pages: Dict[str, shared_memory.SharedMemory] = {}
+shared_pages_lock = threading.Lock()
+
+def put_shared_page(img: Image.Image) -> Dict:
+    """Copie les pixels RGB d'une page dans un segment partagé et renvoie son descripteur"""
+    pixels = np.asarray(img.convert("RGB"), dtype=np.uint8)
+    segment = shared_memory.SharedMemory(create=True, size=max(pixels.nbytes, 1))
+    np.ndarray(pixels.shape, dtype=np.uint8, buffer=segment.buf)[...] = pixels
+    with shared_pages_lock:
+        shared_pages[segment.name] = segment
+    return {"name": segment.name, "shape": pixels.shape}
+
+def attach_shared_page(handle: Dict) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Ouvre un segment créé par un autre processus; le tableau renvoyé est une vue sans copie"""
+    segment = shared_memory.SharedMemory(name=handle["name"])
+    try:
+        # Le segment appartient au processus créateur: il ne doit pas être supprimé ici
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment, np.ndarray(handle["shape"], dtype=np.uint8, buffer=segment.buf)
+
+def release_shared_page(handle: Dict) -> None:
+    """Ferme et supprime un segment créé par ce processus (sans effet s'il est déjà libéré)"""
+    with shared_pages_lock:
+        segment = shared_pages.pop(handle["name"], None)
+    if segment is None:
+        return
+    try:
+        segment.close()
+        segment.unlink()
+    except (FileNotFoundError, BufferError) as e:
+        logger.warning(f"Libération du segment partagé {handle['name']} incomplète: {e}")
+
+@atexit.register
+def _release_all_shared_pages() -> None:
+    with shared_pages_lock:
+        names = list(shared_pages)
+    for name in names:
+        release_shared_page({"name": name})
+
+def _init_ocr_worker(engine_class: type) -> None:
+    """Initialisation d'un processus d'inférence: chaque processus charge ses propres moteurs"""
+    global ocr_engine_class
+    ocr_engine_class = engine_class
+    ocr_engines_cache.clear()
+    tile_engines_cache.clear()
+
+def _infer_shared_page(prepared: Dict, options: Dict) -> Dict:
+    """Inférence d'une page dans un processus dédié, à partir des segments partagés"""
+    segments = []
+    pixels = source = None
+    try:
+        segment, pixels = attach_shared_page(prepared.pop("shared_image"))
+        segments.append(segment)
+        if prepared.pop("tiled"):
+            prepared["image"] = Image.fromarray(pixels)
+        else:
+            prepared["pixels"] = pixels
+        if "shared_source" in prepared:
+            segment, source = attach_shared_page(prepared.pop("shared_source"))
+            segments.append(segment)
+            prepared["source"] = Image.fromarray(source)
+        return infer_page(prepared, get_ocr_engine(options["profile"]), options)
+    except Exception as e:
+        return page_error(prepared["page"], e)
+    finally:
+        # Les vues sur les segments doivent disparaître avant leur fermeture
+        prepared.clear()
+        pixels = source = None
+        for segment in segments:
+            segment.close()
+
+ocr_process_pool: Optional[ProcessPoolExecutor] = None
+ocr_process_pool_lock = threading.Lock()
+
+def get_ocr_process_pool() -> ProcessPoolExecutor:
+    """Pool des processus d'inférence, créé au démarrage du serveur.
+
+    Les processus sont lancés en « spawn »: un fork du serveur (threads uvicorn, pool
+    d'exécution, pipeline) pourrait copier des verrous tenus et bloquer l'enfant.
+    """
+    global ocr_process_pool
+    with ocr_process_pool_lock:
+        if ocr_process_pool is None:
+            ocr_process_pool = ProcessPoolExecutor(
+                max_workers=OCR_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker,
+                initargs=(get_ocr_engine_class(),),
+            )
+            logger.info(f"{OCR_PROCESS_WORKERS} processus d'inférence démarrés (spawn)")
+        return ocr_process_pool
+
+def discard_ocr_process_pool(broken: ProcessPoolExecutor) -> None:
+    """Abandonne un pool dont un processus s'est arrêté brutalement (plantage, OOM killer).
+
+    Un pool cassé refuse toute nouvelle page: le suivant est recréé par get_ocr_process_pool.
+    """
+    global ocr_process_pool
+    with ocr_process_pool_lock:
+        if ocr_process_pool is not broken:
+            return  # déjà remplacé après une autre page en échec
+        ocr_process_pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+    logger.error("Un processus d'inférence s'est arrêté brutalement, pool recréé à la prochaine page")
+
+def page_error(page_num: int, error: Exception) -> Dict:
+    logger.error(f"Échec traitement page {page_num}: {error}", extra={"page": page_num})
+    return {
+        "page": page_num,
+        "lines": [],
+        "status": "error",
+        "error": str(error)
+    }
+
+def process_single_page(args) -> Dict:
+    """Traite une seule page (pré-traitement puis inférence) sans pipeline"""
+    page_num, img, enhance, ocr_engine, options = args
 
+    try:
+        return infer_page(prepare_page(page_num, img, enhance, ocr_engine, options), ocr_engine, options)
     except Exception as e:
-        logger.error(f"Échec traitement page {page_num}: {e}")
-        return {
-            "page": page_num,
-            "lines": [],
-            "status": "error",
-            "error": str(e)
-        }
+        return page_error(page_num, e)
+
+# Verrous par moteur: un moteur PaddleOCR n'est pas utilisable par deux threads à la fois
+engine_locks: Dict[int, threading.Lock] = {}
+engine_locks_guard = threading.Lock()
+
+def get_engine_lock(ocr_engine: PaddleOCR) -> threading.Lock:
+    with engine_locks_guard:
+        return engine_locks.setdefault(id(ocr_engine), threading.Lock())
+
+class PageScheduler:
+    """Accès page par page à un moteur (ou au pool de processus d'inférence).
+
+    La classe interactive est toujours servie avant la classe batch, qui utilise la
+    capacité restante. Au sein d'une classe, les clients se partagent le moteur au
+    prorata de leur poids: chaque page reçoit une étiquette de temps virtuel (file
+    équitable pondérée) et la plus petite étiquette est servie en premier, quel que
+    soit le nombre de documents envoyés par chaque client.
+    """
+
+    def __init__(self, slots: int = 1):
+        self.slots = slots
+        self.busy = 0
+        self._lock = threading.Lock()
+        self._waiting: List[Tuple] = []   # tas (rang de classe, étiquette, ordre d'arrivée, classe, événement)
+        self._virtual_time = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._finish_tags: Dict[Tuple[str, str], float] = {}
+        self._arrivals = itertools.count()
+
+    def waiting(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {priority: 0 for priority in PRIORITY_CLASSES}
+            for entry in self._waiting:
+                counts[entry[3]] += 1
+            return counts
+
+    @contextmanager
+    def page(self, tenant: str, priority: str, weight: float = 1.0):
+        """Attend le tour d'une page, puis garde le moteur jusqu'à la sortie du bloc"""
+        with self._lock:
+            key = (priority, tenant)
+            tag = max(self._virtual_time[priority], self._finish_tags.get(key, 0.0))
+            self._finish_tags[key] = tag + 1.0 / weight
+            turn = None
+            if self.busy < self.slots and not self._waiting:
+                self.busy += 1
+                self._virtual_time[priority] = tag
+            else:
+                turn = threading.Event()
+                heapq.heappush(self._waiting, (PRIORITY_CLASSES.index(priority), tag, next(self._arrivals), priority, turn))
+        if turn is not None:
+            turn.wait()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            if not self._waiting:
+                self.busy -= 1
+                return
+            # La place passe directement à la page suivante
+            _, tag, _, priority, turn = heapq.heappop(self._waiting)
+            self._virtual_time[priority] = tag
+            turn.set()
+
+# Ordonnanceurs par moteur (capacité 1) et pour le pool de processus d'inférence
+page_schedulers: Dict[object, PageScheduler] = {}
+
+def get_page_scheduler(ocr_engine: Optional[PaddleOCR]) -> PageScheduler:
+    """Ordonnanceur d'un moteur local, ou du pool de processus si ocr_engine est None"""
+    with engine_locks_guard:
+        if ocr_engine is None:
+            return page_schedulers.setdefault("processes", PageScheduler(max(1, OCR_PROCESS_WORKERS)))
+        return page_schedulers.setdefault(id(ocr_engine), PageScheduler())
+
+def request_tenant(tenant_id: Optional[str], api_key: Optional[str]) -> str:
+    """Client d'une requête: en-tête X-Tenant-ID, sinon empreinte de la clé d'API"""
+    if tenant_id:
+        return tenant_id
+    if api_key:
+        return "key-" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+    return DEFAULT_TENANT
+
+def resolve_schedule(schedule: Optional[Dict], page_count: int) -> Dict:
+    """Classe et poids d'un document admis.
+
+    Un document court est interactif; l'en-tête X-Priority ne peut que le déclasser en batch.
+    """
+    schedule = dict(schedule or {})
+    tenant = schedule.get("tenant") or DEFAULT_TENANT
+    batch = schedule.get("priority") == "batch" or page_count > INTERACTIVE_MAX_PAGES
+    return {
+        "tenant": tenant,
+        "priority": "batch" if batch else "interactive",
+        "weight": float(TENANT_WEIGHTS.get(tenant, 1.0)),
+    }
 
-async def run_ocr(ocr_engine: PaddleOCR, file_bytes: bytes, enhance: Optional[str] = None) -> List[Dict]:
-    """Exécute l'OCR avec traitement parallèle et gestion d'erreurs robuste"""
+_PIPELINE_END = object()
+
+# Profilage CPU à la demande (réservé aux administrateurs)
+OCR_ADMIN_TOKEN = os.getenv("OCR_ADMIN_TOKEN")
+PROFILE_SAMPLE_INTERVAL = 0.005  # période d'échantillonnage (s)
+
+class StackSampler:
+    """Profileur CPU par échantillonnage des threads d'une requête.
+
+    Le résultat est au format « folded » (une pile par ligne suivie de son nombre
+    d'échantillons), lu par flamegraph.pl, speedscope ou inferno. Un thread n'est
+    compté que si son horloge CPU a avancé depuis l'échantillon précédent: les
+    attentes (verrou du moteur, file, future) n'apparaissent pas dans le profil.
+    Sans horloge CPU par thread (Windows), les threads dont la pile s'arrête dans
+    threading.py ou queue.py sont ignorés.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self._threads: Dict[int, Tuple[str, Optional[int]]] = {}
+        self._cpu_times: Dict[int, float] = {}
+        self._stacks: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_current_thread(self) -> None:
+        current = threading.current_thread()
+        try:
+            clock = time.pthread_getcpuclockid(current.ident)
+        except (AttributeError, OSError):
+            clock = None
+        self._threads[current.ident] = (current.name, clock)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="ocr-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self._stacks.items()))
+
+    def _on_cpu(self, ident: int, clock: Optional[int], frame) -> bool:
+        if clock is None:
+            return os.path.basename(frame.f_code.co_filename) not in ("threading.py", "queue.py")
+        try:
+            cpu_time = time.clock_gettime(clock)
+        except OSError:  # Thread terminé
+            return False
+        previous = self._cpu_times.get(ident)
+        self._cpu_times[ident] = cpu_time
+        return previous is not None and cpu_time - previous >= self.interval * 0.1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, (name, clock) in list(self._threads.items()):
+                frame = frames.get(ident)
+                if frame is None or not self._on_cpu(ident, clock, frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ";".join([name.rsplit("-", 1)[0]] + stack[::-1])
+                self._stacks[key] = self._stacks.get(key, 0) + 1
+                self.samples += 1
+
+class OCRCancelled(Exception):
+    """Traitement interrompu avant la fin (client déconnecté ou échéance dépassée)"""
+
+    def __init__(self, reason: str, pages_done: int = 0, pages_skipped: int = 0):
+        super().__init__(reason)
+        self.reason = reason
+        self.pages_done = pages_done
+        self.pages_skipped = pages_skipped
+
+class CancellationToken:
+    """Signal d'annulation partagé entre la requête et les workers du pipeline"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self._event = threading.Event()
+        self.deadline = deadline  # horloge time.monotonic()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str) -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def is_cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline")
+            return True
+        return False
+
+def _start_stage(
+    name: str,
+    worker_count: int,
+    handler,
+    inbox: queue.Queue,
+    outbox: queue.Queue,
+    profiler: Optional["StackSampler"] = None,
+) -> List[threading.Thread]:
+    """Démarre un étage du pipeline; le dernier worker terminé signale la fin à l'étage suivant"""
+    remaining = [worker_count]
+    remaining_lock = threading.Lock()
+
+    def worker() -> None:
+        if profiler is not None:
+            profiler.add_current_thread()
+        while True:
+            item = inbox.get()
+            if item is _PIPELINE_END:
+                inbox.put(_PIPELINE_END)  # Propagation aux autres workers de l'étage
+                break
+            outbox.put(handler(item))
+        with remaining_lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            outbox.put(_PIPELINE_END)
+
+    # Chaque thread reprend le contexte de journalisation de la requête
+    threads = [
+        threading.Thread(target=contextvars.copy_context().run, args=(worker,), name=f"ocr-{name}-{index}", daemon=True)
+        for index in range(worker_count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def run_page_pipeline(
+    document: DocumentPages,
+    ocr_engine: Optional[PaddleOCR],
+    enhance: Optional[str],
+    options: Dict,
+    on_page=None,
+    cancel: Optional[CancellationToken] = None,
+    profiler: Optional["StackSampler"] = None,
+    schedule: Optional[Dict] = None,
+) -> List[Dict]:
+    """Enchaîne rastérisation, pré-traitement, inférence et assemblage avec des files bornées.
+
+    Chaque étage dispose de ses propres workers; la mémoire est bornée par la taille des
+    files. on_page, si fourni, reçoit chaque résultat dans l'ordre des pages. Si cancel
+    est déclenché, plus aucune page n'est lancée et OCRCancelled est levée. schedule
+    (resolve_schedule) donne le client et la classe de priorité des pages auprès du moteur.
+    """
+    page_numbers: queue.Queue = queue.Queue()
+    rasterized: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    prepared: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    finished: queue.Queue = queue.Queue()
+    for page_num in range(1, document.page_count + 1):
+        page_numbers.put(page_num)
+    page_numbers.put(_PIPELINE_END)
+
+    def cancelled(page_num: int) -> bool:
+        return cancel is not None and cancel.is_cancelled()
+
+    def rasterize(page_num: int) -> Dict:
+        if cancelled(page_num):
+            return {"page": page_num, "status": "cancelled"}
+        try:
+            started = time.perf_counter()
+            image = document.load(page_num)
+            return {"page": page_num, "image": image, "rasterize": time.perf_counter() - started}
+        except Exception as e:
+            return page_error(page_num, e)
+
+    use_processes = OCR_PROCESS_WORKERS > 0 and bool(options.get("profile"))
+    schedule = schedule or resolve_schedule(None, document.page_count)
+    scheduler = get_page_scheduler(None if use_processes else ocr_engine)
+    in_flight: Dict[int, Dict] = {}
+    in_flight_lock = threading.Lock()
+
+    def preprocess(item: Dict) -> Dict:
+        if "image" not in item:
+            return item
+        if cancelled(item["page"]):
+            return {"page": item["page"], "status": "cancelled"}  # Image rastérisée abandonnée
+        try:
+            ready = prepare_page(
+                item["page"], item["image"], enhance, ocr_engine, options,
+                transport="shared" if use_processes else "file",
+            )
+        except Exception as e:
+            return page_error(item["page"], e)
+        ready["timings"]["rasterize"] = item["rasterize"]
+        if options.get("refine") and document.kind == "pdf" and document.path:
+            # Les lignes relues sont re-rendues depuis le PDF, à REFINE_DPI
+            ready["pdf_source"] = {"path": document.path, "page": document.document_page(item["page"])}
+        if options.get("page_images"):
+            # Image de la page pour les sorties qui la reprennent (PDF consultable)
+            started = time.perf_counter()
+            ready["page_image"] = encode_page_image(item["image"])
+            ready["timings"]["page_image"] = time.perf_counter() - started
+        with in_flight_lock:
+            in_flight[ready["page"]] = ready
+        return ready
+
+    def infer(item: Dict) -> Dict:
+        if "status" in item:
+            return item
+        page_image = item.pop("page_image", None)
+        try:
+            if cancelled(item["page"]):
+                return {"page": item["page"], "status": "cancelled"}
+            started = time.perf_counter()
+            with scheduler.page(schedule["tenant"], schedule["priority"], schedule["weight"]):
+                item["timings"]["schedule_wait"] = time.perf_counter() - started
+                if cancelled(item["page"]):
+                    return {"page": item["page"], "status": "cancelled"}
+                increment_stat("scheduling", f"{schedule['priority']}_pages")
+                if use_processes:
+                    # Seuls les descripteurs des segments sont sérialisés vers le processus
+                    pool = get_ocr_process_pool()
+                    try:
+                        result = pool.submit(_infer_shared_page, dict(item), options).result()
+                    except BrokenProcessPool:
+                        discard_ocr_process_pool(pool)
+                        raise
+                else:
+                    with get_engine_lock(ocr_engine):
+                        result = infer_page(item, ocr_engine, options)
+        except Exception as e:
+            result = page_error(item["page"], e)
+        finally:
+            release_prepared_page(item)
+            with in_flight_lock:
+                in_flight.pop(item["page"], None)
+        if page_image is not None:
+            result["page_image"] = page_image
+        return result
+
+    if profiler is not None:
+        profiler.add_current_thread()
+    _start_stage("rasterize", PIPELINE_RASTERIZE_WORKERS if document.kind == "pdf" else 1,
+                 rasterize, page_numbers, rasterized, profiler)
+    _start_stage("preprocess", PIPELINE_PREPROCESS_WORKERS, preprocess, rasterized, prepared, profiler)
+    _start_stage("infer", OCR_PROCESS_WORKERS if use_processes else PIPELINE_INFER_WORKERS,
+                 infer, prepared, finished, profiler)
+
+    # Assemblage: remise en ordre des pages terminées
+    results: List[Dict] = []
+    pending: Dict[int, Dict] = {}
+    next_page = 1
+    skipped = 0
     try:
-        # Conversion en images
-        images = convert_bytes_to_images(file_bytes)
+        while True:
+            item = finished.get()
+            if item is _PIPELINE_END:
+                break
+            if item.get("status") == "cancelled":
+                skipped += 1
+                continue
+            pending[item["page"]] = item
+            while next_page in pending:
+                result = pending.pop(next_page)
+                # Numérotation du document (plage de pages first_page/last_page)
+                result["page"] = document.document_page(next_page)
+                scale = document.scales.get(result["page"])
+                if scale:
+                    # Page décodée à résolution réduite: boîtes ramenées à l'image d'origine
+                    for line in result.get("lines", []):
+                        line["bbox"] = [[point[0] * scale[0], point[1] * scale[1]] for point in line["bbox"]]
+                    if "size" in result:
+                        result["size"] = (round(result["size"][0] * scale[0]), round(result["size"][1] * scale[1]))
+                results.append(result)
+                if on_page:
+                    on_page(result)
+                next_page += 1
+    finally:
+        # Pages préparées mais jamais traitées: fichiers et segments partagés libérés
+        with in_flight_lock:
+            leftovers = list(in_flight.values())
+            in_flight.clear()
+        for leftover in leftovers:
+            release_prepared_page(leftover)
+
+    if cancel is not None and cancel.is_cancelled() and skipped:
+        done = len(results) + len(pending)
+        increment_stat("cancellation", "requests")
+        increment_stat("cancellation", "pages_skipped", skipped)
+        logger.info(
+            f"Traitement interrompu ({cancel.reason}): {done} page(s) traitée(s), "
+            f"{skipped} page(s) évitée(s) sur {document.page_count}"
+        )
+        raise OCRCancelled(cancel.reason, done, skipped)
+    return results
+
+def pipeline_pages_in_flight() -> int:
+    """Nombre maximal de pages décodées simultanément par le pipeline d'une requête"""
+    infer_workers = OCR_PROCESS_WORKERS or PIPELINE_INFER_WORKERS
+    return (
+        PIPELINE_RASTERIZE_WORKERS + PIPELINE_PREPROCESS_WORKERS + infer_workers
+        + 2 * PIPELINE_QUEUE_SIZE
+    )
+
+def page_working_copies(options: Optional[Dict] = None) -> int:
+    """Copies d'une page décodée présentes simultanément, selon le mode d'inférence et les options"""
+    shared = OCR_PROCESS_WORKERS > 0
+    copies = PAGE_WORKING_COPIES + (1 if shared else 0)  # segment de mémoire partagée
+    if options and options.get("refine"):
+        copies += 2 if shared else 1  # image source conservée (et son segment)
+    return copies
+
+def estimate_document_memory(document: DocumentPages, options: Optional[Dict] = None) -> int:
+    """Estimation (octets) des pixels RGB décodés simultanément pour un document"""
+    width, height = document.page_size
+    pages = min(document.page_count, pipeline_pages_in_flight())
+    return width * height * 3 * page_working_copies(options) * pages
+
+class MemoryBudget:
+    """Budget mémoire partagé: les requêtes réservent leur estimation avant de rastériser.
+
+    Les réservations en attente sont servies par classe de priorité (rang 0 d'abord),
+    puis dans l'ordre d'arrivée.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.reserved = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, amount: int, timeout: float, rank: int = 0) -> Optional[int]:
+        """Réserve amount octets; renvoie la quantité réservée ou None après timeout"""
+        # Un document plus gros que le budget entier est traité seul
+        amount = min(amount, self.capacity)
+        ahead = [waiter for waiter in self._waiters if waiter[0] <= rank]
+        if not ahead and self.reserved + amount <= self.capacity:
+            self.reserved += amount
+            return amount
+
+        waiter = (rank, amount, asyncio.get_running_loop().create_future())
+        self._waiters.insert(self._waiters.index(ahead[-1]) + 1 if ahead else 0, waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[2]), timeout)
+            return amount
+        except asyncio.TimeoutError:
+            if waiter[2].done():  # Accordée juste avant l'expiration
+                return amount
+            waiter[2].cancel()
+            return None
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                # Accordée juste avant l'annulation (déconnexion, échéance): rendue au budget
+                self.release(amount)
+            else:
+                waiter[2].cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._grant()
+
+    def release(self, amount: int) -> None:
+        self.reserved -= amount
+        self._grant()
+
+    def _grant(self) -> None:
+        while self._waiters:
+            _, amount, future = self._waiters[0]
+            if future.done():
+                self._waiters.pop(0)
+                continue
+            if self.reserved + amount > self.capacity:
+                break
+            self.reserved += amount
+            future.set_result(True)
+            self._waiters.pop(0)
+
+memory_budget = MemoryBudget(MEMORY_BUDGET_BYTES)
+
+class LoadTracker:
+    """Pages admises non terminées (par classe de priorité) et temps de service récent par page"""
+
+    def __init__(self):
+        self.pending = {priority: 0 for priority in PRIORITY_CLASSES}
+        self.page_seconds = DEFAULT_PAGE_SECONDS
+
+    @property
+    def pending_pages(self) -> int:
+        return sum(self.pending.values())
+
+    @staticmethod
+    def parallelism() -> int:
+        return OCR_PROCESS_WORKERS or PIPELINE_INFER_WORKERS
+
+    def pages_ahead(self, priority: Optional[str] = None) -> int:
+        """Pages servies avant une nouvelle page de la classe priority (toutes si None).
+
+        Les classes sont servies dans l'ordre strict de PRIORITY_CLASSES: les pages des
+        classes suivantes ne la retardent que de celles déjà en cours sur le moteur.
+        """
+        if priority is None:
+            return self.pending_pages
+        rank = PRIORITY_CLASSES.index(priority)
+        ahead = sum(self.pending[p] for p in PRIORITY_CLASSES[:rank + 1])
+        behind = sum(self.pending[p] for p in PRIORITY_CLASSES[rank + 1:])
+        return ahead + min(behind, self.parallelism())
+
+    def predicted_wait(self, priority: Optional[str] = None) -> float:
+        """Attente prévue (s) avant qu'une nouvelle requête de la classe priority commence à être servie"""
+        return self.pages_ahead(priority) * self.page_seconds / self.parallelism()
+
+    def estimated_finish(self, page_count: int, priority: Optional[str] = None) -> float:
+        """Durée prévue (s) pour traiter page_count pages soumises maintenant, attente comprise"""
+        return self.predicted_wait(priority) + page_count * self.page_seconds
+
+    def record(self, pages: int, elapsed: float) -> None:
+        """Prend en compte elapsed secondes de service (moteur occupé) pour pages pages"""
+        if pages <= 0:
+            return
+        sample = elapsed / pages
+        self.page_seconds += PAGE_SECONDS_SMOOTHING * (sample - self.page_seconds)
+
+load_tracker = LoadTracker()
+
+def check_admission(page_count: int, deadline: Optional[float], priority: Optional[str] = None) -> None:
+    """Refuse (503 + Retry-After) les requêtes dont l'attente ou l'échéance ne peut être tenue.
+
+    L'attente est prévue pour la classe de la requête: une file de pages batch ne fait
+    pas refuser les requêtes interactives, servies avant elles.
+    """
+    wait = load_tracker.predicted_wait(priority)
+    if wait > MAX_QUEUE_WAIT:
+        increment_stat("load", "shed")
+        logger.warning(f"Délestage ({priority or 'toutes classes'}): attente prévue {wait:.1f}s > {MAX_QUEUE_WAIT:.0f}s")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Serveur surchargé (attente prévue {wait:.0f}s), réessayez plus tard",
+            headers={"Retry-After": str(max(1, math.ceil(wait - MAX_QUEUE_WAIT)))},
+        )
+    if deadline is not None:
+        finish = load_tracker.estimated_finish(page_count, priority)
+        remaining = deadline - time.monotonic()
+        if finish > remaining:
+            increment_stat("load", "deadline_rejected")
+            logger.info(f"Échéance intenable: {finish:.1f}s prévues pour {max(remaining, 0):.1f}s disponibles")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Traitement estimé à {finish:.0f}s, au-delà de l'échéance demandée",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
 
-        if not images:
-            raise HTTPException(status_code=400, detail="Aucune image valide trouvée")
+# Index plein texte des résultats (désactivé si OCR_INDEX_PATH n'est pas défini)
+OCR_INDEX_PATH = os.getenv("OCR_INDEX_PATH")
+SEARCH_MAX_LIMIT = 100           # documents par page de résultats au maximum
+SEARCH_LINES_PER_DOCUMENT = 20   # lignes correspondantes renvoyées par document
+
+class OCRIndex:
+    """Index SQLite FTS5 des lignes reconnues, alimenté page par page.
+
+    Un même contenu (empreinte + profil) réindexé remplace l'entrée précédente. La base
+    est en mode WAL: les workers du serveur pre-fork y écrivent chacun par leur propre
+    connexion, les recherches ne bloquent pas les écritures.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            page_range TEXT NOT NULL DEFAULT '',
+            indexed_at REAL NOT NULL,
+            total_pages INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS documents_content ON documents(sha256, profile, page_range);
+        CREATE TABLE IF NOT EXISTS lines (
+            id INTEGER PRIMARY KEY,
+            document_id INTEGER NOT NULL,
+            page INTEGER NOT NULL,
+            line INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            bbox TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS lines_document ON lines(document_id, page);
+        CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+            text, content='lines', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS lines_insert AFTER INSERT ON lines BEGIN
+            INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS lines_delete AFTER DELETE ON lines BEGIN
+            INSERT INTO lines_fts(lines_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def _delete(self, document_id: int) -> None:
+        self.connection.execute("DELETE FROM lines WHERE document_id = ?", (document_id,))
+        self.connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+    def begin_document(self, sha256: str, filename: str, profile: str, page_range: str = "") -> int:
+        """Crée l'entrée d'un document (remplace une indexation antérieure du même contenu).
+
+        page_range (« 11-20 ») distingue les plages de pages d'un même document traitées
+        séparément; vide pour le document entier.
+        """
+        with self.lock, self.connection:
+            previous = self.connection.execute(
+                "SELECT id FROM documents WHERE sha256 = ? AND profile = ? AND page_range = ?",
+                (sha256, profile, page_range),
+            ).fetchall()
+            for row in previous:
+                self._delete(row["id"])
+            cursor = self.connection.execute(
+                "INSERT INTO documents (sha256, filename, profile, page_range, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (sha256, filename, profile, page_range, time.time()),
+            )
+            return cursor.lastrowid
+
+    def add_page(self, document_id: int, result: Dict) -> None:
+        """Indexe les lignes d'une page terminée (une transaction par page)"""
+        rows = [
+            (document_id, result["page"], number, line["text"], float(line.get("confidence", 0.0)),
+             json.dumps(line.get("bbox") or []))
+            for number, line in enumerate(result.get("lines", []))
+            if line.get("text")
+        ]
+        if not rows:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO lines (document_id, page, line, text, confidence, bbox) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
 
-        # Préparation des arguments pour traitement parallèle
-        args_list = [(page_num, img, enhance, ocr_engine) for page_num, img in enumerate(images, start=1)]
+    def finish_document(self, document_id: int, total_pages: int) -> None:
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE documents SET total_pages = ? WHERE id = ?", (total_pages, document_id))
+
+    def discard_document(self, document_id: int) -> None:
+        """Supprime un document dont le traitement a échoué ou a été annulé"""
+        with self.lock, self.connection:
+            self._delete(document_id)
+
+    def search(self, query: str, limit: int = 10, offset: int = 0, profile: Optional[str] = None) -> Dict:
+        """Documents classés par meilleure ligne (bm25), avec leurs lignes correspondantes.
+
+        Lève sqlite3.OperationalError si la requête FTS5 est invalide.
+        """
+        profile_filter = "AND d.profile = :profile" if profile else ""
+        params = {"query": query, "profile": profile, "limit": limit, "offset": offset}
+        with self.lock:
+            hits = f"""
+                SELECT l.document_id, bm25(lines_fts) AS score
+                FROM lines_fts JOIN lines l ON l.id = lines_fts.rowid
+                JOIN documents d ON d.id = l.document_id
+                WHERE lines_fts MATCH :query {profile_filter}
+            """
+            total = self.connection.execute(
+                f"SELECT COUNT(DISTINCT document_id) FROM ({hits})", params
+            ).fetchone()[0]
+            # bm25() n'est évaluable que dans la requête FTS elle-même: CTE matérialisée
+            documents = self.connection.execute(
+                f"""WITH h AS MATERIALIZED ({hits})
+                    SELECT d.*, MIN(h.score) AS score, COUNT(*) AS hits
+                    FROM h JOIN documents d ON d.id = h.document_id
+                    GROUP BY h.document_id ORDER BY score, d.id LIMIT :limit OFFSET :offset""",
+                params,
+            ).fetchall()
+            results = []
+            for document in documents:
+                lines = self.connection.execute(
+                    """SELECT l.page, l.line, l.text, l.confidence, l.bbox,
+                              highlight(lines_fts, 0, '[', ']') AS highlight
+                       FROM lines_fts JOIN lines l ON l.id = lines_fts.rowid
+                       WHERE lines_fts MATCH ? AND l.document_id = ?
+                       ORDER BY bm25(lines_fts), l.page, l.line LIMIT ?""",
+                    (query, document["id"], SEARCH_LINES_PER_DOCUMENT),
+                ).fetchall()
+                results.append({
+                    "document_id": document["id"],
+                    "filename": document["filename"],
+                    "profile": document["profile"],
+                    "sha256": document["sha256"],
+                    "indexed_at": document["indexed_at"],
+                    "total_pages": document["total_pages"],
+                    "score": document["score"],
+                    "hits": document["hits"],
+                    "lines": [
+                        {
+                            "page": line["page"], "line": line["line"], "text": line["text"],
+                            "highlight": line["highlight"], "confidence": line["confidence"],
+                            "bbox": json.loads(line["bbox"]),
+                        }
+                        for line in lines
+                    ],
+                })
+        return {"total": total, "results": results}
 
-        # Traitement des pages (séquentiel pour éviter les conflits de ressources)
-        # Le traitement parallèle vrai nécessiterait des moteurs OCR séparés
-        results = []
-        for args in args_list:
-            result = process_single_page(args)
-            results.append(result)
+ocr_index: Optional[OCRIndex] = None
 
-        # Tri des résultats par numéro de page
-        results.sort(key=lambda x: x["page"])
+def index_page(document_id: int, result: Dict, on_page=None) -> None:
+    """on_page du pipeline: une erreur d'indexation n'interrompt pas l'OCR"""
+    try:
+        ocr_index.add_page(document_id, result)
+    except sqlite3.Error as e:
+        logger.warning(f"Indexation de la page {result.get('page')} impossible: {e}")
+    if on_page:
+        on_page(result)
+
+async def run_ocr_indexed(
+    ocr_engine: Optional[PaddleOCR],
+    file_bytes: bytes,
+    enhance: Optional[str],
+    options: Dict,
+    deadline: Optional[float],
+    cancel: CancellationToken,
+    timings: Dict[str, float],
+    filename: str,
+    schedule: Optional[Dict] = None,
+    on_page=None,
+) -> List[Dict]:
+    """run_ocr avec écriture des pages dans l'index au fur et à mesure (puis appel de on_page)"""
+    loop = asyncio.get_running_loop()
+    first_page, last_page = options.get("first_page") or 1, options.get("last_page")
+    page_range = f"{first_page}-{last_page or ''}" if first_page > 1 or last_page else ""
+    document_id = await loop.run_in_executor(
+        None, ocr_index.begin_document,
+        hashlib.sha256(file_bytes).hexdigest(), filename, options.get("profile", ""), page_range,
+    )
+    try:
+        results = await run_ocr(
+            ocr_engine, file_bytes, enhance, options, deadline, cancel, timings,
+            on_page=functools.partial(index_page, document_id, on_page=on_page), schedule=schedule,
+        )
+    except BaseException:
+        await loop.run_in_executor(None, ocr_index.discard_document, document_id)
+        raise
+    await loop.run_in_executor(None, ocr_index.finish_document, document_id, len(results))
+    return results
+
+async def run_ocr(
+    ocr_engine: Optional[PaddleOCR],
+    file_bytes: bytes,
+    enhance: Optional[str] = None,
+    options: Optional[Dict] = None,
+    deadline: Optional[float] = None,
+    cancel: Optional[CancellationToken] = None,
+    timings: Optional[Dict[str, float]] = None,
+    profiler: Optional[StackSampler] = None,
+    on_page=None,
+    schedule: Optional[Dict] = None,
+) -> List[Dict]:
+    """Exécute l'OCR via le pipeline de pages avec gestion d'erreurs robuste.
+
+    deadline est une échéance facultative (horloge time.monotonic()); cancel permet
+    d'interrompre le traitement entre deux pages. timings, si fourni, reçoit les
+    durées des étapes de la requête; profiler échantillonne les threads du pipeline.
+    on_page reçoit chaque page terminée, dans l'ordre. schedule ({"tenant", "priority"})
+    place les pages dans la file de leur client auprès du moteur.
+    """
+    options = options or {}
+    cancel = cancel or CancellationToken(deadline)
+    timings = timings if timings is not None else {}
+    try:
+        # Ouverture du document (les pages sont rastérisées à la demande)
+        started = time.perf_counter()
+        document = open_document(
+            file_bytes, options.get("max_pixels"), options.get("first_page") or 1, options.get("last_page")
+        )
+        timings["open_document"] = time.perf_counter() - started
 
-        return results
+        try:
+            if document.page_count == 0:
+                raise HTTPException(status_code=400, detail="Aucune image valide trouvée")
+
+            # Délestage avant tout travail coûteux
+            schedule = resolve_schedule(schedule, document.page_count)
+            priority = schedule["priority"]
+            check_admission(document.page_count, deadline, priority)
+            load_tracker.pending[priority] += document.page_count
+            try:
+                return await _run_admitted(
+                    document, ocr_engine, enhance, options, cancel, timings, profiler, on_page, schedule
+                )
+            finally:
+                load_tracker.pending[priority] -= document.page_count
+        finally:
+            document.close()
 
     except HTTPException:
         raise
+    except OCRCancelled as cancelled:
+        if cancelled.reason == "deadline":
+            raise HTTPException(
+                status_code=504,
+                detail=f"Échéance dépassée après {cancelled.pages_done} page(s) traitée(s)",
+            )
+        raise HTTPException(status_code=499, detail="Requête annulée par le client")
     except Exception as e:
         logger.error(f"Échec général OCR: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
 
-@app.get("/health")
-async def health_check():
-    """Point de contrôle de santé de l'API"""
+async def _run_admitted(
+    document: DocumentPages,
+    ocr_engine: Optional[PaddleOCR],
+    enhance: Optional[str],
+    options: Dict,
+    cancel: CancellationToken,
+    timings: Dict[str, float],
+    profiler: Optional[StackSampler] = None,
+    on_page=None,
+    schedule: Optional[Dict] = None,
+) -> List[Dict]:
+    """Réserve la mémoire puis exécute le pipeline d'un document admis"""
+    schedule = resolve_schedule(schedule, document.page_count)
+    # Réservation de la mémoire estimée avant toute rastérisation
+    estimate = estimate_document_memory(document, options)
+    if memory_budget.reserved + estimate > memory_budget.capacity or memory_budget.waiting:
+        increment_stat("memory", "queued")
+        logger.info(f"Budget mémoire saturé, mise en attente ({estimate // 2**20} Mo)")
+    wait = MEMORY_BUDGET_WAIT
+    if cancel.deadline is not None:
+        wait = max(0.0, min(wait, cancel.deadline - time.monotonic()))
+    started = time.perf_counter()
+    reserved = await memory_budget.acquire(estimate, wait, PRIORITY_CLASSES.index(schedule["priority"]))
+    timings["memory_wait"] = time.perf_counter() - started
+    if reserved is None:
+        if cancel.is_cancelled():
+            raise OCRCancelled(cancel.reason, 0, document.page_count)
+        increment_stat("memory", "rejected")
+        raise HTTPException(
+            status_code=503,
+            detail="Serveur saturé (budget mémoire épuisé), réessayez plus tard",
+            headers={"Retry-After": str(MEMORY_RETRY_AFTER)},
+        )
+    increment_stat("memory", "admitted")
+
     try:
-        from paddleocr import PaddleOCR
-        import paddleocr
-        version = getattr(paddleocr, '__version__', 'unknown')
+        if cancel.is_cancelled():
+            raise OCRCancelled(cancel.reason, 0, document.page_count)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        results = await loop.run_in_executor(
+            pipeline_executors[schedule["priority"]], contextvars.copy_context().run,
+            run_page_pipeline, document, ocr_engine, enhance, options, on_page, cancel, profiler, schedule,
+        )
+        timings["pipeline"] = time.perf_counter() - started
+        # Temps de service du moteur et non latence: l'attente derrière les autres
+        # requêtes est déjà prise en compte par pending_pages
+        served = [page["timings"] for page in results if "timings" in page]
+        load_tracker.record(
+            len(served),
+            sum(page.get("inference", 0.0) + page.get("escalation", 0.0) + page.get("refine", 0.0) for page in served),
+        )
+        return results
+    finally:
+        memory_budget.release(reserved)
+
+# Exécutions OCR en cours, par clé de requête (contenu + paramètres)
+inflight_ocr: Dict[str, Dict] = {}
+
+# Intervalle (s) de vérification de la connexion du client pendant le traitement
+DISCONNECT_POLL_INTERVAL = 0.5
+
+def ocr_request_key(file_bytes: bytes, enhance: Optional[str], options: Dict) -> str:
+    """Clé identifiant une requête OCR: empreinte du contenu, profil, amélioration et options"""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return f"{digest}:{enhance or ''}:{json.dumps(options, sort_keys=True)}"
+
+async def run_ocr_coalesced(
+    ocr_engine: Optional[PaddleOCR],
+    file_bytes: bytes,
+    enhance: Optional[str] = None,
+    options: Optional[Dict] = None,
+    deadline: Optional[float] = None,
+    is_disconnected=None,
+    timings: Optional[Dict[str, float]] = None,
+    filename: str = "unknown",
+    schedule: Optional[Dict] = None,
+) -> List[Dict]:
+    """Exécute run_ocr une seule fois pour des requêtes identiques simultanées.
+
+    Les requêtes arrivant pendant l'exécution s'y rattachent et reçoivent le même
+    résultat (à traiter en lecture seule). Les requêtes avec échéance ne sont pas
+    partagées. is_disconnected, coroutine facultative,
+    signale le départ du client; l'exécution n'est annulée que lorsque plus aucune
+    requête ne l'attend. timings reçoit les durées de l'exécution partagée. Si l'index
+    est activé, l'exécution y écrit le document sous le nom filename. schedule est
+    celui de la requête qui lance l'exécution.
+    """
+    options = options or {}
+    # Une requête avec échéance s'exécute seule: son échéance ne doit ni interrompre
+    # ni prolonger l'attente des requêtes identiques
+    key = ocr_request_key(file_bytes, enhance, options) if deadline is None else None
+    entry = inflight_ocr.get(key) if key else None
+    if entry is None:
+        cancel = CancellationToken(deadline)
+        shared_timings: Dict[str, float] = {}
+        if ocr_index is not None:
+            execution = run_ocr_indexed(
+                ocr_engine, file_bytes, enhance, options, deadline, cancel, shared_timings, filename, schedule
+            )
+        else:
+            execution = run_ocr(
+                ocr_engine, file_bytes, enhance, options, deadline, cancel, shared_timings, schedule=schedule
+            )
+        task = asyncio.ensure_future(execution)
+        entry = {"task": task, "cancel": cancel, "waiters": 0, "timings": shared_timings}
+        if key:
+            inflight_ocr[key] = entry
+
+            def forget(done: asyncio.Future) -> None:
+                if key in inflight_ocr and inflight_ocr[key]["task"] is done:
+                    del inflight_ocr[key]
+
+            task.add_done_callback(forget)
+        increment_stat("coalescing", "executions")
+    else:
+        increment_stat("coalescing", "coalesced")
+        logger.info("Requête identique déjà en cours, résultat partagé")
+
+    task = entry["task"]
+    entry["waiters"] += 1
+    try:
+        # asyncio.wait n'annule pas l'exécution partagée si cet appelant s'en va
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                if timings is not None:
+                    timings.update(entry["timings"])
+                return task.result()
+            if is_disconnected is not None and await is_disconnected():
+                logger.info("Client déconnecté")
+                raise HTTPException(status_code=499, detail="Requête annulée par le client")
+    finally:
+        entry["waiters"] -= 1
+        if entry["waiters"] == 0 and not task.done():
+            entry["cancel"].cancel("client_disconnected")
+
+# Sorties écrites page par page (hOCR, ALTO, PDF consultable), envoyées au client au fil
+# du traitement: seule la page en cours est en mémoire, quelle que soit la longueur du document
+STREAM_QUEUE_PAGES = 1      # pages rendues en attente d'envoi (au-delà, le pipeline attend le client)
+PAGE_IMAGE_QUALITY = 80     # qualité JPEG des images de page du PDF consultable
+
+def encode_page_image(img: Image.Image) -> Dict:
+    """Image de page encodée en JPEG (niveaux de gris conservés)"""
+    img = img.convert("L" if img.mode in ("1", "L", "LA", "I;16") else "RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=PAGE_IMAGE_QUALITY)
+    return {"data": buffer.getvalue(), "size": img.size, "mode": img.mode}
+
+def page_size(result: Dict) -> Tuple[int, int]:
+    """Dimensions (pixels) du repère des boîtes d'une page; taille A4 si la page a échoué"""
+    if result.get("size"):
+        return tuple(result["size"])
+    if result.get("page_image"):
+        return result["page_image"]["size"]
+    return tuple(round(side * PDF_DPI / 72) for side in A4_SIZE_POINTS)
+
+def line_box(line: Dict) -> Optional[Tuple[int, int, int, int]]:
+    if not line.get("bbox"):
+        return None
+    left, top, right, bottom = _bbox_rect(line["bbox"])
+    return int(left), int(top), int(math.ceil(right)), int(math.ceil(bottom))
+
+class HOCRWriter:
+    """hOCR 1.2: une div ocr_page par page, une ligne ocr_line par ligne détectée"""
+    media_type = "text/html; charset=utf-8"
+    extension = "hocr"
+    needs_images = False
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def header(self) -> bytes:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+            '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="fr" lang="fr">\n<head>\n'
+            f'<title>{html.escape(self.filename)}</title>\n'
+            '<meta http-equiv="Content-Type" content="text/html; charset=utf-8"/>\n'
+            '<meta name="ocr-system" content="Symplissime OCR"/>\n'
+            '<meta name="ocr-capabilities" content="ocr_page ocr_line"/>\n'
+            '</head>\n<body>\n'
+        ).encode("utf-8")
+
+    def page(self, result: Dict) -> bytes:
+        number = result["page"]
+        width, height = page_size(result)
+        parts = [
+            f'<div class="ocr_page" id="page_{number}" '
+            f'title="image &quot;{html.escape(self.filename)}&quot;; bbox 0 0 {width} {height}; ppageno {number - 1}">\n'
+        ]
+        for index, line in enumerate(result.get("lines", []), start=1):
+            box = line_box(line)
+            title = f"bbox {' '.join(map(str, box))}; " if box else ""
+            parts.append(
+                f'<span class="ocr_line" id="line_{number}_{index}" '
+                f'title="{title}x_wconf {round(line["confidence"] * 100)}">{html.escape(line["text"])}</span>\n'
+            )
+        parts.append("</div>\n")
+        return "".join(parts).encode("utf-8")
+
+    def footer(self) -> bytes:
+        return b"</body>\n</html>\n"
+
+class ALTOWriter:
+    """ALTO v4 en pixels: un TextBlock par page, une TextLine (un String) par ligne"""
+    media_type = "application/xml"
+    extension = "alto.xml"
+    needs_images = False
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def header(self) -> bytes:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<alto xmlns="http://www.loc.gov/standards/alto/ns-v4#" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xsi:schemaLocation="http://www.loc.gov/standards/alto/ns-v4# '
+            'http://www.loc.gov/standards/alto/v4/alto-4-2.xsd">\n'
+            '<Description>\n<MeasurementUnit>pixel</MeasurementUnit>\n'
+            f'<sourceImageInformation><fileName>{html.escape(self.filename)}</fileName></sourceImageInformation>\n'
+            '<OCRProcessing ID="OCR_0"><ocrProcessingStep><processingSoftware>'
+            '<softwareName>Symplissime OCR</softwareName></processingSoftware></ocrProcessingStep></OCRProcessing>\n'
+            '</Description>\n<Layout>\n'
+        ).encode("utf-8")
+
+    def page(self, result: Dict) -> bytes:
+        number = result["page"]
+        width, height = page_size(result)
+        parts = [
+            f'<Page ID="page_{number}" PHYSICAL_IMG_NR="{number}" WIDTH="{width}" HEIGHT="{height}">\n'
+            f'<PrintSpace HPOS="0" VPOS="0" WIDTH="{width}" HEIGHT="{height}">\n'
+        ]
+        lines = [(line, line_box(line)) for line in result.get("lines", [])]
+        lines = [(line, box) for line, box in lines if box]
+        if lines:
+            left = min(box[0] for _, box in lines)
+            top = min(box[1] for _, box in lines)
+            right = max(box[2] for _, box in lines)
+            bottom = max(box[3] for _, box in lines)
+            parts.append(
+                f'<TextBlock ID="block_{number}" HPOS="{left}" VPOS="{top}" '
+                f'WIDTH="{right - left}" HEIGHT="{bottom - top}">\n'
+            )
+            for index, (line, (x0, y0, x1, y1)) in enumerate(lines, start=1):
+                position = f'HPOS="{x0}" VPOS="{y0}" WIDTH="{x1 - x0}" HEIGHT="{y1 - y0}"'
+                parts.append(
+                    f'<TextLine ID="line_{number}_{index}" {position}>'
+                    f'<String CONTENT="{html.escape(line["text"])}" WC="{line["confidence"]:.2f}" {position}/>'
+                    '</TextLine>\n'
+                )
+            parts.append("</TextBlock>\n")
+        parts.append("</PrintSpace>\n</Page>\n")
+        return "".join(parts).encode("utf-8")
+
+    def footer(self) -> bytes:
+        return b"</Layout>\n</alto>\n"
+
+class SearchablePDFWriter:
+    """PDF consultable écrit au fil des pages: image de la page et texte invisible
+    (mode de rendu 3) placé sur les boîtes des lignes, police Helvetica standard.
+
+    Les objets de chaque page sont émis dès qu'elle est prête; seuls leurs décalages
+    sont conservés pour la table xref écrite à la fin.
+    """
+    media_type = "application/pdf"
+    extension = "pdf"
+    needs_images = True
+    CATALOG, PAGES, FONT = 1, 2, 3
+    HELVETICA_AVERAGE_WIDTH = 0.5   # largeur moyenne d'un caractère (em), pour l'étirement horizontal
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self._position = len(self._header)
+        self._offsets: Dict[int, int] = {}
+        self._kids: List[int] = []
+        self._next_object = self.FONT + 1
+        self._pending = [self._object(
+            self.FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+        )]
+
+    def _object(self, number: int, body: bytes, stream: Optional[bytes] = None) -> bytes:
+        data = f"{number} 0 obj\n".encode("ascii") + body
+        if stream is not None:
+            data += b"\nstream\n" + stream + b"\nendstream"
+        data += b"\nendobj\n"
+        self._offsets[number] = self._position
+        self._position += len(data)
+        return data
+
+    def _allocate(self) -> int:
+        self._next_object += 1
+        return self._next_object - 1
+
+    def header(self) -> bytes:
+        return self._header
+
+    def _text(self, result: Dict, scale: float, page_height: float) -> bytes:
+        commands = ["BT", "3 Tr"]
+        for line in result.get("lines", []):
+            box = line_box(line)
+            text = line["text"].strip()
+            if not box or not text:
+                continue
+            x0, y0, x1, y1 = (value * scale for value in box)
+            font_size = max((y1 - y0) * 0.85, 1.0)
+            natural_width = self.HELVETICA_AVERAGE_WIDTH * font_size * len(text)
+            stretch = 100 * (x1 - x0) / natural_width if natural_width else 100
+            encoded = text.encode("cp1252", errors="replace").hex()
+            commands.append(
+                f"/F1 {font_size:.2f} Tf {stretch:.1f} Tz "
+                f"1 0 0 1 {x0:.2f} {page_height - y1 + (y1 - y0) * 0.15:.2f} Tm <{encoded}> Tj"
+            )
+        commands.append("ET")
+        return "\n".join(commands).encode("ascii")
+
+    def page(self, result: Dict) -> bytes:
+        width, height = page_size(result)
+        scale = 72 / PDF_DPI   # pixels -> points
+        page_width, page_height = width * scale, height * scale
+        chunks = self._pending
+        self._pending = []
+        resources = f"/Font << /F1 {self.FONT} 0 R >>"
+        drawing = b""
+        image = result.pop("page_image", None)
+        if image:
+            image_number = self._allocate()
+            image_width, image_height = image["size"]
+            color_space = "/DeviceGray" if image["mode"] == "L" else "/DeviceRGB"
+            chunks.append(self._object(
+                image_number,
+                (f"<< /Type /XObject /Subtype /Image /Width {image_width} /Height {image_height} "
+                 f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode "
+                 f"/Length {len(image['data'])} >>").encode("ascii"),
+                image["data"],
+            ))
+            resources += f" /XObject << /Im0 {image_number} 0 R >>"
+            drawing = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q\n".encode("ascii")
+        content = zlib.compress(drawing + self._text(result, scale, page_height))
+        content_number = self._allocate()
+        chunks.append(self._object(
+            content_number, f"<< /Length {len(content)} /Filter /FlateDecode >>".encode("ascii"), content
+        ))
+        page_number = self._allocate()
+        chunks.append(self._object(page_number, (
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+            f"/Resources << {resources} >> /Contents {content_number} 0 R >>"
+        ).encode("ascii")))
+        self._kids.append(page_number)
+        return b"".join(chunks)
+
+    def footer(self) -> bytes:
+        chunks = self._pending
+        kids = " ".join(f"{number} 0 R" for number in self._kids)
+        chunks.append(self._object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._kids)} >>".encode("ascii")))
+        chunks.append(self._object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>".encode("ascii")))
+        xref_position = self._position
+        entries = ["0000000000 65535 f "] + [f"{self._offsets[number]:010d} 00000 n " for number in range(1, self._next_object)]
+        chunks.append((
+            f"xref\n0 {self._next_object}\n" + "\n".join(entries) + "\n"
+            f"trailer\n<< /Size {self._next_object} /Root {self.CATALOG} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n"
+        ).encode("ascii"))
+        return b"".join(chunks)
+
+STREAMING_WRITERS = {
+    OutputFormat.HOCR: HOCRWriter,
+    OutputFormat.ALTO: ALTOWriter,
+    OutputFormat.PDF: SearchablePDFWriter,
+}
 
-        # Test rapide
-        test = PaddleOCR(lang="fr")
-        paddleocr_status = True
-        error_msg = None
-    except ImportError as e:
+async def stream_ocr(
+    ocr_engine: Optional[PaddleOCR],
+    file_bytes: bytes,
+    enhance: Optional[str],
+    options: Dict,
+    writer,
+    deadline: Optional[float] = None,
+    schedule: Optional[Dict] = None,
+    filename: str = "unknown",
+) -> StreamingResponse:
+    """Exécute l'OCR et envoie la sortie de writer page par page.
+
+    Chaque page est rendue dans le thread d'assemblage du pipeline dès qu'elle est
+    terminée, puis remise au client; le pipeline attend si le client lit moins vite
+    (au plus STREAM_QUEUE_PAGES pages rendues en attente). Les erreurs de document
+    (format, délestage, budget mémoire) sont renvoyées avec leur code HTTP, avant la
+    première page. L'exécution n'est pas partagée avec des requêtes identiques.
+    """
+    loop = asyncio.get_running_loop()
+    pages: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_PAGES)
+    cancel = CancellationToken(deadline)
+    options = {**options, "page_images": writer.needs_images}
+
+    def on_page(result: Dict) -> None:
+        chunk = writer.page(result)
+        result.pop("page_image", None)
+        handoff = asyncio.run_coroutine_threadsafe(pages.put(chunk), loop)
+        while True:
+            try:
+                handoff.result(timeout=DISCONNECT_POLL_INTERVAL)
+                return
+            except concurrent.futures.TimeoutError:
+                if cancel.is_cancelled():  # Client parti: le pipeline s'arrête à la page suivante
+                    handoff.cancel()
+                    return
+
+    if ocr_index is not None:
+        execution = run_ocr_indexed(
+            ocr_engine, file_bytes, enhance, options, deadline, cancel, {}, filename, schedule, on_page
+        )
+    else:
+        execution = run_ocr(
+            ocr_engine, file_bytes, enhance, options, deadline, cancel, on_page=on_page, schedule=schedule
+        )
+    task = asyncio.ensure_future(execution)
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+    async def next_chunk() -> Optional[bytes]:
+        """Page rendue suivante, ou None quand le traitement est terminé"""
+        if pages.empty() and task.done():
+            task.result()
+            return None
+        getter = asyncio.ensure_future(pages.get())
+        await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            return getter.result()
+        getter.cancel()
+        return await next_chunk()
+
+    first = await next_chunk()
+
+    async def body():
+        try:
+            yield writer.header()
+            chunk = first
+            while chunk is not None:
+                yield chunk
+                chunk = await next_chunk()
+            yield writer.footer()
+            logger.info(f"Document envoyé ({writer.extension})")
+        finally:
+            if not task.done():
+                logger.info("Client déconnecté pendant l'envoi")
+                cancel.cancel("client_disconnected")
+
+    stem = Path(filename).stem or "document"
+    return StreamingResponse(
+        body(),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'inline; filename="{stem}.{writer.extension}"'},
+    )
+
+def worker_state_dir() -> Optional[str]:
+    """Répertoire d'état des workers, défini par server.py pour chaque worker"""
+    return os.getenv("OCR_WORKER_STATE_DIR")
+
+def worker_state() -> Dict:
+    return {
+        "index": int(os.getenv("OCR_WORKER_INDEX", "0")),
+        "pid": os.getpid(),
+        "heartbeat": time.time(),
+        "engines": ocr_engine_health(),
+    }
+
+def publish_worker_state() -> None:
+    """Écrit l'état de ce worker (remplacement atomique du fichier)"""
+    state_dir = worker_state_dir()
+    if not state_dir:
+        return
+    state = worker_state()
+    path = os.path.join(state_dir, f"worker-{state['pid']}.json")
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(state, handle)
+    os.replace(temporary, path)
+
+def _publish_worker_state_loop(stop: threading.Event) -> None:
+    while not stop.wait(WORKER_HEARTBEAT_INTERVAL):
+        try:
+            publish_worker_state()
+        except OSError as e:
+            logger.warning(f"Publication de l'état du worker impossible: {e}")
+
+worker_heartbeat_stop = threading.Event()
+
+def read_worker_states() -> List[Dict]:
+    """États publiés par les workers du serveur pre-fork, marqués « stale » s'ils ne répondent plus"""
+    state_dir = worker_state_dir()
+    if not state_dir or not os.path.isdir(state_dir):
+        return []
+    states = []
+    now = time.time()
+    for name in sorted(os.listdir(state_dir)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(state_dir, name), encoding="utf-8") as handle:
+                state = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        age = now - state.get("heartbeat", 0)
+        state["stale"] = age > WORKER_HEARTBEAT_INTERVAL * WORKER_STALE_AFTER
+        state["engines_ready"] = all(
+            engine["status"] != "error" for engine in state.get("engines", {}).values()
+        )
+        states.append(state)
+    return states
+
+@app.get("/health")
+async def health_check():
+    """Point de contrôle de santé de l'API (sans initialiser de moteur)"""
+    global model_bundle_status
+    version = paddleocr_version()
+    engines = ocr_engine_health()
+    engine_errors = [f"{profile}: {state['error']}" for profile, state in engines.items() if state["status"] == "error"]
+    if version is None:
         paddleocr_status = False
         version = "non installé"
-        error_msg = f"PaddleOCR non installé: {str(e)}"
-    except Exception as e:
+        error_msg = "PaddleOCR non installé"
+    elif engine_errors:
         paddleocr_status = False
-        version = "erreur"
-        error_msg = f"Erreur PaddleOCR: {str(e)}"
+        error_msg = f"Erreur PaddleOCR: {'; '.join(engine_errors)}"
+    else:
+        paddleocr_status = True
+        error_msg = None
+    if model_bundle_status is None:
+        model_bundle_status = check_model_bundle()
 
     status = "healthy" if paddleocr_status else "degraded"
 
@@ -449,15 +3378,99 @@ async def health_check():
         "profiles": list(OCR_PROFILE_CONFIGS.keys()),
         "paddleocr_version": version,
         "paddleocr_working": paddleocr_status,
-        "error": error_msg
+        "error": error_msg,
+        "worker": {"index": int(os.getenv("OCR_WORKER_INDEX", "0")), "pid": os.getpid()},
+        "engines": engines,
+        "models": {"ok": model_bundle_status["ok"], "missing": model_bundle_status["missing"]},
+        "startup": startup_report(),
     }
 
+@app.get("/health/workers")
+async def workers_health():
+    """État de tous les workers du serveur pre-fork, quel que soit le worker qui répond"""
+    workers = read_worker_states()
+    healthy = bool(workers) and all(not w["stale"] and w["engines_ready"] for w in workers)
+    return {
+        "status": "healthy" if healthy else ("degraded" if workers else "single_process"),
+        "workers": workers,
+    }
+
+def round_timings(timings: Optional[Dict[str, float]]) -> Optional[Dict[str, float]]:
+    if timings is None:
+        return None
+    return {stage: round(duration, 4) for stage, duration in timings.items()}
+
+@app.get("/stats")
+async def get_stats():
+    """Compteurs de fonctionnement (orientation, ...)"""
+    with ocr_stats_lock:
+        stats = {section: dict(values) for section, values in ocr_stats.items()}
+    stats["memory"].update({
+        "budget_bytes": memory_budget.capacity,
+        "reserved_bytes": memory_budget.reserved,
+        "waiting": memory_budget.waiting,
+    })
+    stats["load"].update({
+        "pending_pages": load_tracker.pending_pages,
+        "pending_by_class": dict(load_tracker.pending),
+        "page_seconds": round(load_tracker.page_seconds, 3),
+        "predicted_wait": round(load_tracker.predicted_wait(), 3),
+        "predicted_wait_by_class": {
+            priority: round(load_tracker.predicted_wait(priority), 3) for priority in PRIORITY_CLASSES
+        },
+    })
+    waiting = {priority: 0 for priority in PRIORITY_CLASSES}
+    for scheduler in list(page_schedulers.values()):
+        for priority, count in scheduler.waiting().items():
+            waiting[priority] += count
+    stats["scheduling"]["waiting_pages"] = waiting
+    memo = stats["recognition_memo"]
+    memo.update({
+        "entries": len(recognition_memo),
+        "capacity": recognition_memo.max_entries,
+        "hit_rate": round(memo["hits"] / memo["lines"], 4) if memo["lines"] else 0.0,
+    })
+    stats["logging"] = {
+        "queued": log_handler.queue.qsize(),
+        "dropped": log_handler.dropped,
+        "suppressed": log_handler.rate_limit.suppressed,
+    }
+    return stats
+
 @app.post("/ocr", response_model=OCRResponse)
 async def ocr_document(
+    request: Request,
     file: UploadFile = File(..., description="Fichier à traiter (PDF, PNG, JPG, etc.)"),
     profile: OCRProfile = Query(OCRProfile.IMPRIME, description="Profil OCR à utiliser"),
     output_format: OutputFormat = Query(OutputFormat.TEXT, description="Format de sortie"),
-    enhance: Optional[Enhancement] = Query(None, description="Amélioration d'image optionnelle")
+    enhance: Optional[Enhancement] = Query(None, description="Amélioration d'image optionnelle"),
+    angle_cls: AngleClassification = Query(
+        AngleClassification.AUTO,
+        description="Classification d'angle: auto (pré-passe d'orientation), always ou never"
+    ),
+    refine: bool = Query(False, description="Seconde passe haute résolution sur les lignes peu fiables"),
+    refine_threshold: float = Query(
+        REFINE_CONFIDENCE_THRESHOLD, ge=0.0, le=1.0,
+        description="Confiance en dessous de laquelle une ligne est relue"
+    ),
+    x_request_deadline: Optional[float] = Header(
+        None, gt=0,
+        description="Délai maximal (secondes) accordé par le client; refus immédiat s'il ne peut être tenu"
+    ),
+    max_pixels: Optional[int] = Query(
+        None, ge=100_000,
+        description="Budget de pixels par page image (défaut: MAX_PAGE_PIXELS pour les photos JPEG/WebP)"
+    ),
+    first_page: int = Query(1, ge=1, description="Première page traitée (PDF, TIFF multi-pages)"),
+    last_page: Optional[int] = Query(None, ge=1, description="Dernière page traitée (défaut: fin du document)"),
+    debug_timings: bool = Query(False, description="Ajoute les durées par page et par étape à la réponse JSON"),
+    profile_cpu: bool = Query(False, description="Profil CPU échantillonné de la requête (administrateurs)"),
+    x_admin_token: Optional[str] = Header(None, description="Jeton administrateur requis pour profile_cpu"),
+    x_tenant_id: Optional[str] = Header(None, max_length=64, description="Client pour le partage équitable du moteur"),
+    x_api_key: Optional[str] = Header(None, description="Clé d'API (identifie le client à défaut de X-Tenant-ID)"),
+    x_priority: Optional[PriorityClass] = Header(
+        None, description="batch: traitement de masse; un document court est sinon interactif"
+    ),
 ):
     """Endpoint principal pour traitement OCR"""
     start_time = asyncio.get_running_loop().time()
@@ -466,10 +3479,15 @@ async def ocr_document(
         # Logging détaillé avec ID de requête
         import uuid
         request_id = str(uuid.uuid4())[:8]
+        # La tâche de la requête a son propre contexte: pas de remise à zéro nécessaire
+        tenant = request_tenant(x_tenant_id, x_api_key)
+        set_log_context(request_id=request_id, profile=profile.value, tenant=tenant)
 
         # Validation préliminaire du fichier
         validate_file(file)
-        logger.info(f"[{request_id}] Début traitement OCR - Fichier: {file.filename}, Profil: {profile.value}")
+        if last_page is not None and last_page < first_page:
+            raise HTTPException(status_code=400, detail="last_page doit être supérieur ou égal à first_page")
+        logger.info(f"Début traitement OCR - Fichier: {file.filename}, Profil: {profile.value}")
 
         # Lecture des données
         file_bytes = await file.read()
@@ -478,18 +3496,70 @@ async def ocr_document(
 
         # Validation finale avec taille réelle
         validate_file(file, file_bytes)
-        logger.debug(f"[{request_id}] Fichier validé - Taille: {len(file_bytes)} bytes")
+        logger.debug(f"Fichier validé - Taille: {len(file_bytes)} bytes")
 
-        # Obtention du moteur OCR
-        ocr_engine = get_ocr_engine(profile.value)
+        # Obtention du moteur OCR (chargé uniquement par les processus d'inférence s'il y en a)
+        ocr_engine = None if OCR_PROCESS_WORKERS > 0 else get_ocr_engine(profile.value)
 
         # Traitement OCR
         enhance_value = enhance.value if enhance else None
-        results = await run_ocr(ocr_engine, file_bytes, enhance_value)
+        options = {
+            "profile": profile.value,
+            "angle_cls": angle_cls.value,
+            "refine": refine,
+            "refine_threshold": refine_threshold,
+            "max_pixels": max_pixels,
+            "first_page": first_page,
+            "last_page": last_page,
+        }
+        deadline = time.monotonic() + x_request_deadline if x_request_deadline else None
+        schedule = {"tenant": tenant, "priority": x_priority.value if x_priority else None}
+        if output_format in STREAMING_WRITERS and not profile_cpu:
+            # hOCR, ALTO, PDF: envoi page par page, sans attendre la fin du document
+            writer = STREAMING_WRITERS[output_format](file.filename or "document")
+            return await stream_ocr(
+                ocr_engine, file_bytes, enhance_value, options, writer, deadline, schedule,
+                file.filename or "unknown",
+            )
+        request_timings: Dict[str, float] = {}
+        cpu_profile = None
+        if profile_cpu:
+            if not OCR_ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", OCR_ADMIN_TOKEN):
+                raise HTTPException(status_code=403, detail="Profilage réservé aux administrateurs")
+            if output_format != OutputFormat.JSON:
+                raise HTTPException(status_code=400, detail="profile_cpu nécessite output_format=json")
+            # Exécution dédiée (non partagée) pour que le profil ne couvre que cette requête
+            profiler = StackSampler()
+            profiler.start()
+            try:
+                results = await run_ocr(
+                    ocr_engine, file_bytes, enhance_value, options, deadline,
+                    timings=request_timings, profiler=profiler, schedule=schedule,
+                )
+            finally:
+                cpu_profile = profiler.stop()
+            logger.info(f"Profil CPU: {profiler.samples} échantillons")
+        else:
+            results = await run_ocr_coalesced(
+                ocr_engine, file_bytes, enhance_value, options, deadline,
+                is_disconnected=request.is_disconnected, timings=request_timings,
+                filename=file.filename or "unknown", schedule=schedule,
+            )
 
         # Calcul du temps de traitement
         processing_time = asyncio.get_running_loop().time() - start_time
-        logger.info(f"[{request_id}] Traitement terminé en {processing_time:.2f}s")
+        stage_timings = dict(request_timings)
+        for page in results:
+            for stage, duration in page.get("timings", {}).items():
+                stage_timings[f"pages.{stage}"] = stage_timings.get(f"pages.{stage}", 0.0) + duration
+        stage_timings["total"] = processing_time
+        stage_timings = round_timings(stage_timings)
+        logger.info(
+            f"Traitement terminé en {processing_time:.2f}s",
+            extra={"duration": round(processing_time, 3), "timings": stage_timings},
+        )
+
+        timings = stage_timings if debug_timings else None
 
         # Création de la réponse avec Pydantic
         ocr_response = OCRResponse(
@@ -505,7 +3575,8 @@ async def ocr_document(
                         ) for line in page["lines"]
                     ],
                     status=page.get("status", "success"),
-                    error=page.get("error")
+                    error=page.get("error"),
+                    timings=round_timings(page.get("timings")) if debug_timings else None
                 ) for page in results
             ],
             metadata=OCRMetadata(
@@ -514,7 +3585,9 @@ async def ocr_document(
                 enhancement=enhance,
                 processing_time=round(processing_time, 2),
                 total_pages=len(results),
-                total_lines=sum(len(page["lines"]) for page in results)
+                total_lines=sum(len(page["lines"]) for page in results),
+                timings=timings,
+                cpu_profile=cpu_profile
             )
         )
 
@@ -580,11 +3653,89 @@ async def ocr_document(
         logger.error(f"Erreur inattendue: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erreur interne du serveur")
 
+@app.post("/ocr/inspect", response_model=DocumentInspection)
+async def inspect_ocr_document(
+    file: UploadFile = File(..., description="Fichier à inspecter (PDF, PNG, JPG, etc.)"),
+    refine: bool = Query(False, description="Estimation pour un traitement avec seconde passe"),
+    max_pixels: Optional[int] = Query(None, ge=100_000, description="Budget de pixels par page image"),
+):
+    """Inspection préalable: pages, couche texte, résolution et coût estimé, sans OCR"""
+    validate_file(file)
+    file_bytes = await file.read()
+    if len(file_bytes) == 0:
+        raise HTTPException(status_code=400, detail="Fichier vide")
+    validate_file(file, file_bytes)
+
+    loop = asyncio.get_running_loop()
+    inspection = await loop.run_in_executor(
+        executor, inspect_document, file_bytes, {"refine": refine, "max_pixels": max_pixels}
+    )
+    return DocumentInspection(filename=file.filename or "unknown", **inspection)
+
+@app.get("/search", response_model=SearchResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Requête plein texte (syntaxe FTS5: mots, \"phrase\", OR, NOT, préfixe*)"),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT, description="Documents par page de résultats"),
+    offset: int = Query(0, ge=0, description="Rang du premier document renvoyé"),
+    profile: Optional[OCRProfile] = Query(None, description="Restreint aux documents traités avec ce profil"),
+):
+    """Recherche dans les résultats OCR indexés: documents, pages et boîtes des lignes trouvées"""
+    if ocr_index is None:
+        raise HTTPException(status_code=503, detail="Index de recherche désactivé (définir OCR_INDEX_PATH)")
+    loop = asyncio.get_running_loop()
+    try:
+        found = await loop.run_in_executor(
+            None, ocr_index.search, q, limit, offset, profile.value if profile else None
+        )
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Requête de recherche invalide: {e}")
+    return SearchResponse(query=q, limit=limit, offset=offset, **found)
+
+startup_phases["import"] = time.perf_counter() - _IMPORT_STARTED
+
 @app.on_event("startup")
 async def startup_event():
     """Initialisation au démarrage"""
+    global model_bundle_status, ocr_index
     logger.info("🚀 Démarrage Symplissime OCR API v1.1.0")
     logger.info(f"📊 Profils OCR disponibles: {list(OCR_PROFILE_CONFIGS.keys())}")
+    with startup_phase("model_check"):
+        model_bundle_status = check_model_bundle()
+    # Les moteurs sont chargés à la première requête, ou ici si OCR_PRELOAD_PROFILES est défini
+    preload = [p.strip() for p in os.getenv("OCR_PRELOAD_PROFILES", "").split(",") if p.strip()]
+    if preload:
+        with startup_phase("preload"):
+            preload_ocr_engines(preload)
+    if OCR_PROCESS_WORKERS > 0:
+        with startup_phase("process_pool"):
+            get_ocr_process_pool()
+    if OCR_INDEX_PATH:
+        # Connexion ouverte dans chaque worker (jamais héritée d'un fork)
+        ocr_index = OCRIndex(OCR_INDEX_PATH)
+        logger.info(f"🔎 Index plein texte: {OCR_INDEX_PATH}")
+    report = startup_report()
+    logger.info(f"⏱️ Démarrage en {report['total']}s: {report}")
+    if report["total"] > STARTUP_BUDGET_SECONDS:
+        logger.warning(f"Démarrage plus long que le budget de {STARTUP_BUDGET_SECONDS}s")
+    if worker_state_dir():
+        publish_worker_state()
+        worker_heartbeat_stop.clear()
+        threading.Thread(
+            target=_publish_worker_state_loop, args=(worker_heartbeat_stop,),
+            name="worker-heartbeat", daemon=True
+        ).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrêt des processus d'inférence et libération des segments partagés"""
+    global ocr_index
+    worker_heartbeat_stop.set()
+    if ocr_index is not None:
+        ocr_index.close()
+        ocr_index = None
+    if ocr_process_pool is not None:
+        ocr_process_pool.shutdown(wait=False, cancel_futures=True)
+    _release_all_shared_pages()
 
 if __name__ == "__main__":
     import uvicorn
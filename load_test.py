@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Test de charge HTTP de bout en bout pour Symplissime OCR API
+
+Démarre l'API avec un moteur factice (FakePaddleOCR, ou toute classe donnée par
+--engine module:Classe) dont la latence et la mémoire par page sont réglables, puis
+envoie des requêtes /ocr en boucle ouverte: les arrivées suivent le motif choisi
+(constant, poisson, rafales) sans attendre les réponses, et la latence est mesurée
+depuis l'instant d'arrivée prévu. Le rapport donne le débit, les percentiles de
+latence, les taux d'erreur par code et la mémoire (RSS) du serveur au fil du test.
+
+    python load_test.py --rate 4 --duration 60 --pattern poisson --page-latency 0.4
+    python load_test.py --url http://ocr-staging:8000 --rate 2 --duration 120 --mix mix.json
+
+Le mélange de requêtes (--mix) est une liste JSON d'entrées pondérées:
+    [{"weight": 5, "profile": "printed", "format": "png", "pages": 1, "output_format": "json"},
+     {"weight": 1, "profile": "legal", "format": "tiff", "pages": 8}]
+"""
+import argparse
+import asyncio
+import importlib
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import types
+from typing import Dict, List, Optional
+
+import httpx
+import psutil
+from PIL import Image, ImageDraw
+
+# Réglages du moteur factice (variables d'environnement du serveur de test)
+ENV_PAGE_LATENCY = "LOADTEST_PAGE_LATENCY"      # durée (s) d'inférence d'une page
+ENV_LATENCY_JITTER = "LOADTEST_LATENCY_JITTER"  # variation relative de cette durée (0.2 = ±20 %)
+ENV_PAGE_MEMORY_MB = "LOADTEST_PAGE_MEMORY_MB"  # mémoire allouée pendant l'inférence d'une page
+ENV_INIT_SECONDS = "LOADTEST_INIT_SECONDS"      # durée d'initialisation d'un moteur
+
+DEFAULT_MIX = [
+    {"weight": 6, "profile": "printed", "format": "png", "pages": 1, "output_format": "json"},
+    {"weight": 2, "profile": "scanned", "format": "jpeg", "pages": 1, "output_format": "text"},
+    {"weight": 1, "profile": "legal", "format": "tiff", "pages": 4, "output_format": "json"},
+    {"weight": 1, "profile": "handwriting", "format": "png", "pages": 1, "output_format": "json",
+     "enhance": "contrast"},
+]
+
+SERVER_START_TIMEOUT = 60.0   # attente maximale (s) du démarrage du serveur de test
+RSS_SAMPLE_INTERVAL = 1.0     # période (s) de mesure de la mémoire du serveur
+
+
+class FakePaddleOCR:
+    """Moteur factice: simule la durée et la mémoire d'une inférence PaddleOCR.
+
+    La durée est passée dans time.sleep, qui libère le GIL comme l'inférence native.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = kwargs.get("use_angle_cls", False)
+        self.page_latency = float(os.getenv(ENV_PAGE_LATENCY, "0.2"))
+        self.jitter = float(os.getenv(ENV_LATENCY_JITTER, "0.2"))
+        self.page_memory = int(float(os.getenv(ENV_PAGE_MEMORY_MB, "0")) * 2 ** 20)
+        time.sleep(float(os.getenv(ENV_INIT_SECONDS, "0")))
+
+    def ocr(self, img, cls=False, det=True, **kwargs):
+        if isinstance(img, (str, bytes, os.PathLike)):
+            with Image.open(img) as opened:
+                width, height = opened.size
+        else:
+            height, width = img.shape[:2]
+        # Mémoire de travail du modèle, touchée pour être réellement allouée
+        workspace = bytearray(self.page_memory) if self.page_memory else None
+        if workspace:
+            workspace[::4096] = b"\x01" * len(workspace[::4096])
+        time.sleep(max(0.0, self.page_latency * random.uniform(1 - self.jitter, 1 + self.jitter)))
+        box = lambda top: [[0, top], [width, top], [width, top + 20], [0, top + 20]]
+        if not det:
+            return [[("texte factice", 0.95)]]
+        return [[[box(top), (f"ligne factice {top // 40 + 1}", 0.95)] for top in range(0, max(height - 20, 1), 40)][:50]]
+
+
+def install_engine(spec: Optional[str] = None) -> None:
+    """Remplace le module paddleocr par un module exposant la classe de moteur choisie"""
+    engine = FakePaddleOCR
+    if spec:
+        module_name, _, class_name = spec.partition(":")
+        engine = getattr(importlib.import_module(module_name), class_name)
+    module = types.ModuleType("paddleocr")
+    module.PaddleOCR = engine
+    module.__version__ = "loadtest"
+    sys.modules["paddleocr"] = module
+
+
+def serve(port: int, engine: Optional[str] = None) -> None:
+    """Serveur de test: l'API avec le moteur factice (processus lancé par run_load_test)"""
+    install_engine(engine)
+    import uvicorn
+    import app
+    uvicorn.run(app.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+# --- Documents et arrivées ---
+
+DOCUMENT_FORMATS = {"png": "PNG", "jpeg": "JPEG", "jpg": "JPEG", "tiff": "TIFF", "pdf": "PDF"}
+MULTIPAGE_FORMATS = {"tiff", "pdf"}
+STAMP_BITS = 32     # bits de la marque d'unicité imprimée dans la marge haute
+STAMP_CELL = 8      # côté (pixels) d'un bit de la marque
+
+
+def stamp_page(image: Image.Image, stamp: int) -> None:
+    """Imprime stamp en binaire dans la marge haute: deux requêtes n'envoient jamais le
+    même contenu, sinon l'API les regrouperait en une seule exécution"""
+    draw = ImageDraw.Draw(image)
+    for bit in range(STAMP_BITS):
+        if stamp >> bit & 1:
+            left = STAMP_CELL * (bit + 1)
+            draw.rectangle([left, STAMP_CELL, left + STAMP_CELL - 1, 2 * STAMP_CELL - 1], fill="black")
+
+
+def make_document(fmt: str, pages: int, size=(1240, 1754), stamp: int = 0) -> bytes:
+    """Document synthétique (quelques lignes de « texte ») au format demandé, marqué par stamp"""
+    if fmt not in DOCUMENT_FORMATS:
+        raise ValueError(f"Format de document inconnu: {fmt} (formats: {', '.join(DOCUMENT_FORMATS)})")
+    if pages > 1 and fmt not in MULTIPAGE_FORMATS:
+        raise ValueError(f"Format {fmt} limité à une page (plusieurs pages: {', '.join(sorted(MULTIPAGE_FORMATS))})")
+    frames = []
+    for page in range(pages):
+        image = Image.new("L", size, "white")
+        draw = ImageDraw.Draw(image)
+        margin = size[0] // 10
+        for top in range(margin, size[1] - margin, 60):
+            right = size[0] - margin - (top * 7 + page * 13) % (size[0] // 3)
+            draw.rectangle([margin, top, right, top + 20], fill="black")
+        stamp_page(image, stamp)
+        frames.append(image)
+    buffer = io.BytesIO()
+    if fmt == "tiff":
+        frames[0].save(buffer, format="TIFF", save_all=True, append_images=frames[1:], compression="tiff_deflate")
+    elif fmt == "pdf":
+        # Pages à la résolution de rendu de l'API: même taille en pixels une fois rastérisées
+        frames[0].save(buffer, format="PDF", save_all=True, append_images=frames[1:], resolution=200)
+    else:
+        frames[0].save(buffer, format=DOCUMENT_FORMATS[fmt])
+    return buffer.getvalue()
+
+
+def arrival_times(pattern: str, rate: float, duration: float, seed: int = 0, burst_size: int = 10) -> List[float]:
+    """Instants d'arrivée (s depuis le début) pour un débit moyen de rate requêtes/s"""
+    rng = random.Random(seed)
+    times = []
+    if pattern == "constant":
+        interval = 1.0 / rate
+        t = 0.0
+        while t < duration:
+            times.append(t)
+            t += interval
+    elif pattern == "poisson":
+        t = rng.expovariate(rate)
+        while t < duration:
+            times.append(t)
+            t += rng.expovariate(rate)
+    elif pattern == "burst":
+        # Rafales de burst_size requêtes simultanées, même débit moyen
+        interval = burst_size / rate
+        t = 0.0
+        while t < duration:
+            times.extend([t] * burst_size)
+            t += interval
+    else:
+        raise ValueError(f"Motif d'arrivée inconnu: {pattern}")
+    return times
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentile par interpolation linéaire (None si aucune valeur)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+# --- Exécution ---
+
+class RSSSampler(threading.Thread):
+    """Mesure périodique de la mémoire du serveur (processus et enfants)"""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.process = psutil.Process(pid)
+        self.samples: List[Dict] = []
+        self.stop_event = threading.Event()
+        self.started_at = time.monotonic()
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                processes = [self.process] + self.process.children(recursive=True)
+                rss = sum(p.memory_info().rss for p in processes if p.is_running())
+            except psutil.Error:
+                break
+            self.samples.append({"t": round(time.monotonic() - self.started_at, 1), "rss_mb": round(rss / 2 ** 20, 1)})
+            self.stop_event.wait(RSS_SAMPLE_INTERVAL)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.join()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(engine: Optional[str], env: Dict[str, str]) -> tuple:
+    """Lance le serveur de test; renvoie (processus, url)"""
+    port = _free_port()
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--port", str(port)]
+    if engine:
+        command += ["--engine", engine]
+    process = subprocess.Popen(
+        command, cwd=os.path.dirname(os.path.abspath(__file__)), env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur de test s'est arrêté (code {process.returncode})")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Le serveur de test ne répond pas")
+
+
+def plan_requests(count: int, mix: List[Dict], seed: int = 0) -> List[tuple]:
+    """Entrées du mélange tirées pour chaque requête, avec un document propre à chacune.
+
+    Les documents sont générés avant le début du test: leur encodage ne retarde pas les arrivées.
+    """
+    rng = random.Random(seed)
+    plan = []
+    for index in range(count):
+        entry = rng.choices(mix, weights=[e.get("weight", 1) for e in mix])[0]
+        document = make_document(entry.get("format", "png"), entry.get("pages", 1), stamp=index + 1)
+        plan.append((entry, document))
+    return plan
+
+
+async def drive(url: str, schedule: List[float], mix: List[Dict], seed: int = 0, timeout: float = 300.0) -> List[Dict]:
+    """Envoie les requêtes aux instants prévus, sans attendre les réponses (boucle ouverte)"""
+    plan = plan_requests(len(schedule), mix, seed)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        started = time.monotonic()
+
+        async def send(at: float, entry: Dict, document: bytes) -> Dict:
+            await asyncio.sleep(max(0.0, started + at - time.monotonic()))
+            fmt, pages = entry.get("format", "png"), entry.get("pages", 1)
+            params = {"profile": entry.get("profile", "printed"), "output_format": entry.get("output_format", "json")}
+            if entry.get("enhance"):
+                params["enhance"] = entry["enhance"]
+            files = {"file": (f"doc.{fmt}", document)}
+            try:
+                response = await client.post("/ocr", params=params, files=files)
+                status = response.status_code
+            except httpx.HTTPError as error:
+                status = type(error).__name__
+            # Latence depuis l'arrivée prévue: un serveur lent ne ralentit pas les arrivées
+            return {
+                "at": at, "status": status, "pages": pages, "profile": params["profile"],
+                "latency": time.monotonic() - (started + at),
+            }
+
+        return await asyncio.gather(*(send(at, entry, document) for at, (entry, document) in zip(schedule, plan)))
+
+
+def summarize(records: List[Dict], duration: float, rss: List[Dict]) -> Dict:
+    ok = [r for r in records if r["status"] == 200]
+    latencies = [r["latency"] for r in ok]
+    errors: Dict[str, int] = {}
+    for record in records:
+        if record["status"] != 200:
+            errors[str(record["status"])] = errors.get(str(record["status"]), 0) + 1
+    elapsed = max([duration] + [r["at"] + r["latency"] for r in records])
+    return {
+        "requests": len(records),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else 0.0,
+        "errors": errors,
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "throughput_pages": round(sum(r["pages"] for r in ok) / elapsed, 3) if elapsed else 0.0,
+        "latency": {
+            name: round(value, 3) if value is not None else None
+            for name, value in (
+                ("p50", percentile(latencies, 0.5)), ("p90", percentile(latencies, 0.9)),
+                ("p99", percentile(latencies, 0.99)), ("max", max(latencies, default=None)),
+            )
+        },
+        "rss_mb": {
+            "peak": max((s["rss_mb"] for s in rss), default=None),
+            "samples": rss,
+        },
+    }
+
+
+def run_load_test(args) -> Dict:
+    mix = json.loads(open(args.mix, encoding="utf-8").read()) if args.mix else DEFAULT_MIX
+    schedule = arrival_times(args.pattern, args.rate, args.duration, args.seed, args.burst_size)
+    process = sampler = None
+    url = args.url
+    if not url:
+        env = {
+            ENV_PAGE_LATENCY: str(args.page_latency),
+            ENV_LATENCY_JITTER: str(args.latency_jitter),
+            ENV_PAGE_MEMORY_MB: str(args.page_memory_mb),
+            ENV_INIT_SECONDS: str(args.init_seconds),
+        }
+        process, url = start_server(args.engine, env)
+        sampler = RSSSampler(process.pid)
+        sampler.start()
+    try:
+        records = asyncio.run(drive(url, schedule, mix, args.seed))
+    finally:
+        if sampler:
+            sampler.stop()
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+    report = summarize(records, args.duration, sampler.samples if sampler else [])
+    report["config"] = {"pattern": args.pattern, "rate": args.rate, "duration": args.duration, "url": args.url or "local"}
+    return report
+
+
+def print_report(report: Dict) -> None:
+    latency = report["latency"]
+    print(f"Requêtes: {report['requests']} ({report['succeeded']} réussies, taux d'erreur {report['error_rate']:.1%})")
+    if report["errors"]:
+        print(f"Erreurs: {', '.join(f'{code}: {count}' for code, count in sorted(report['errors'].items()))}")
+    print(f"Débit: {report['throughput_rps']} requêtes/s, {report['throughput_pages']} pages/s")
+    print("Latence (s): " + ", ".join(f"{name} {value}" for name, value in latency.items()))
+    if report["rss_mb"]["peak"] is not None:
+        samples = report["rss_mb"]["samples"]
+        step = max(1, len(samples) // 10)
+        timeline = " ".join(f"{s['t']}s:{s['rss_mb']:.0f}" for s in samples[::step])
+        print(f"RSS serveur (Mo): pic {report['rss_mb']['peak']:.0f} | {timeline}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        parser = argparse.ArgumentParser(description="Serveur de test avec moteur factice")
+        parser.add_argument("serve")
+        parser.add_argument("--port", type=int, required=True)
+        parser.add_argument("--engine", default=None)
+        args = parser.parse_args(argv)
+        serve(args.port, args.engine)
+        return 0
+
+    parser = argparse.ArgumentParser(description="Test de charge Symplissime OCR")
+    parser.add_argument("--url", default=None, help="API existante (défaut: serveur local avec moteur factice)")
+    parser.add_argument("--engine", default=None, help="Classe de moteur module:Classe (défaut: FakePaddleOCR)")
+    parser.add_argument("--rate", type=float, default=2.0, help="Requêtes par seconde (moyenne)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée des arrivées (s)")
+    parser.add_argument("--pattern", choices=["constant", "poisson", "burst"], default="poisson")
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--mix", default=None, help="Fichier JSON du mélange de requêtes")
+    parser.add_argument("--page-latency", type=float, default=0.2, help="Durée d'inférence simulée par page (s)")
+    parser.add_argument("--latency-jitter", type=float, default=0.2)
+    parser.add_argument("--page-memory-mb", type=float, default=0.0, help="Mémoire simulée par page en cours")
+    parser.add_argument("--init-seconds", type=float, default=0.0, help="Durée simulée d'initialisation d'un moteur")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Écrit le rapport complet dans ce fichier")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
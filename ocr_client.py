@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Client asynchrone pour Symplissime OCR API
+
+Connexions HTTP réutilisées (pool httpx), envois simultanés bornés, découpage des
+gros PDF en plages de pages traitées en parallèle puis fusionnées dans l'ordre, et
+nouvelles tentatives avec attente exponentielle sur les refus temporaires (503,
+Retry-After) et les erreurs réseau.
+
+    async with OCRClient("http://localhost:8000", concurrency=4, pages_per_request=10) as client:
+        results = await client.ocr_many(["a.pdf", "b.png"], profile="printed")
+
+En ligne de commande:
+
+    python ocr_client.py document.pdf scan.png --concurrency 4 --pages-per-request 10 --out resultats/
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import httpx
+
+DEFAULT_TIMEOUT = 300.0       # délai (s) d'une requête OCR
+RETRY_STATUSES = {429, 503}   # refus temporaires: délestage, budget mémoire
+MAX_BACKOFF = 60.0            # attente maximale (s) entre deux tentatives
+
+FileInput = Union[str, os.PathLike, bytes]
+
+
+class OCRClientError(Exception):
+    """Réponse en erreur de l'API (après épuisement des tentatives le cas échéant)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class OCRClient:
+    """Client asynchrone de l'API OCR.
+
+    concurrency borne le nombre de requêtes HTTP simultanées (fichiers et plages de
+    pages confondus). pages_per_request, s'il est défini, découpe les PDF plus longs
+    en plages de pages envoyées en parallèle (paramètres first_page/last_page).
+    tenant et priority renseignent X-Tenant-ID et X-Priority (partage équitable du serveur);
+    un client de traitement de masse doit envoyer priority="batch", en particulier s'il
+    découpe ses documents en courtes plages.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        concurrency: int = 4,
+        pages_per_request: Optional[int] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = DEFAULT_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        tenant: Optional[str] = None,
+        priority: Optional[str] = None,
+    ):
+        self.concurrency = concurrency
+        self.pages_per_request = pages_per_request
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        headers = {}
+        if tenant:
+            headers["X-Tenant-ID"] = tenant
+        if priority:
+            headers["X-Priority"] = priority
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "OCRClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    # --- Transport ---
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Attente avant la tentative suivante: Retry-After du serveur, sinon exponentielle avec gigue"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.replace(".", "", 1).isdigit():
+                return min(float(retry_after), MAX_BACKOFF)
+        return min(self.backoff * 2 ** attempt, MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Requête avec nouvelles tentatives; le nombre de requêtes simultanées est borné"""
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                async with self._semaphore:
+                    response = await self._http.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    break
+            await asyncio.sleep(self._retry_delay(attempt, response))
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise OCRClientError(response.status_code, str(detail))
+        return response
+
+    @staticmethod
+    def _read(file: FileInput, filename: Optional[str]) -> tuple:
+        if isinstance(file, bytes):
+            return file, filename or "document"
+        path = Path(file)
+        return path.read_bytes(), filename or path.name
+
+    # --- API ---
+
+    async def health(self) -> Dict:
+        return (await self._request("GET", "/health")).json()
+
+    async def stats(self) -> Dict:
+        return (await self._request("GET", "/stats")).json()
+
+    async def search(self, q: str, limit: int = 10, offset: int = 0, profile: Optional[str] = None) -> Dict:
+        params = {"q": q, "limit": limit, "offset": offset}
+        if profile:
+            params["profile"] = profile
+        return (await self._request("GET", "/search", params=params)).json()
+
+    async def inspect(self, file: FileInput, filename: Optional[str] = None, **params) -> Dict:
+        data, name = self._read(file, filename)
+        response = await self._request("POST", "/ocr/inspect", params=params, files={"file": (name, data)})
+        return response.json()
+
+    async def _ocr_request(self, data: bytes, name: str, params: Dict) -> Dict:
+        response = await self._request(
+            "POST", "/ocr", params={**params, "output_format": "json"}, files={"file": (name, data)}
+        )
+        return response.json()
+
+    async def ocr(self, file: FileInput, filename: Optional[str] = None, **params) -> Dict:
+        """OCR d'un fichier (réponse JSON de /ocr).
+
+        Un PDF plus long que pages_per_request est traité par plages de pages en
+        parallèle; les résultats sont fusionnés dans l'ordre des pages.
+        """
+        data, name = self._read(file, filename)
+        if not self.pages_per_request or not data.startswith(b"%PDF-") or "first_page" in params:
+            return await self._ocr_request(data, name, params)
+
+        page_count = (await self.inspect(data, name))["pages_processed"]
+        if page_count <= self.pages_per_request:
+            return await self._ocr_request(data, name, params)
+        ranges = [
+            (first, min(first + self.pages_per_request - 1, page_count))
+            for first in range(1, page_count + 1, self.pages_per_request)
+        ]
+        parts = await asyncio.gather(*(
+            self._ocr_request(data, name, {**params, "first_page": first, "last_page": last})
+            for first, last in ranges
+        ))
+        return merge_responses(parts)
+
+    async def ocr_many(
+        self, files: Iterable[FileInput], return_exceptions: bool = False, **params
+    ) -> List[Union[Dict, BaseException]]:
+        """OCR de plusieurs fichiers en parallèle (dans la limite de concurrency); résultats dans l'ordre"""
+        return await asyncio.gather(
+            *(self.ocr(file, **params) for file in files), return_exceptions=return_exceptions
+        )
+
+
+def merge_responses(parts: List[Dict]) -> Dict:
+    """Fusionne les réponses JSON de plages de pages d'un même document, dans l'ordre"""
+    results = sorted((page for part in parts for page in part["results"]), key=lambda page: page["page"])
+    metadata = dict(parts[0]["metadata"])
+    metadata.update({
+        "total_pages": len(results),
+        "total_lines": sum(len(page["lines"]) for page in results),
+        # Plages traitées en parallèle: durée de la plus longue
+        "processing_time": max(part["metadata"]["processing_time"] for part in parts),
+        "timings": None,
+        "cpu_profile": None,
+    })
+    status = "success" if all(part.get("status") == "success" for part in parts) else "partial"
+    return {"status": status, "results": results, "metadata": metadata}
+
+
+async def _main(args) -> int:
+    params = {"profile": args.profile}
+    if args.enhance:
+        params["enhance"] = args.enhance
+    out = Path(args.out) if args.out else None
+    if out:
+        out.mkdir(parents=True, exist_ok=True)
+    async with OCRClient(
+        args.url, args.concurrency, args.pages_per_request, args.retries,
+        tenant=args.tenant, priority=args.priority,
+    ) as client:
+        results = await client.ocr_many(args.files, return_exceptions=True, **params)
+    failures = 0
+    for path, result in zip(args.files, results):
+        if isinstance(result, BaseException):
+            failures += 1
+            print(f"❌ {path}: {result}", file=sys.stderr)
+            continue
+        print(f"✅ {path}: {result['metadata']['total_pages']} page(s), {result['metadata']['total_lines']} ligne(s)")
+        if out:
+            (out / f"{Path(path).name}.json").write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Client asynchrone Symplissime OCR")
+    parser.add_argument("files", nargs="+", help="Fichiers à traiter")
+    parser.add_argument("--url", default=os.getenv("OCR_API_URL", "http://localhost:8000"))
+    parser.add_argument("--profile", default="printed")
+    parser.add_argument("--enhance", default=None)
+    parser.add_argument("--concurrency", type=int, default=4, help="Requêtes simultanées au maximum")
+    parser.add_argument("--pages-per-request", type=int, default=None, help="Découpe les PDF en plages de pages")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--tenant", default=os.getenv("OCR_TENANT"), help="Identifiant client (X-Tenant-ID)")
+    parser.add_argument("--priority", choices=["interactive", "batch"], default=None, help="Classe de priorité")
+    parser.add_argument("--out", default=None, help="Répertoire des résultats JSON")
+    return asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Serveur pre-fork pour Symplissime OCR API
+
+Le processus maître importe l'application et initialise les moteurs OCR des profils
+configurés, puis crée les workers par fork: les poids des modèles sont partagés en
+copie sur écriture au lieu d'être chargés une fois par worker.
+
+    python server.py --workers 4 --port 8000
+
+Signaux du maître:
+    SIGHUP           redémarrage progressif des workers (un par un, sans coupure)
+    SIGTERM, SIGINT  arrêt: les workers terminent les requêtes en cours
+
+Sans fork (Windows), le serveur démarre un seul processus uvicorn.
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+logger = logging.getLogger("ocr_server")
+
+WORKER_READY_TIMEOUT = 60.0   # attente maximale (s) d'un nouveau worker lors d'un redémarrage
+WORKER_STOP_TIMEOUT = 30.0    # délai (s) laissé à un worker pour terminer ses requêtes
+RESPAWN_MIN_INTERVAL = 1.0    # délai minimal (s) entre deux relances d'un même worker
+MONITOR_INTERVAL = 0.5        # période (s) de surveillance des workers
+
+
+def default_worker_count() -> int:
+    return int(os.getenv("OCR_SERVER_WORKERS", "0")) or max(1, os.cpu_count() or 1)
+
+
+def preload_profiles() -> Optional[List[str]]:
+    """Profils préchargés par le maître (OCR_PRELOAD_PROFILES, séparés par des virgules; défaut: tous)"""
+    profiles = [p.strip() for p in os.getenv("OCR_PRELOAD_PROFILES", "").split(",") if p.strip()]
+    return profiles or None
+
+
+class PreforkMaster:
+    """Processus maître: crée, surveille et redémarre les workers uvicorn"""
+
+    def __init__(self, app, sock: socket.socket, workers: int, state_dir: str, log_level: str = "info"):
+        self.app = app
+        self.sock = sock
+        self.worker_count = workers
+        self.state_dir = state_dir
+        self.log_level = log_level
+        self.workers: Dict[int, int] = {}        # pid -> index
+        self.started: Dict[int, float] = {}      # index -> instant du dernier lancement
+        self.stopping = False
+        self.restart_requested = False
+
+    # --- Côté worker ---
+
+    def _run_worker(self, index: int) -> None:
+        """Corps d'un worker après le fork: sert l'application sur le socket hérité"""
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        os.environ["OCR_WORKER_INDEX"] = str(index)
+        os.environ["OCR_WORKER_STATE_DIR"] = self.state_dir
+        config = uvicorn.Config(self.app, fd=self.sock.fileno(), log_level=self.log_level)
+        uvicorn.Server(config).run()
+
+    def spawn(self, index: int) -> int:
+        self.started[index] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker(index)
+            except BaseException:
+                logger.exception(f"Worker {index} arrêté sur erreur")
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = index
+        logger.info(f"Worker {index} démarré (pid {pid})")
+        return pid
+
+    # --- Côté maître ---
+
+    def _state_path(self, pid: int) -> str:
+        return os.path.join(self.state_dir, f"worker-{pid}.json")
+
+    def _is_serving(self, pid: int) -> bool:
+        """Un worker publie son état une fois l'application démarrée"""
+        return os.path.exists(self._state_path(pid))
+
+    def _reap(self) -> List[int]:
+        """Récupère les workers terminés; renvoie leurs index"""
+        exited = []
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            index = self.workers.pop(pid, None)
+            if index is None:
+                continue
+            self._forget(pid)
+            logger.info(f"Worker {index} (pid {pid}) terminé, code {os.waitstatus_to_exitcode(status)}")
+            exited.append(index)
+        return exited
+
+    def _forget(self, pid: int) -> None:
+        try:
+            os.remove(self._state_path(pid))
+        except OSError:
+            pass
+
+    def _stop_worker(self, pid: int) -> None:
+        """Arrêt progressif d'un worker: SIGTERM, puis SIGKILL passé WORKER_STOP_TIMEOUT"""
+        index = self.workers.get(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                self.workers.pop(pid, None)
+                self._forget(pid)
+                logger.info(f"Worker {index} (pid {pid}) arrêté")
+                return
+            time.sleep(0.1)
+        logger.warning(f"Worker {index} (pid {pid}) ne s'arrête pas, SIGKILL")
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+        self._forget(pid)
+
+    def rolling_restart(self) -> None:
+        """Remplace les workers un par un: l'ancien n'est arrêté que lorsque le nouveau sert"""
+        logger.info("Redémarrage progressif des workers")
+        for old_pid, index in sorted(self.workers.items(), key=lambda item: item[1]):
+            new_pid = self.spawn(index)
+            deadline = time.monotonic() + WORKER_READY_TIMEOUT
+            while not self._is_serving(new_pid) and time.monotonic() < deadline:
+                time.sleep(0.1)
+            if not self._is_serving(new_pid):
+                logger.warning(f"Worker {index} (pid {new_pid}) pas prêt après {WORKER_READY_TIMEOUT}s")
+            self._stop_worker(old_pid)
+            if self.stopping:
+                return
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_restart)
+        for index in range(self.worker_count):
+            self.spawn(index)
+
+        while not self.stopping:
+            if self.restart_requested:
+                self.restart_requested = False
+                self.rolling_restart()
+            for index in self._reap():
+                if self.stopping:
+                    break
+                # Relance d'un worker tombé, sans boucler sur un worker qui échoue au démarrage
+                wait = RESPAWN_MIN_INTERVAL - (time.monotonic() - self.started.get(index, 0))
+                if wait > 0:
+                    time.sleep(wait)
+                self.spawn(index)
+            time.sleep(MONITOR_INTERVAL)
+
+        logger.info("Arrêt des workers")
+        for pid in list(self.workers):
+            self._stop_worker(pid)
+
+    def _request_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _request_restart(self, signum, frame) -> None:
+        self.restart_requested = True
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serveur pre-fork Symplissime OCR")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_worker_count())
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args(argv)
+
+    # L'import de app installe la journalisation (file et thread d'écriture, relancés dans chaque worker)
+    import app as ocr_app
+
+    if not hasattr(os, "fork"):
+        logger.warning("fork indisponible sur cette plateforme: démarrage en processus unique")
+        uvicorn.run(ocr_app.app, host=args.host, port=args.port, log_level=args.log_level)
+        return 0
+    if ocr_app.OCR_PROCESS_WORKERS > 0:
+        logger.warning(
+            "OCR_PROCESS_WORKERS > 0: chaque worker lance ses propres processus d'inférence, "
+            "les moteurs préchargés ne sont pas partagés"
+        )
+
+    with ocr_app.startup_phase("preload"):
+        health = ocr_app.preload_ocr_engines(preload_profiles())
+    ready = [profile for profile, state in health.items() if state["status"] == "ready"]
+    logger.info(f"Moteurs préchargés: {ready}; démarrage du maître: {ocr_app.startup_report()}")
+
+    sock = bind_socket(args.host, args.port)
+    # Les objets déjà chargés sortent du ramasse-miettes: ses parcours ne modifient plus
+    # leurs pages mémoire, qui restent partagées avec les workers
+    gc.collect()
+    gc.freeze()
+
+    state_dir = tempfile.mkdtemp(prefix="ocr-workers-")
+    master = PreforkMaster(ocr_app.app, sock, args.workers, state_dir, args.log_level)
+    logger.info(f"Serveur pre-fork sur {args.host}:{args.port}, {args.workers} worker(s), maître pid {os.getpid()}")
+    try:
+        master.run()
+    finally:
+        sock.close()
+        shutil.rmtree(state_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@
 Script de démarrage pour Symplissime OCR API
 Réalisé par Ayi NEDJIMI Consultants
 """
+import importlib.util
 import os
 import sys
 import subprocess
@@ -50,10 +51,10 @@ def check_dependencies():
     all_good = True
 
     for module, name in deps:
-        try:
-            __import__(module)
+        # Recherche du paquet sans l'importer (l'import de paddleocr prend plusieurs secondes)
+        if importlib.util.find_spec(module) is not None:
             table.add_row(name, "[green]✅ OK[/green]")
-        except ImportError:
+        else:
             table.add_row(name, "[red]❌ Manquant[/red]")
             all_good = False
 
@@ -64,18 +65,16 @@ def check_dependencies():
         console.print("[yellow]💡 Installation automatique en cours...[/yellow]")
         return False
 
-    # Test spécifique PaddleOCR
-    console.print("\n[bold blue]🔍 Test PaddleOCR...[/bold blue]")
-    try:
-        from paddleocr import PaddleOCR
-        with console.status("[bold green]Initialisation PaddleOCR..."):
-            ocr = PaddleOCR(lang="fr", show_log=False)
-        console.print("[green]✅ PaddleOCR fonctionne correctement[/green]")
-        return True
-    except Exception as ocr_error:
-        console.print(f"[yellow]⚠️ PaddleOCR disponible mais erreur: {ocr_error}[/yellow]")
-        console.print("[blue]🔧 L'API utilisera un fallback automatique[/blue]")
-        return True
+    # Vérification des modèles PaddleOCR sur disque (aucun moteur n'est initialisé)
+    console.print("\n[bold blue]🔍 Vérification des modèles PaddleOCR...[/bold blue]")
+    from app import check_model_bundle
+    bundle = check_model_bundle()
+    if bundle["ok"]:
+        console.print(f"[green]✅ Modèles présents: {', '.join(sorted(bundle['models']))}[/green]")
+    else:
+        console.print(f"[yellow]⚠️ Modèles absents localement: {', '.join(bundle['missing'])}[/yellow]")
+        console.print("[blue]🔧 Ils seront téléchargés à la première initialisation d'un moteur[/blue]")
+    return True
 
 def install_dependencies():
     """Installe les dépendances"""
@@ -0,0 +1,44 @@
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+class _DummyPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "fake_engine(engine_class): classe substituée à PaddleOCR pour la fixture app_module"
+    )
+
+
+@pytest.fixture()
+def app_module(request, monkeypatch):
+    """Module app rechargé avec un faux paddleocr.
+
+    La classe du moteur est donnée par le marqueur fake_engine du test ou du module.
+    """
+    marker = request.node.get_closest_marker("fake_engine")
+    fake_paddleocr = types.ModuleType("paddleocr")
+    fake_paddleocr.PaddleOCR = marker.args[0] if marker else _DummyPaddleOCR
+    fake_paddleocr.__version__ = "test"
+    monkeypatch.setitem(sys.modules, "paddleocr", fake_paddleocr)
+
+    module = importlib.import_module("app")
+    module = importlib.reload(module)
+    yield module
+
+    if module.ocr_process_pool is not None:
+        module.ocr_process_pool.shutdown(wait=True)
+    monkeypatch.delitem(sys.modules, "paddleocr", raising=False)
+    sys.modules.pop("app", None)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+
+class _CountingPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+        self.calls = 0
+        self.on_call = None
+
+    def ocr(self, img, cls=False, **kwargs):
+        self.calls += 1
+        if self.on_call:
+            self.on_call(self.calls)
+        return [None]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_CountingPaddleOCR)
+
+
+def blank_document(module, pages):
+    return module.DocumentPages("pdf", pages, lambda n: Image.new("RGB", (50, 50), "white"))
+
+
+def test_cancel_stops_dispatching_further_pages(app_module):
+    engine = _CountingPaddleOCR()
+    token = app_module.CancellationToken()
+    engine.on_call = lambda calls: token.cancel("client_disconnected") if calls == 2 else None
+
+    with pytest.raises(app_module.OCRCancelled) as exc_info:
+        app_module.run_page_pipeline(blank_document(app_module, 40), engine, None, {}, cancel=token)
+
+    assert engine.calls == 2
+    assert exc_info.value.pages_done == 2
+    assert exc_info.value.pages_skipped == 38
+    assert app_module.ocr_stats["cancellation"] == {"requests": 1, "pages_skipped": 38}
+
+
+def test_expired_deadline_cancels_token(app_module):
+    token = app_module.CancellationToken(deadline=time.monotonic() - 1)
+
+    assert token.is_cancelled()
+    assert token.reason == "deadline"
+
+
+def test_last_disconnected_waiter_cancels_shared_execution(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "DISCONNECT_POLL_INTERVAL", 0.01)
+    tokens = []
+
+    async def fake_run_ocr(ocr_engine, file_bytes, enhance=None, options=None, deadline=None, cancel=None, timings=None,
+                           schedule=None):
+        tokens.append(cancel)
+        await asyncio.sleep(0.2)
+        return []
+
+    monkeypatch.setattr(app_module, "run_ocr", fake_run_ocr)
+
+    async def gone():
+        return True
+
+    async def scenario():
+        with pytest.raises(HTTPException) as exc_info:
+            await app_module.run_ocr_coalesced(None, b"doc", None, {}, is_disconnected=gone)
+        return exc_info.value
+
+    error = asyncio.run(scenario())
+
+    assert error.status_code == 499
+    assert tokens[0].is_cancelled()
+    assert tokens[0].reason == "client_disconnected"
@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+from PIL import Image
+
+import ocr_client
+
+
+class _PageNumberPaddleOCR:
+    """Renvoie le numéro de page codé dans la largeur de l'image (100 + page)"""
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        page = Image.open(img).width - 100
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], (f"page-{page}", 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_PageNumberPaddleOCR)
+
+
+@pytest.fixture()
+def fake_pdf(app_module, monkeypatch):
+    """PDF de 5 pages: pdfinfo et la rastérisation sont simulés"""
+    requested = []
+
+    def fake_pdfinfo(path, *args, **kwargs):
+        return {"Pages": 5, "Page size": "595 x 842 pts (A4)"}
+
+    def fake_convert(path, dpi, fmt, first_page, last_page):
+        requested.append(first_page)
+        return [Image.new("L", (100 + first_page, 40), "white")]
+
+    monkeypatch.setattr(app_module, "pdfinfo_from_path", fake_pdfinfo)
+    monkeypatch.setattr(app_module, "convert_from_path", fake_convert)
+    monkeypatch.setattr(app_module, "run_poppler_tool", lambda args: None)
+    return requested
+
+
+def run_client(app_module, coroutine_factory, **kwargs):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with ocr_client.OCRClient("http://ocr", transport=transport, **kwargs) as client:
+            return await coroutine_factory(client)
+
+    return asyncio.run(scenario())
+
+
+def test_page_ranges_are_merged_in_order(app_module, fake_pdf):
+    response = run_client(
+        app_module, lambda client: client.ocr(b"%PDF-1.4 five pages", "cinq.pdf"), pages_per_request=2
+    )
+
+    assert [page["page"] for page in response["results"]] == [1, 2, 3, 4, 5]
+    assert [page["lines"][0]["text"] for page in response["results"]] == [f"page-{n}" for n in range(1, 6)]
+    assert response["metadata"]["total_pages"] == 5
+    assert sorted(fake_pdf) == [1, 2, 3, 4, 5]
+
+
+def test_server_rejects_range_after_end(app_module, fake_pdf):
+    with pytest.raises(ocr_client.OCRClientError) as error:
+        run_client(app_module, lambda client: client.ocr(b"%PDF-1.4", "cinq.pdf", first_page=7))
+
+    assert error.value.status_code == 400
+
+
+def test_retries_on_503_with_retry_after(monkeypatch):
+    attempts = []
+    sleeps = []
+
+    def handler(request):
+        attempts.append(request)
+        if len(attempts) < 3:
+            return httpx.Response(503, headers={"Retry-After": "2"}, json={"detail": "Serveur saturé"})
+        return httpx.Response(200, json={"status": "healthy"})
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(ocr_client.asyncio, "sleep", fake_sleep)
+
+    async def scenario():
+        async with ocr_client.OCRClient("http://ocr", transport=httpx.MockTransport(handler)) as client:
+            return await client.health()
+
+    assert asyncio.run(scenario()) == {"status": "healthy"}
+    assert len(attempts) == 3
+    assert sleeps == [2.0, 2.0]
+
+
+def test_concurrency_is_bounded():
+    active = []
+    peak = []
+
+    async def handler(request):
+        active.append(request)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.remove(request)
+        return httpx.Response(200, json={"status": "success", "results": [], "metadata": {}})
+
+    async def scenario():
+        async with ocr_client.OCRClient(
+            "http://ocr", concurrency=2, transport=httpx.MockTransport(handler)
+        ) as client:
+            return await client.ocr_many([b"a", b"b", b"c", b"d", b"e"])
+
+    assert len(asyncio.run(scenario())) == 5
+    assert max(peak) == 2
+
+
+def test_tenant_and_priority_headers_are_sent():
+    seen = []
+
+    def handler(request):
+        seen.append((request.headers.get("X-Tenant-ID"), request.headers.get("X-Priority")))
+        return httpx.Response(200, json={"status": "healthy"})
+
+    async def scenario():
+        async with ocr_client.OCRClient(
+            "http://ocr", transport=httpx.MockTransport(handler), tenant="import", priority="batch"
+        ) as client:
+            return await client.health()
+
+    asyncio.run(scenario())
+    assert seen == [("import", "batch")]
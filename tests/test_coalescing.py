@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+
+def install_slow_run_ocr(module, monkeypatch, error=None):
+    calls = []
+
+    async def fake_run_ocr(ocr_engine, file_bytes, enhance=None, options=None, deadline=None, cancel=None, timings=None,
+                           schedule=None):
+        calls.append(file_bytes)
+        await asyncio.sleep(0.05)
+        if error:
+            raise error
+        return [{"page": 1, "lines": [], "status": "success"}]
+
+    monkeypatch.setattr(module, "run_ocr", fake_run_ocr)
+    return calls
+
+
+def test_identical_concurrent_requests_share_one_execution(app_module, monkeypatch):
+    calls = install_slow_run_ocr(app_module, monkeypatch)
+    options = {"profile": "printed"}
+
+    async def scenario():
+        return await asyncio.gather(*[
+            app_module.run_ocr_coalesced(None, b"meme-document", None, options) for _ in range(3)
+        ])
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert app_module.ocr_stats["coalescing"] == {"executions": 1, "coalesced": 2}
+    assert app_module.inflight_ocr == {}
+
+
+def test_different_parameters_are_not_coalesced(app_module, monkeypatch):
+    calls = install_slow_run_ocr(app_module, monkeypatch)
+
+    async def scenario():
+        await asyncio.gather(
+            app_module.run_ocr_coalesced(None, b"doc", None, {"profile": "printed"}),
+            app_module.run_ocr_coalesced(None, b"doc", "contrast", {"profile": "printed"}),
+            app_module.run_ocr_coalesced(None, b"doc", None, {"profile": "legal"}),
+        )
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 3
+
+
+def test_requests_with_deadline_are_not_coalesced(app_module, monkeypatch):
+    calls = install_slow_run_ocr(app_module, monkeypatch)
+    options = {"profile": "printed"}
+
+    async def scenario():
+        deadline = app_module.time.monotonic() + 30
+        await asyncio.gather(
+            app_module.run_ocr_coalesced(None, b"doc", None, options),
+            app_module.run_ocr_coalesced(None, b"doc", None, options, deadline=deadline),
+            app_module.run_ocr_coalesced(None, b"doc", None, options),
+        )
+
+    asyncio.run(scenario())
+
+    # Les deux requêtes sans échéance partagent une exécution, celle avec échéance s'exécute seule
+    assert len(calls) == 2
+    assert app_module.ocr_stats["coalescing"] == {"executions": 2, "coalesced": 1}
+
+
+def test_errors_are_propagated_to_every_waiter(app_module, monkeypatch):
+    install_slow_run_ocr(app_module, monkeypatch, error=HTTPException(status_code=400, detail="invalide"))
+
+    async def scenario():
+        return await asyncio.gather(
+            *[app_module.run_ocr_coalesced(None, b"doc", None, {}) for _ in range(2)],
+            return_exceptions=True,
+        )
+
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, HTTPException) for outcome in outcomes)
+    assert app_module.inflight_ocr == {}
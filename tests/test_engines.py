@@ -0,0 +1,137 @@
+import asyncio
+import sys
+import types
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+class _HeavyPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+        self.inputs = []
+
+    def ocr(self, img, cls=False, det=True, **kwargs):
+        self.inputs.append(img)
+        return [[[[[5, 5], [95, 5], [95, 25], [5, 25]], ("Facture 2024", 0.98)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_HeavyPaddleOCR)
+
+
+def _fake_pytesseract(confidence):
+    """Faux pytesseract: deux mots sur une ligne, un troisième sur une seconde ligne"""
+    module = types.ModuleType("pytesseract")
+    module.Output = types.SimpleNamespace(DICT="dict")
+    module.calls = []
+
+    def image_to_data(image, lang=None, config="", output_type=None):
+        module.calls.append({"size": image.size, "lang": lang, "config": config})
+        return {
+            "text": ["", "Facture", "2024", "Total"],
+            "conf": [-1, confidence, confidence, confidence],
+            "block_num": [0, 1, 1, 1],
+            "par_num": [0, 1, 1, 1],
+            "line_num": [0, 1, 1, 2],
+            "left": [0, 10, 60, 10],
+            "top": [0, 10, 12, 40],
+            "width": [0, 40, 30, 35],
+            "height": [0, 15, 14, 15],
+        }
+
+    module.image_to_data = image_to_data
+    module.get_tesseract_version = lambda: "5.3.0"
+    return module
+
+
+def test_tesseract_engine_groups_words_into_lines(app_module, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pytesseract", _fake_pytesseract(92))
+    engine = app_module.TesseractEngine(lang="fra")
+
+    lines = engine.infer(np.zeros((60, 100, 3), dtype=np.uint8))
+
+    assert [line["text"] for line in lines] == ["Facture 2024", "Total"]
+    assert lines[0]["bbox"] == [[10, 10], [90, 10], [90, 26], [10, 26]]
+    assert lines[0]["confidence"] == pytest.approx(0.92)
+    assert engine.recognize(Image.new("RGB", (50, 20))) == ("Facture 2024 Total", pytest.approx(0.92))
+    assert engine.native.calls[-1]["config"] == "--psm 7"
+
+
+def test_paddle_adapter_receives_bgr_pixels(app_module):
+    native = _HeavyPaddleOCR()
+    engine = app_module.as_ocr_engine(native)
+    pixels = np.zeros((10, 10, 3), dtype=np.uint8)
+    pixels[..., 0] = 255  # rouge en RGB
+
+    lines = engine.infer(pixels)
+
+    assert lines == [{"text": "Facture 2024", "bbox": [[5, 5], [95, 5], [95, 25], [5, 25]], "confidence": 0.98}]
+    assert native.inputs[0][0, 0].tolist() == [0, 0, 255]
+    assert app_module.as_ocr_engine(engine) is engine
+
+
+def test_confident_light_engine_is_not_escalated(app_module, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pytesseract", _fake_pytesseract(95))
+    engine = app_module.get_ocr_engine("fast")
+    page = Image.new("RGB", (120, 80), "white")
+
+    result = app_module.process_single_page((1, page, None, engine, {"profile": "fast"}))
+
+    assert [line["text"] for line in result["lines"]] == ["Facture 2024", "Total"]
+    assert "escalation" not in result["timings"]
+    assert app_module.ocr_stats["engines"] == {"light_pages": 1, "escalated": 0}
+    assert app_module.get_ocr_engine("printed").inputs == []
+
+
+def test_low_confidence_page_is_escalated_to_heavy_engine(app_module, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pytesseract", _fake_pytesseract(40))
+    engine = app_module.get_ocr_engine("fast")
+    page = Image.new("RGB", (120, 80), "white")
+
+    result = app_module.process_single_page((1, page, None, engine, {"profile": "fast"}))
+
+    assert [line["text"] for line in result["lines"]] == ["Facture 2024"]
+    assert result["timings"]["escalation"] >= 0
+    assert app_module.ocr_stats["engines"] == {"light_pages": 1, "escalated": 1}
+    assert len(app_module.get_ocr_engine("printed").inputs) == 1
+
+
+def test_missing_light_backend_falls_back_to_escalation_engine(app_module, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pytesseract", None)
+
+    assert app_module.get_ocr_engine("fast") is app_module.get_ocr_engine("printed")
+    assert app_module.ocr_engine_health()["fast"] == {"status": "ready"}
+
+
+def test_missing_tesseract_binary_falls_back_to_escalation_engine(app_module, monkeypatch):
+    class TesseractNotFoundError(EnvironmentError):
+        pass
+
+    module = _fake_pytesseract(95)
+
+    def missing_binary():
+        raise TesseractNotFoundError("tesseract is not installed or it's not in your PATH")
+
+    module.get_tesseract_version = missing_binary
+    monkeypatch.setitem(sys.modules, "pytesseract", module)
+
+    assert app_module.get_ocr_engine("fast") is app_module.get_ocr_engine("printed")
+
+
+def test_engine_interface_is_abstract(app_module):
+    with pytest.raises(TypeError):
+        app_module.OCREngine()
+
+
+def test_escalation_counts_as_service_time(app_module, monkeypatch):
+    def fake_pipeline(document, engine, enhance, options, on_page=None, cancel=None, profiler=None, schedule=None):
+        return [{"page": 1, "lines": [], "status": "success", "timings": {"inference": 0.2, "escalation": 1.8}}]
+
+    monkeypatch.setattr(app_module, "run_page_pipeline", fake_pipeline)
+
+    asyncio.run(app_module._run_admitted(
+        app_module.DocumentPages("image", 1, None, (10, 10)), None, None, {}, app_module.CancellationToken(), {}
+    ))
+
+    assert app_module.load_tracker.page_seconds == pytest.approx(2.0)
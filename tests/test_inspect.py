@@ -0,0 +1,99 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+PDFFONTS_OUTPUT = """name                                 type              encoding         emb sub uni object ID
+------------------------------------ ----------------- ---------------- --- --- --- ---------
+ABCDEF+Helvetica                     TrueType          WinAnsi          yes yes no       8  0
+"""
+
+PDFIMAGES_OUTPUT = """page   num  type   width height color comp bpc  enc interp  object ID x-ppi y-ppi size ratio
+--------------------------------------------------------------------------------------------
+   1     0 image    2480  3508  rgb     3   8  jpeg   no         9  0   300   300  812K 3.2%
+   2     1 image    1240  1754  gray    1   8  jpeg   no        12  0   150   150  201K 9.5%
+   2     2 smask    1240  1754  gray    1   8  image  no        12  0    72    72  1.2K 0.1%
+"""
+
+
+def pdf_tools(app_module, monkeypatch, fonts=PDFFONTS_OUTPUT, images=PDFIMAGES_OUTPUT):
+    calls = []
+
+    def fake_pdfinfo(path, *args, **kwargs):
+        return {
+            "Pages": 3,
+            "Page size": "595 x 842 pts (A4)",
+            "Page    1 size": "595 x 842 pts (A4)",
+            "Page    2 size": "595 x 842 pts (A4)",
+            "Page    3 size": "842 x 1191 pts (A3)",
+        }
+
+    def fake_tool(args):
+        calls.append(args)
+        return {"pdffonts": fonts, "pdfimages": images}[args[0]]
+
+    def no_rasterization(*args, **kwargs):
+        raise AssertionError("aucune page ne doit être rastérisée")
+
+    monkeypatch.setattr(app_module, "pdfinfo_from_path", fake_pdfinfo)
+    monkeypatch.setattr(app_module, "run_poppler_tool", fake_tool)
+    monkeypatch.setattr(app_module, "convert_from_path", no_rasterization)
+    return calls
+
+
+def test_inspect_pdf_reports_metadata_and_estimate(app_module, monkeypatch):
+    calls = pdf_tools(app_module, monkeypatch)
+    app_module.load_tracker.page_seconds = 1.5
+    app_module.load_tracker.pending["interactive"] = 4
+
+    with TestClient(app_module.app) as client:
+        response = client.post("/ocr/inspect", files={"file": ("doc.pdf", b"%PDF-1.4 doc", "application/pdf")})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["kind"] == "pdf"
+    assert payload["page_count"] == 3
+    assert payload["page_sizes"] == [[1652, 2338], [1652, 2338], [2338, 3308]]
+    assert payload["has_text_layer"] is True
+    assert payload["image_dpi"] == 150
+    assert payload["predicted_wait"] == pytest.approx(6.0)
+    assert payload["estimated_seconds"] == pytest.approx(6.0 + 3 * 1.5)
+    assert payload["estimated_memory_bytes"] == 2338 * 3308 * 3 * 2 * 3
+    # Le fichier temporaire a été supprimé après inspection
+    assert not any(app_module.os.path.exists(args[-1]) for args in calls)
+
+
+def test_inspect_scanned_pdf_without_fonts(app_module, monkeypatch):
+    pdf_tools(app_module, monkeypatch, fonts=PDFFONTS_OUTPUT.split("\n", 2)[0] + "\n" + "-" * 40 + "\n")
+
+    inspection = app_module.inspect_document(b"%PDF-1.4 scan")
+
+    assert inspection["has_text_layer"] is False
+
+
+def test_inspect_pdf_caps_processed_pages(app_module, monkeypatch):
+    pdf_tools(app_module, monkeypatch)
+    monkeypatch.setattr(app_module, "MAX_PAGES", 2)
+
+    inspection = app_module.inspect_document(b"%PDF-1.4 doc")
+
+    assert inspection["page_count"] == 3
+    assert inspection["pages_processed"] == 2
+    assert len(inspection["page_sizes"]) == 2
+
+
+def test_inspect_image_reads_header_only(app_module):
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), "white").save(buffer, format="PNG", dpi=(300, 300))
+
+    with TestClient(app_module.app) as client:
+        response = client.post("/ocr/inspect", files={"file": ("scan.png", buffer.getvalue(), "image/png")})
+
+    payload = response.json()
+    assert payload["kind"] == "image"
+    assert payload["page_count"] == 1
+    assert payload["page_sizes"] == [[640, 480]]
+    assert payload["has_text_layer"] is None
+    assert payload["image_dpi"] == pytest.approx(300, abs=0.1)
@@ -0,0 +1,110 @@
+import asyncio
+import io
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _EmptyPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        return [None]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_EmptyPaddleOCR)
+
+
+def png_upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (20, 20), "white").save(buffer, format="PNG")
+    return {"file": ("page.png", buffer.getvalue(), "image/png")}
+
+
+def test_page_time_is_smoothed(app_module):
+    tracker = app_module.LoadTracker()
+
+    tracker.record(pages=4, elapsed=4.0)
+
+    assert tracker.page_seconds == pytest.approx(2.0 + 0.2 * (1.0 - 2.0))
+    tracker.pending["batch"] = 10
+    assert tracker.predicted_wait() == pytest.approx(10 * tracker.page_seconds)
+    # Une page interactive n'attend que la page batch déjà sur le moteur
+    assert tracker.predicted_wait("interactive") == pytest.approx(tracker.page_seconds)
+
+
+def test_request_shed_when_predicted_wait_too_long(app_module):
+    app_module.load_tracker.pending["batch"] = 100  # 100 pages x 2s > 60s
+
+    with TestClient(app_module.app) as client:
+        response = client.post("/ocr", files=png_upload(), headers={"X-Priority": "batch"})
+        interactive = client.post("/ocr", files=png_upload())
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "140"
+    assert app_module.ocr_stats["load"]["shed"] == 1
+    # Servie avant toutes les pages batch: pas de délestage
+    assert interactive.status_code == 200
+
+
+def test_unreachable_client_deadline_is_rejected_before_starting(app_module):
+    app_module.load_tracker.pending["interactive"] = 5  # 10s d'attente prévue
+
+    with TestClient(app_module.app) as client:
+        rejected = client.post("/ocr", files=png_upload(), headers={"X-Request-Deadline": "5"})
+        accepted = client.post("/ocr", files=png_upload(), headers={"X-Request-Deadline": "30"})
+
+    assert rejected.status_code == 503
+    assert app_module.ocr_stats["load"]["deadline_rejected"] == 1
+    assert accepted.status_code == 200
+
+
+def test_tracker_learns_inference_time_not_queueing(app_module, monkeypatch):
+    def fake_pipeline(document, engine, enhance, options, on_page=None, cancel=None, profiler=None, schedule=None):
+        time.sleep(0.3)  # attente derrière d'autres requêtes
+        return [{"page": n, "lines": [], "status": "success", "timings": {"inference": 0.5}} for n in (1, 2)]
+
+    monkeypatch.setattr(app_module, "run_page_pipeline", fake_pipeline)
+    document = app_module.DocumentPages("pdf", 2, None, (10, 10))
+    timings = {}
+
+    asyncio.run(app_module._run_admitted(
+        document, None, None, {}, app_module.CancellationToken(), timings
+    ))
+
+    assert timings["pipeline"] >= 0.3
+    assert app_module.load_tracker.page_seconds == pytest.approx(2.0 + 0.2 * (0.5 - 2.0))
+
+
+def test_interactive_documents_do_not_wait_for_busy_batch_threads(app_module, monkeypatch):
+    release = app_module.threading.Event()
+
+    def fake_pipeline(document, engine, enhance, options, on_page=None, cancel=None, profiler=None, schedule=None):
+        if schedule["priority"] == "batch":
+            release.wait(5)
+        return [{"page": 1, "lines": [], "status": "success", "timings": {}}]
+
+    monkeypatch.setattr(app_module, "run_page_pipeline", fake_pipeline)
+    monkeypatch.setitem(app_module.pipeline_executors, "batch", app_module.ThreadPoolExecutor(max_workers=1))
+
+    async def scenario():
+        def run(priority):
+            return asyncio.ensure_future(app_module._run_admitted(
+                app_module.DocumentPages("image", 1, None, (10, 10)), None, None, {},
+                app_module.CancellationToken(), {}, schedule={"priority": priority},
+            ))
+
+        batch = [run("batch"), run("batch")]
+        interactive = await asyncio.wait_for(run("interactive"), 2)
+        pending = not any(task.done() for task in batch)
+        release.set()
+        await asyncio.gather(*batch)
+        return interactive, pending
+
+    interactive, batch_pending = asyncio.run(scenario())
+
+    assert interactive[0]["status"] == "success"
+    assert batch_pending
@@ -0,0 +1,75 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import load_test
+
+
+pytestmark = pytest.mark.fake_engine.with_args(load_test.FakePaddleOCR)
+
+
+def test_arrival_patterns_keep_mean_rate():
+    assert load_test.arrival_times("constant", 4, 2) == [0.0, 0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75]
+    bursts = load_test.arrival_times("burst", 10, 3, burst_size=5)
+    assert bursts == [0.0] * 5 + [0.5] * 5 + [1.0] * 5 + [1.5] * 5 + [2.0] * 5 + [2.5] * 5
+    poisson = load_test.arrival_times("poisson", 20, 50, seed=3)
+    assert 900 < len(poisson) < 1100
+    assert poisson == sorted(poisson)
+
+
+def test_percentile_interpolates():
+    assert load_test.percentile([4, 1, 3, 2], 0.5) == 2.5
+    assert load_test.percentile([1, 2, 3], 0.99) == pytest.approx(2.98)
+    assert load_test.percentile([], 0.5) is None
+
+
+def test_summary_counts_errors_and_pages():
+    records = [
+        {"at": 0.0, "status": 200, "pages": 4, "latency": 1.0},
+        {"at": 0.5, "status": 200, "pages": 1, "latency": 0.5},
+        {"at": 1.0, "status": 503, "pages": 1, "latency": 0.01},
+        {"at": 1.5, "status": "ReadTimeout", "pages": 1, "latency": 2.5},
+    ]
+
+    report = load_test.summarize(records, duration=2.0, rss=[{"t": 0, "rss_mb": 80}, {"t": 1, "rss_mb": 120}])
+
+    assert report["errors"] == {"503": 1, "ReadTimeout": 1}
+    assert report["error_rate"] == 0.5
+    assert report["throughput_pages"] == pytest.approx(5 / 4.0)
+    assert report["latency"]["max"] == 1.0
+    assert report["rss_mb"]["peak"] == 120
+
+
+def test_fake_engine_serves_generated_documents(app_module, monkeypatch):
+    monkeypatch.setenv(load_test.ENV_PAGE_LATENCY, "0")
+
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/ocr",
+            params={"output_format": "json", "profile": "legal"},
+            files={"file": ("doc.tiff", load_test.make_document("tiff", 3, size=(200, 300)), "image/tiff")},
+        )
+
+    payload = response.json()
+    assert payload["metadata"]["total_pages"] == 3
+    assert all(page["lines"] for page in payload["results"])
+
+
+def test_each_request_sends_a_distinct_document():
+    mix = [{"format": "png", "pages": 1}, {"format": "tiff", "pages": 2}]
+
+    plan = load_test.plan_requests(40, mix, seed=1)
+
+    documents = [document for _, document in plan]
+    assert len(set(documents)) == 40
+
+
+def test_make_document_supports_pdf_and_rejects_unknown_formats():
+    pdfium = pytest.importorskip("pypdfium2")
+
+    pdf = pdfium.PdfDocument(load_test.make_document("pdf", 3, size=(200, 300)))
+
+    assert len(pdf) == 3
+    with pytest.raises(ValueError):
+        load_test.make_document("bmp", 1)
+    with pytest.raises(ValueError):
+        load_test.make_document("png", 2)
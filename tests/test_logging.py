@@ -0,0 +1,93 @@
+import contextvars
+import json
+import logging
+import queue
+
+import pytest
+
+
+def _record(name="app", level=logging.WARNING, msg="Ligne ignorée", lineno=10, **fields):
+    record = logging.LogRecord(name, level, "app.py", lineno, msg, None, None, func="infer_page")
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_repetitive_warnings_are_rate_limited(app_module, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(app_module.time, "monotonic", lambda: clock[0])
+    limiter = app_module.RateLimitFilter(window=60.0, burst=3)
+
+    passed = [limiter.filter(_record()) for _ in range(10)]
+
+    assert passed == [True] * 3 + [False] * 7
+    # Autre emplacement de code et erreurs: non concernés
+    assert limiter.filter(_record(lineno=11))
+    assert all(limiter.filter(_record(level=logging.ERROR)) for _ in range(10))
+    clock[0] += 60.0
+    record = _record()
+    assert limiter.filter(record)
+    assert record.suppressed == 7
+    assert limiter.suppressed == 7
+
+
+def test_json_records_carry_request_context(app_module):
+    def emit():
+        app_module.set_log_context(request_id="a1b2c3d4", profile="printed")
+        record = _record(level=logging.INFO, msg="Traitement terminé", page=3, timings={"total": 1.5})
+        app_module.LogContextFilter().filter(record)
+        return json.loads(app_module.JSONFormatter().format(record))
+
+    entry = contextvars.copy_context().run(emit)
+
+    assert entry["message"] == "Traitement terminé"
+    assert entry["request_id"] == "a1b2c3d4"
+    assert entry["profile"] == "printed"
+    assert entry["page"] == 3
+    assert entry["timings"] == {"total": 1.5}
+    assert app_module.log_context.get() == {}
+
+
+def test_detailed_formatter_prefixes_context_without_mutating_record(app_module):
+    record = _record(msg="Échec", request_id="a1b2c3d4", page=2, suppressed=4)
+
+    line = app_module.DetailedFormatter("%(levelname)s %(message)s").format(record)
+
+    assert line == "WARNING [a1b2c3d4 p2] Échec (4 messages similaires supprimés)"
+    assert record.msg == "Échec"
+
+
+def test_full_log_queue_drops_instead_of_blocking(app_module):
+    handler = app_module.LogQueueHandler(queue.Queue(1))
+
+    handler.handle(_record())
+    handler.handle(_record())
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_pipeline_threads_inherit_log_context(app_module):
+    inbox, outbox = queue.Queue(), queue.Queue()
+
+    def start():
+        app_module.set_log_context(request_id="r1")
+        return app_module._start_stage("test", 2, lambda item: app_module.log_context.get(), inbox, outbox)
+
+    threads = contextvars.copy_context().run(start)
+    inbox.put(1)
+    inbox.put(app_module._PIPELINE_END)
+    for thread in threads:
+        thread.join()
+
+    assert outbox.get() == {"request_id": "r1"}
+
+
+def test_malformed_lines_produce_one_warning_per_page(app_module, caplog):
+    raw = [[[[[0, 0], [1, 0], [1, 1], [0, 1]], ("ok", 0.9)]] + [5] * 50]
+
+    with caplog.at_level(logging.WARNING, logger="app"):
+        lines = app_module.PaddleOCREngine.parse_lines(raw)
+
+    assert [line["text"] for line in lines] == ["ok"]
+    assert [record.getMessage().split(":")[0] for record in caplog.records] == ["Format OCR inattendu pour 50 ligne(s)"]
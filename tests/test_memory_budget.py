@@ -0,0 +1,100 @@
+import asyncio
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _EmptyPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        return [None]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_EmptyPaddleOCR)
+
+
+def test_pdf_page_size_from_pdfinfo(app_module):
+    assert app_module.pdf_page_size_pixels({"Page size": "595.276 x 841.89 pts (A4)"}) == (1653, 2338)
+    assert app_module.pdf_page_size_pixels({}, dpi=72) == (595, 842)
+    # Couverture A4 suivie d'un plan A0: la plus grande page fait foi
+    mixed = {
+        "Page size": "595 x 842 pts (A4)",
+        "Page    1 size": "595 x 842 pts (A4)",
+        "Page    2 size": "2384 x 3370 pts (A0)",
+    }
+    assert app_module.pdf_page_size_pixels(mixed, dpi=72) == (2384, 3370)
+
+
+def test_estimate_is_bounded_by_pipeline_capacity(app_module):
+    small = app_module.DocumentPages("pdf", 2, None, (1000, 1000))
+    large = app_module.DocumentPages("pdf", 100, None, (1000, 1000))
+
+    assert app_module.estimate_document_memory(small) == 1000 * 1000 * 3 * 2 * 2
+    assert app_module.estimate_document_memory(large) == (
+        1000 * 1000 * 3 * 2 * app_module.pipeline_pages_in_flight()
+    )
+
+
+
+def test_estimate_counts_shared_and_refine_copies(app_module, monkeypatch):
+    document = app_module.DocumentPages("pdf", 1, None, (1000, 1000))
+    page = 1000 * 1000 * 3
+
+    assert app_module.estimate_document_memory(document, {"refine": True}) == page * 3
+    monkeypatch.setattr(app_module, "OCR_PROCESS_WORKERS", 2)
+    assert app_module.estimate_document_memory(document) == page * 3
+    assert app_module.estimate_document_memory(document, {"refine": True}) == page * 5
+
+
+def test_budget_queues_then_admits_after_release(app_module):
+    budget = app_module.MemoryBudget(100)
+
+    async def scenario():
+        first = await budget.acquire(60, timeout=1)
+        refused = await budget.acquire(60, timeout=0.01)
+        waiting = asyncio.ensure_future(budget.acquire(60, timeout=1))
+        await asyncio.sleep(0.01)
+        assert budget.waiting == 1
+        budget.release(first)
+        return refused, await waiting
+
+    refused, admitted = asyncio.run(scenario())
+
+    assert refused is None
+    assert admitted == 60
+    assert budget.reserved == 60
+
+
+def test_ocr_returns_503_with_retry_after_when_budget_exhausted(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "MEMORY_BUDGET_WAIT", 0.01)
+    app_module.memory_budget.reserved = app_module.memory_budget.capacity
+    buffer = io.BytesIO()
+    Image.new("RGB", (20, 20), "white").save(buffer, format="PNG")
+
+    with TestClient(app_module.app) as client:
+        response = client.post("/ocr", files={"file": ("page.png", buffer.getvalue(), "image/png")})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(app_module.MEMORY_RETRY_AFTER)
+    assert app_module.ocr_stats["memory"]["rejected"] == 1
+
+
+def test_grant_is_returned_when_waiter_is_cancelled(app_module):
+    budget = app_module.MemoryBudget(100)
+
+    async def scenario():
+        assert await budget.acquire(100, 1) == 100
+        waiting = asyncio.ensure_future(budget.acquire(60, 5))
+        await asyncio.sleep(0)
+        # Requête annulée (déconnexion) et réservation accordée dans le même tour de boucle
+        waiting.cancel()
+        budget.release(100)
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return budget.reserved, budget.waiting
+
+    assert asyncio.run(scenario()) == (0, 0)
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+
+class _RecordingPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = kwargs.get("use_angle_cls", False)
+        self.calls = []
+
+    def ocr(self, img, cls=False, **kwargs):
+        self.calls.append(cls)
+        return [[[[[10, 20], [110, 20], [110, 40], [10, 40]], ("texte", 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_RecordingPaddleOCR)
+
+
+def create_text_page(align: str = "left") -> Image.Image:
+    """Page synthétique: lignes alignées (à gauche par défaut) de longueurs variables"""
+    rng = random.Random(1)
+    image = Image.new("RGB", (800, 1100), color="white")
+    draw = ImageDraw.Draw(image)
+    for y in range(60, 1000, 30):
+        length = rng.randint(300, 680)
+        if align == "right":
+            draw.rectangle([740 - length, y, 740, y + 14], fill="black")
+        else:
+            draw.rectangle([60, y, 60 + length, y + 14], fill="black")
+    return image
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_estimate_page_orientation_detects_rotation(app_module, rotation):
+    page = create_text_page().rotate(rotation, expand=True)
+
+    angle = app_module.estimate_page_orientation(page)
+
+    assert angle == (360 - rotation) % 360
+
+
+def test_blank_page_orientation_is_uncertain(app_module):
+    assert app_module.estimate_page_orientation(Image.new("RGB", (200, 300), "white")) is None
+
+
+def test_upright_page_skips_angle_classifier(app_module):
+    engine = _RecordingPaddleOCR(use_angle_cls=True)
+    options = {"angle_cls": "auto"}
+
+    result = app_module.process_single_page((1, create_text_page(), None, engine, options))
+
+    assert result["status"] == "success"
+    assert engine.calls == [False]
+    assert app_module.ocr_stats["orientation"]["cls_skipped"] == 1
+
+
+def test_rotated_page_bbox_mapped_to_original(app_module):
+    engine = _RecordingPaddleOCR(use_angle_cls=True)
+    page = create_text_page().rotate(90, expand=True)
+
+    result = app_module.process_single_page((1, page, None, engine, {"angle_cls": "auto"}))
+
+    assert app_module.ocr_stats["orientation"]["pages_rotated"] == 1
+    # Page ramenée à l'horizontale, le sens reste confié au classifieur
+    assert engine.calls == [True]
+    # Le coin (10, 20) de la page redressée correspond à (20, 800 - 10) sur la page tournée
+    assert result["lines"][0]["bbox"][0] == [20, page.size[1] - 10]
+
+
+def test_always_mode_keeps_angle_classifier(app_module):
+    engine = _RecordingPaddleOCR(use_angle_cls=True)
+
+    app_module.process_single_page((1, create_text_page(), None, engine, {"angle_cls": "always"}))
+
+    assert engine.calls == [True]
+    assert app_module.ocr_stats["orientation"]["cls_used"] == 1
+
+
+def test_right_aligned_page_keeps_angle_classifier_without_flipping(app_module):
+    engine = _RecordingPaddleOCR(use_angle_cls=True)
+
+    result = app_module.process_single_page((1, create_text_page("right"), None, engine, {"angle_cls": "auto"}))
+
+    # Marge droite alignée: la pré-passe croit la page retournée, seul le classifieur décide
+    assert engine.calls == [True]
+    assert app_module.ocr_stats["orientation"]["pages_rotated"] == 0
+    assert result["lines"][0]["bbox"][0] == [10, 20]
@@ -0,0 +1,127 @@
+import io
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _WidthReadingPaddleOCR:
+    """Renvoie la largeur de l'image reçue, ce qui identifie la page traitée."""
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+        self.on_call = None
+
+    def ocr(self, img, cls=False, **kwargs):
+        width = Image.open(img).width
+        if self.on_call:
+            self.on_call()
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], (f"page-{width - 100}", 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_WidthReadingPaddleOCR)
+
+
+def test_pipeline_returns_pages_in_order(app_module):
+    engine = _WidthReadingPaddleOCR()
+    document = app_module.DocumentPages("pdf", 7, lambda n: Image.new("RGB", (100 + n, 40), "white"))
+    seen = []
+
+    results = app_module.run_page_pipeline(document, engine, None, {}, on_page=lambda r: seen.append(r["page"]))
+
+    assert [r["page"] for r in results] == list(range(1, 8))
+    assert [r["lines"][0]["text"] for r in results] == [f"page-{n}" for n in range(1, 8)]
+    assert seen == list(range(1, 8))
+
+
+def test_pipeline_bounds_pages_in_flight(app_module):
+    engine = _WidthReadingPaddleOCR()
+    lock = threading.Lock()
+    counters = {"in_flight": 0, "peak": 0}
+
+    def load(page_num):
+        with lock:
+            counters["in_flight"] += 1
+            counters["peak"] = max(counters["peak"], counters["in_flight"])
+        return Image.new("RGB", (100 + page_num, 40), "white")
+
+    def on_call():
+        time.sleep(0.005)
+        with lock:
+            counters["in_flight"] -= 1
+
+    engine.on_call = on_call
+    document = app_module.DocumentPages("pdf", 30, load)
+
+    results = app_module.run_page_pipeline(document, engine, None, {})
+
+    assert len(results) == 30
+    bound = (
+        app_module.PIPELINE_RASTERIZE_WORKERS
+        + app_module.PIPELINE_PREPROCESS_WORKERS
+        + app_module.PIPELINE_INFER_WORKERS
+        + 2 * app_module.PIPELINE_QUEUE_SIZE
+    )
+    assert counters["peak"] <= bound
+
+
+def test_pipeline_reports_failed_page_without_stopping(app_module):
+    engine = _WidthReadingPaddleOCR()
+
+    def load(page_num):
+        if page_num == 2:
+            raise ValueError("page illisible")
+        return Image.new("RGB", (100 + page_num, 40), "white")
+
+    results = app_module.run_page_pipeline(app_module.DocumentPages("pdf", 3, load), engine, None, {})
+
+    assert [r["status"] for r in results] == ["success", "error", "success"]
+    assert "page illisible" in results[1]["error"]
+
+
+def test_ocr_endpoint_runs_image_through_pipeline(app_module):
+    buffer = io.BytesIO()
+    Image.new("RGB", (142, 40), "white").save(buffer, format="PNG")
+
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/ocr",
+            params={"output_format": "json"},
+            files={"file": ("page.png", buffer.getvalue(), "image/png")},
+        )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["results"][0]["lines"][0]["text"] == "page-42"
+    assert payload["metadata"]["total_pages"] == 1
+
+
+def test_pdf_is_written_once_and_removed_on_close(app_module, monkeypatch):
+    calls = []
+
+    def fake_pdfinfo(path, *args, **kwargs):
+        calls.append(("pdfinfo", path))
+        return {"Pages": 3, "Page size": "595 x 842 pts (A4)"}
+
+    def fake_convert(path, *args, first_page=None, last_page=None, **kwargs):
+        calls.append(("convert", path, first_page, last_page))
+        with open(path, "rb") as handle:
+            assert handle.read() == b"%PDF-1.4 document"
+        return [Image.new("RGB", (100 + first_page, 40), "white")]
+
+    monkeypatch.setattr(app_module, "pdfinfo_from_path", fake_pdfinfo)
+    monkeypatch.setattr(app_module, "convert_from_path", fake_convert)
+
+    document = app_module.open_document(b"%PDF-1.4 document")
+    results = app_module.run_page_pipeline(document, _WidthReadingPaddleOCR(), None, {})
+    path = calls[0][1]
+    assert Path(path).exists()
+    document.close()
+
+    assert [r["lines"][0]["text"] for r in results] == ["page-1", "page-2", "page-3"]
+    assert sorted(call[2] for call in calls if call[0] == "convert") == [1, 2, 3]
+    assert {call[1] for call in calls} == {path}
+    assert not Path(path).exists()
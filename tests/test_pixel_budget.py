@@ -0,0 +1,70 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image, JpegImagePlugin
+
+
+class _CornerPaddleOCR:
+    """Renvoie une ligne couvrant toute l'image reçue, avec sa largeur comme texte"""
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        width, height = Image.open(img).size
+        return [[[[[0, 0], [width, 0], [width, height], [0, height]], (f"largeur-{width}", 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_CornerPaddleOCR)
+
+
+def photo(size, image_format="JPEG") -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "white").save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def test_large_jpeg_is_decoded_in_draft_mode(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_PAGE_PIXELS", 1_000_000)
+    drafts = []
+    original_draft = JpegImagePlugin.JpegImageFile.draft
+
+    def recording_draft(self, mode, size):
+        drafts.append(size)
+        return original_draft(self, mode, size)
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", recording_draft)
+
+    document = app_module.open_document(photo((4000, 3000)))
+    page = document.load(1)
+
+    assert page.width * page.height <= 1_000_000
+    assert document.page_sizes == [page.size]
+    assert drafts
+    assert document.scales[1] == pytest.approx((4000 / page.width, 3000 / page.height))
+
+
+def test_png_is_not_reduced_without_explicit_budget(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_PAGE_PIXELS", 1_000)
+
+    document = app_module.open_document(photo((200, 100), "PNG"))
+
+    assert document.load(1).size == (200, 100)
+    assert document.scales == {}
+    assert app_module.open_document(photo((200, 100), "PNG"), max_pixels=5_000).page_size == (100, 50)
+
+
+def test_boxes_are_returned_in_original_coordinates(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_PAGE_PIXELS", 1_000_000)
+
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/ocr",
+            params={"output_format": "json"},
+            files={"file": ("photo.jpg", photo((4000, 3000)), "image/jpeg")},
+        )
+
+    line = response.json()["results"][0]["lines"][0]
+    assert line["text"] != "largeur-4000"
+    assert line["bbox"][2] == pytest.approx([4000, 3000])
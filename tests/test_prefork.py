@@ -0,0 +1,60 @@
+import json
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+class _EnglishlessPaddleOCR:
+    """Moteur dont l'initialisation échoue pour l'anglais"""
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get("lang") == "en":
+            raise RuntimeError("modèle anglais absent")
+        self.use_angle_cls = False
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_EnglishlessPaddleOCR)
+
+
+def test_preload_reports_each_profile(app_module):
+    health = app_module.preload_ocr_engines(["printed", "english"])
+
+    assert health["printed"] == {"status": "ready"}
+    assert health["english"]["status"] == "error"
+    assert "modèle anglais absent" in health["english"]["error"]
+    assert health["legal"] == {"status": "not_loaded"}
+
+
+def test_workers_health_aggregates_published_states(app_module, monkeypatch, tmp_path):
+    monkeypatch.setenv("OCR_WORKER_STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("OCR_WORKER_INDEX", "1")
+    app_module.preload_ocr_engines(["printed"])
+    app_module.publish_worker_state()
+    stale = {
+        "index": 0, "pid": 1, "heartbeat": time.time() - 3600,
+        "engines": {"printed": {"status": "ready"}},
+    }
+    (tmp_path / "worker-1.json").write_text(json.dumps(stale))
+
+    with TestClient(app_module.app) as client:
+        payload = client.get("/health/workers").json()
+        own = client.get("/health").json()
+
+    assert payload["status"] == "degraded"
+    workers = {worker["pid"]: worker for worker in payload["workers"]}
+    assert workers[1]["stale"] is True
+    assert workers[os.getpid()]["index"] == 1
+    assert workers[os.getpid()]["stale"] is False
+    assert workers[os.getpid()]["engines"]["printed"]["status"] == "ready"
+    assert own["worker"] == {"index": 1, "pid": os.getpid()}
+
+
+def test_workers_health_without_prefork_server(app_module, monkeypatch):
+    monkeypatch.delenv("OCR_WORKER_STATE_DIR", raising=False)
+
+    with TestClient(app_module.app) as client:
+        payload = client.get("/health/workers").json()
+
+    assert payload == {"status": "single_process", "workers": []}
@@ -0,0 +1,148 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+
+BOXES = [
+    [[20, 10], [220, 10], [220, 40], [20, 40]],
+    [[20, 100], [300, 100], [300, 130], [20, 130]],
+]
+
+
+class _DetRecPaddleOCR:
+    """Détection: deux boîtes fixes; reconnaissance: « ligne <largeur du recadrage> »"""
+    recognized = []
+    full_pages = 0
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+        self.crops = []
+
+    def ocr(self, img, cls=False, det=True, rec=True, **kwargs):
+        if not rec:
+            return [[[list(point) for point in box] for box in BOXES]]
+        if not det:
+            width = img.shape[1]
+            _DetRecPaddleOCR.recognized.append(width)
+            self.crops.append(np.array(img))
+            return [[(f"ligne {width}", 0.95 if width > 100 else 0.3)]]
+        _DetRecPaddleOCR.full_pages += 1
+        return [[[BOXES[0], ("en-tête", 0.99)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_DetRecPaddleOCR)
+
+
+@pytest.fixture(autouse=True)
+def _reset_engine():
+    _DetRecPaddleOCR.recognized = []
+    _DetRecPaddleOCR.full_pages = 0
+
+
+def letter(body: str) -> Image.Image:
+    """Page avec le même en-tête et un corps variable"""
+    img = Image.new("RGB", (400, 200), "white")
+    draw = ImageDraw.Draw(img)
+    draw.text((25, 15), "Cabinet Martin & Associés", fill="black")
+    draw.text((25, 105), body, fill="black")
+    return img
+
+
+def png(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_recurring_lines_skip_the_recognizer(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "recognition_memo", app_module.RecognitionMemo(100))
+
+    with TestClient(app_module.app) as client:
+        for body in ("Facture 2024-001", "Facture 2024-002"):
+            response = client.post(
+                "/ocr?output_format=json", files={"file": ("lettre.png", png(letter(body)), "image/png")}
+            )
+            assert response.status_code == 200
+        stats = client.get("/stats").json()["recognition_memo"]
+
+    # En-tête reconnu une seule fois, corps reconnu pour chaque document
+    assert _DetRecPaddleOCR.recognized == [200, 280, 280]
+    assert _DetRecPaddleOCR.full_pages == 0
+    assert [line["text"] for line in response.json()["results"][0]["lines"]] == ["ligne 200", "ligne 280"]
+    assert stats == {"lines": 4, "hits": 1, "evictions": 0, "entries": 3, "capacity": 100, "hit_rate": 0.25}
+
+
+def test_memo_is_disabled_by_default(app_module):
+    page = letter("Facture")
+
+    result = app_module.process_single_page((1, page, None, app_module.get_ocr_engine("printed"), {"profile": "printed"}))
+
+    assert app_module.recognition_memo.max_entries == 0
+    assert [line["text"] for line in result["lines"]] == ["en-tête"]
+    assert _DetRecPaddleOCR.full_pages == 1 and _DetRecPaddleOCR.recognized == []
+
+
+def test_low_score_readings_are_dropped_but_remembered(app_module, monkeypatch):
+    memo = app_module.RecognitionMemo(100)
+    monkeypatch.setattr(app_module, "recognition_memo", memo)
+    narrow = [[[20, 10], [80, 10], [80, 40], [20, 40]]]
+    monkeypatch.setattr(app_module.PaddleOCREngine, "detect", lambda self, source: narrow)
+    engine = app_module.get_ocr_engine("printed")
+    pixels = np.asarray(letter("Facture"))
+
+    assert app_module.infer_memoized(engine, pixels, "printed", False) == []
+    assert app_module.infer_memoized(engine, pixels, "printed", False) == []
+    assert _DetRecPaddleOCR.recognized == [60]
+    assert len(memo) == 1
+
+
+def test_memo_misses_do_not_write_temporary_files(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "recognition_memo", app_module.RecognitionMemo(100))
+    engine = app_module.get_ocr_engine("printed")
+    written = []
+    monkeypatch.setattr(app_module, "save_temporary_png", lambda img: written.append(img))
+    pixels = np.array(letter("Facture"))
+    pixels[15:20, 30:35] = (255, 0, 0)
+
+    lines = app_module.infer_memoized(engine, pixels, "printed", False)
+
+    assert [line["text"] for line in lines] == ["ligne 200", "ligne 280"]
+    assert written == []
+    # Le moteur reçoit le recadrage en BGR, comme toute page passée en pixels
+    assert engine.crops[0][5:10, 10:15].tolist() == [[[0, 0, 255]] * 5] * 5
+
+
+def test_key_identifies_the_line_wherever_it_is_printed(app_module):
+    crop = letter("Facture").crop((20, 10, 220, 40))
+    moved = Image.new("RGB", (400, 200), "white")
+    ImageDraw.Draw(moved).text((125, 65), "Cabinet Martin & Associés", fill="black")
+    key = app_module.RecognitionMemo.key
+
+    assert key(crop, "printed", False) == key(moved.crop((120, 60, 320, 90)), "printed", False)
+    assert key(crop, "printed", False) == key(crop.convert("L"), "printed", False)
+    assert key(crop, "printed", False) != key(crop, "legal", False)
+    assert key(crop, "printed", False) != key(letter("Avoir").crop((20, 100, 300, 130)), "printed", False)
+
+
+def test_least_recently_used_reading_is_evicted(app_module):
+    memo = app_module.RecognitionMemo(2)
+    memo.put(b"a", ("A", 0.9))
+    memo.put(b"b", ("B", 0.9))
+    assert memo.get(b"a") == ("A", 0.9)
+
+    memo.put(b"c", ("C", 0.9))
+
+    assert memo.get(b"b") is None
+    assert memo.get(b"a") == ("A", 0.9) and memo.get(b"c") == ("C", 0.9)
+    assert app_module.ocr_stats["recognition_memo"] == {"lines": 4, "hits": 3, "evictions": 1}
+
+
+def test_line_crop_straightens_the_box(app_module):
+    img = Image.new("RGB", (100, 100), "white")
+
+    assert app_module.line_crop(img, [[10, 10], [60, 10], [60, 30], [10, 30]]).size == (50, 20)
+    # Boîte verticale: lue couchée
+    assert app_module.line_crop(img, [[10, 10], [30, 10], [30, 70], [10, 70]]).size == (60, 20)
@@ -0,0 +1,100 @@
+import io
+
+import pytest
+from PIL import Image
+
+
+class _TwoPassPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+        self.crop_sizes = []
+
+    def ocr(self, img, cls=False, det=True, **kwargs):
+        if not det:
+            self.crop_sizes.append(Image.open(img).size)
+            return [[("Montant", 0.97)]]
+        return [[
+            [[[10, 10], [60, 10], [60, 30], [10, 30]], ("Titre", 0.99)],
+            [[[10, 50], [90, 50], [90, 70], [10, 70]], ("Mcntant", 0.42)],
+        ]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_TwoPassPaddleOCR)
+
+
+def test_refine_rereads_only_low_confidence_lines(app_module):
+    engine = _TwoPassPaddleOCR()
+    page = Image.new("RGB", (200, 100), "white")
+    options = {"refine": True, "refine_threshold": 0.8}
+
+    result = app_module.process_single_page((1, page, None, engine, options))
+
+    assert [line["text"] for line in result["lines"]] == ["Titre", "Montant"]
+    assert result["lines"][1]["confidence"] == pytest.approx(0.97)
+    # Une seule ligne relue, recadrée avec marge, à la résolution de la page (image)
+    assert engine.crop_sizes == [(88, 28)]
+    assert app_module.ocr_stats["refine"] == {"lines_retried": 1, "lines_improved": 1}
+
+
+def test_refine_disabled_by_default(app_module):
+    engine = _TwoPassPaddleOCR()
+    page = Image.new("RGB", (200, 100), "white")
+
+    result = app_module.process_single_page((1, page, None, engine, {}))
+
+    assert result["lines"][1]["text"] == "Mcntant"
+    assert engine.crop_sizes == []
+
+
+def test_pdf_lines_are_rerendered_at_higher_resolution(app_module, monkeypatch):
+    calls = []
+
+    def fake_run(args, capture_output, timeout):
+        calls.append(args)
+        width, height = int(args[args.index("-W") + 1]), int(args[args.index("-H") + 1])
+        buffer = io.BytesIO()
+        Image.new("RGB", (width, height), "white").save(buffer, format="PPM")
+        return app_module.subprocess.CompletedProcess(args, 0, buffer.getvalue(), b"")
+
+    monkeypatch.setattr(app_module.subprocess, "run", fake_run)
+    engine = app_module.get_ocr_engine("printed")
+    document = app_module.DocumentPages(
+        "pdf", 1, lambda n: Image.new("RGB", (200, 100), "white"), path="doc.pdf", first_page=3
+    )
+
+    results = app_module.run_page_pipeline(document, engine, None, {"refine": True, "profile": "printed"})
+
+    assert results[0]["lines"][1]["text"] == "Montant"
+    # Boîte (6, 46, 94, 74) à 200 DPI, re-rendue à 400 DPI
+    assert calls == [[
+        "pdftoppm", "-r", "400", "-f", "3", "-l", "3",
+        "-x", "12", "-y", "92", "-W", "176", "-H", "56", "doc.pdf",
+    ]]
+    assert engine.crop_sizes == [(176, 56)]
+
+
+def test_rerendered_line_follows_page_rotation(app_module, monkeypatch):
+    regions = []
+
+    def fake_render(path, page, box, dpi=400):
+        regions.append(box)
+        return Image.new("RGB", ((box[2] - box[0]) * 2, (box[3] - box[1]) * 2))
+
+    monkeypatch.setattr(app_module, "render_pdf_region", fake_render)
+
+    # Page d'origine 200x100 redressée de 90°: la boîte est donnée sur la page redressée (100x200)
+    crop = app_module.render_pdf_line({"path": "doc.pdf", "page": 1}, 90, (200, 100), (10, 20, 30, 60))
+
+    assert regions == [(140, 10, 180, 30)]
+    assert crop.size == (40, 80)
+
+
+def test_failed_rerender_falls_back_to_page_crop(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "render_pdf_region", lambda *args, **kwargs: None)
+    engine = app_module.get_ocr_engine("printed")
+    document = app_module.DocumentPages("pdf", 1, lambda n: Image.new("RGB", (200, 100), "white"), path="doc.pdf")
+
+    results = app_module.run_page_pipeline(document, engine, None, {"refine": True, "profile": "printed"})
+
+    assert results[0]["lines"][1]["text"] == "Montant"
+    assert engine.crop_sizes == [(88, 28)]
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _FakePaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], ("texte", 0.99)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_FakePaddleOCR)
+
+
+def _service_order(scheduler, pages):
+    """Pages (client, classe, poids) mises en attente dans l'ordre donné pendant qu'une
+    page occupe le moteur; renvoie l'ordre dans lequel elles sont servies"""
+    order = []
+
+    def run(tenant, priority, weight):
+        with scheduler.page(tenant, priority, weight):
+            order.append(tenant)
+
+    holder = scheduler.page("occupant", "interactive")
+    holder.__enter__()
+    threads = []
+    for queued, page in enumerate(pages, start=1):
+        thread = threading.Thread(target=run, args=page)
+        thread.start()
+        threads.append(thread)
+        while sum(scheduler.waiting().values()) < queued:
+            time.sleep(0.001)
+    holder.__exit__(None, None, None)
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+def test_tenants_share_engine_page_by_page(app_module):
+    scheduler = app_module.PageScheduler()
+    pages = [("import", "batch", 1.0)] * 4 + [("compta", "batch", 1.0)] * 2
+
+    order = _service_order(scheduler, pages)
+
+    # Le second client n'attend pas la fin des quatre pages du premier
+    assert order == ["import", "compta", "import", "compta", "import", "import"]
+
+
+def test_weights_give_proportional_share(app_module):
+    scheduler = app_module.PageScheduler()
+    pages = [("import", "batch", 1.0)] * 4 + [("guichet", "batch", 2.0)] * 4
+
+    order = _service_order(scheduler, pages)
+
+    assert order[:6] == ["import", "guichet", "guichet", "import", "guichet", "guichet"]
+
+
+def test_interactive_pages_pass_before_batch(app_module):
+    scheduler = app_module.PageScheduler()
+    pages = [("import", "batch", 1.0)] * 3 + [("guichet", "interactive", 1.0)]
+
+    assert _service_order(scheduler, pages) == ["guichet", "import", "import", "import"]
+
+
+def test_schedule_resolution(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.TENANT_WEIGHTS, "guichet", 3)
+
+    assert app_module.resolve_schedule({"tenant": "guichet"}, 1) == {
+        "tenant": "guichet", "priority": "interactive", "weight": 3.0,
+    }
+    # Un long document est batch; l'en-tête ne peut que déclasser
+    assert app_module.resolve_schedule({"tenant": "guichet", "priority": "interactive"}, 50)["priority"] == "batch"
+    assert app_module.resolve_schedule({"priority": "batch"}, 1) == {
+        "tenant": "default", "priority": "batch", "weight": 1.0,
+    }
+    assert app_module.request_tenant("acme", "secret") == "acme"
+    assert app_module.request_tenant(None, "secret").startswith("key-")
+    assert "secret" not in app_module.request_tenant(None, "secret")
+
+
+def test_memory_budget_serves_interactive_waiters_first(app_module):
+    budget = app_module.MemoryBudget(100)
+
+    async def scenario():
+        assert await budget.acquire(100, 1) == 100
+        batch = asyncio.ensure_future(budget.acquire(60, 1, rank=1))
+        await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(budget.acquire(60, 1, rank=0))
+        await asyncio.sleep(0)
+        budget.release(100)
+        await asyncio.sleep(0.05)
+        return interactive.done(), batch.done()
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_endpoint_schedules_by_tenant_and_priority(app_module):
+    buffer = io.BytesIO()
+    Image.new("RGB", (60, 40), "white").save(buffer, format="PNG")
+
+    with TestClient(app_module.app) as client:
+        for headers in ({"X-Tenant-ID": "guichet"}, {"X-API-Key": "cle", "X-Priority": "batch"}):
+            response = client.post(
+                "/ocr?output_format=json&debug_timings=true",
+                files={"file": ("page.png", buffer.getvalue(), "image/png")},
+                headers=headers,
+            )
+            assert response.status_code == 200
+            assert "schedule_wait" in response.json()["results"][0]["timings"]
+        stats = client.get("/stats").json()["scheduling"]
+        refused = client.post(
+            "/ocr", files={"file": ("page.png", buffer.getvalue(), "image/png")}, headers={"X-Priority": "urgent"}
+        )
+
+    assert stats["interactive_pages"] == 1
+    assert stats["batch_pages"] == 1
+    assert stats["waiting_pages"] == {"interactive": 0, "batch": 0}
+    assert refused.status_code == 422
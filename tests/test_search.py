@@ -0,0 +1,89 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+# Texte renvoyé par le faux moteur selon la largeur de l'image
+PAGES = {
+    120: ["Clause de résiliation anticipée", "Article 4"],
+    130: ["Résiliation du bail", "Clause pénale"],
+    140: ["Facture", "Montant dû"],
+}
+
+
+class _TextByWidthPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        width = Image.open(img).width
+        return [[
+            [[[0, 10 * row], [50, 10 * row], [50, 10 * row + 8], [0, 10 * row + 8]], (text, 0.9)]
+            for row, text in enumerate(PAGES[width])
+        ]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_TextByWidthPaddleOCR)
+
+
+def png(width: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("L", (width, 50), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def client(app_module, tmp_path):
+    app_module.OCR_INDEX_PATH = str(tmp_path / "index.db")
+    with TestClient(app_module.app) as client:
+        for width, name in ((120, "contrat.png"), (130, "bail.png"), (140, "facture.png")):
+            response = client.post(
+                "/ocr", params={"output_format": "json"}, files={"file": (name, png(width), "image/png")}
+            )
+            assert response.status_code == 200
+        yield client
+
+
+def test_search_returns_documents_pages_and_boxes(client):
+    payload = client.get("/search", params={"q": "clause"}).json()
+
+    assert payload["total"] == 2
+    assert {doc["filename"] for doc in payload["results"]} == {"contrat.png", "bail.png"}
+    bail = next(doc for doc in payload["results"] if doc["filename"] == "bail.png")
+    assert bail["total_pages"] == 1
+    assert bail["lines"] == [{
+        "page": 1, "line": 1, "text": "Clause pénale", "highlight": "[Clause] pénale",
+        "bbox": [[0, 10], [50, 10], [50, 18], [0, 18]], "confidence": 0.9,
+    }]
+
+
+def test_search_ignores_accents_and_paginates(client):
+    first = client.get("/search", params={"q": "resiliation", "limit": 1}).json()
+    second = client.get("/search", params={"q": "resiliation", "limit": 1, "offset": 1}).json()
+
+    assert first["total"] == second["total"] == 2
+    assert len(first["results"]) == len(second["results"]) == 1
+    assert first["results"][0]["document_id"] != second["results"][0]["document_id"]
+    assert first["results"][0]["score"] <= second["results"][0]["score"]
+
+
+def test_reindexing_same_content_replaces_entry(client):
+    client.post("/ocr", params={"output_format": "json"}, files={"file": ("copie.png", png(140), "image/png")})
+
+    results = client.get("/search", params={"q": "facture"}).json()["results"]
+    assert [doc["filename"] for doc in results] == ["copie.png"]
+
+
+def test_invalid_query_is_rejected(client):
+    response = client.get("/search", params={"q": '"clause'})
+
+    assert response.status_code == 400
+
+
+def test_search_disabled_without_index(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.get("/search", params={"q": "clause"})
+
+    assert response.status_code == 503
@@ -0,0 +1,78 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+class _ArrayPaddleOCR:
+    """Renvoie la largeur et la couleur du premier pixel reçu."""
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        if isinstance(img, np.ndarray):
+            text = f"{img.shape[1]}-{tuple(int(v) for v in img[0, 0])}"
+        else:
+            text = f"{Image.open(img).width}-fichier"
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], (text, 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_ArrayPaddleOCR)
+
+
+def test_shared_page_round_trip_and_release(app_module):
+    image = Image.new("RGB", (30, 20), (10, 20, 30))
+
+    handle = app_module.put_shared_page(image)
+    segment, pixels = app_module.attach_shared_page(handle)
+    assert pixels.shape == (20, 30, 3)
+    assert tuple(pixels[5, 5]) == (10, 20, 30)
+    del pixels
+    segment.close()
+
+    app_module.release_shared_page(handle)
+
+    assert handle["name"] not in app_module.shared_pages
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=handle["name"])
+
+
+def test_pipeline_with_process_workers_uses_shared_memory(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "OCR_PROCESS_WORKERS", 2)
+    document = app_module.DocumentPages("pdf", 4, lambda n: Image.new("RGB", (100 + n, 30), (n, 0, 200)))
+
+    # Aucun moteur dans le processus principal: seuls les processus d'inférence en chargent
+    results = app_module.run_page_pipeline(document, None, None, {"profile": "printed"})
+
+    # Le moteur du processus reçoit la page en BGR, sans passer par un fichier
+    assert [r["lines"][0]["text"] for r in results] == [f"{100 + n}-(200, 0, {n})" for n in range(1, 5)]
+    assert app_module.shared_pages == {}
+    assert app_module.ocr_engines_cache == {}
+
+
+class _CrashingPaddleOCR(_ArrayPaddleOCR):
+    """Le processus d'inférence meurt sur une page de 101 pixels de large"""
+
+    def ocr(self, img, cls=False, **kwargs):
+        if img.shape[1] == 101:
+            import os
+            os._exit(1)
+        return super().ocr(img, cls, **kwargs)
+
+
+@pytest.mark.fake_engine.with_args(_CrashingPaddleOCR)
+def test_crashed_inference_process_is_replaced(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "OCR_PROCESS_WORKERS", 1)
+    crashing = app_module.DocumentPages("pdf", 1, lambda n: Image.new("RGB", (101, 30), "white"))
+    healthy = app_module.DocumentPages("pdf", 2, lambda n: Image.new("RGB", (110 + n, 30), "white"))
+
+    failed = app_module.run_page_pipeline(crashing, None, None, {"profile": "printed"})
+    broken = app_module.ocr_process_pool
+    results = app_module.run_page_pipeline(healthy, None, None, {"profile": "printed"})
+
+    assert failed[0]["status"] == "error"
+    assert broken is None
+    assert [r["status"] for r in results] == ["success", "success"]
+    assert app_module.shared_pages == {}
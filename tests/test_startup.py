@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+
+class _CountingPaddleOCR:
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        type(self).instances += 1
+        self.use_angle_cls = False
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_CountingPaddleOCR)
+
+
+def test_import_does_not_load_heavy_dependencies():
+    code = "import sys, app; print('paddleocr' in sys.modules, 'pdf2image' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, timeout=60
+    )
+
+    assert result.stdout.strip().splitlines()[-1] == "False False"
+
+
+def model_dir(root, *names):
+    for name in names:
+        directory = root / name
+        directory.mkdir(parents=True)
+        (directory / "inference.pdiparams").write_bytes(b"")
+
+
+def test_model_bundle_check(app_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, "OCR_MODEL_DIRS", [str(tmp_path)])
+    model_dir(tmp_path, "det/ml/Multilingual_PP-OCRv3_det_infer", "rec/latin/latin_PP-OCRv3_rec_infer")
+
+    bundle = app_module.check_model_bundle()
+    assert bundle["missing"] == ["cls"]
+    assert bundle["ok"] is False
+
+    model_dir(tmp_path, "PP-LCNet_x1_0_textline_ori")
+    assert app_module.check_model_bundle()["ok"] is True
+
+
+def test_health_does_not_initialize_engines(app_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, "OCR_MODEL_DIRS", [str(tmp_path)])
+    _CountingPaddleOCR.instances = 0
+
+    with TestClient(app_module.app) as client:
+        payload = client.get("/health").json()
+
+    assert _CountingPaddleOCR.instances == 0
+    assert payload["status"] == "healthy"
+    assert payload["models"] == {"ok": False, "missing": ["cls", "det", "rec"]}
+    assert {"import", "model_check", "total"} <= set(payload["startup"])
+
+
+def test_startup_preloads_configured_profiles(app_module, monkeypatch):
+    monkeypatch.setenv("OCR_PRELOAD_PROFILES", "printed,legal")
+    _CountingPaddleOCR.instances = 0
+
+    with TestClient(app_module.app) as client:
+        payload = client.get("/health").json()
+
+    assert _CountingPaddleOCR.instances == 2
+    assert payload["engines"]["legal"] == {"status": "ready"}
+    assert "preload" in payload["startup"]
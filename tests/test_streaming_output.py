@@ -0,0 +1,137 @@
+import asyncio
+import io
+import threading
+import xml.etree.ElementTree as ET
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _LinePaddleOCR:
+    """Une ligne par page: « Total <largeur> € & TVA », dans le tiers supérieur"""
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        width = Image.open(img).width
+        return [[[[[20, 10], [220, 10], [220, 40], [20, 40]], (f"Total {width} € & TVA", 0.93)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_LinePaddleOCR)
+
+
+def multipage_tiff(widths) -> bytes:
+    frames = [Image.new("RGB", (width, 300), "white") for width in widths]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="TIFF", save_all=True, append_images=frames[1:])
+    return buffer.getvalue()
+
+
+def post(client, output_format, data):
+    return client.post(
+        f"/ocr?output_format={output_format}", files={"file": ("lot.tif", data, "image/tiff")}
+    )
+
+
+def test_hocr_output(app_module):
+    with TestClient(app_module.app) as client:
+        response = post(client, "hocr", multipage_tiff([400, 410]))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    root = ET.fromstring(response.content)
+    ns = {"x": "http://www.w3.org/1999/xhtml"}
+    pages = root.findall(".//x:div[@class='ocr_page']", ns)
+    assert [page.get("title").split("; ")[1] for page in pages] == ["bbox 0 0 400 300", "bbox 0 0 410 300"]
+    line = pages[1].find("x:span", ns)
+    assert line.text == "Total 410 € & TVA"
+    assert line.get("title") == "bbox 20 10 220 40; x_wconf 93"
+
+
+def test_alto_output(app_module):
+    with TestClient(app_module.app) as client:
+        response = post(client, "alto", multipage_tiff([400, 410]))
+
+    assert response.status_code == 200
+    ns = {"a": "http://www.loc.gov/standards/alto/ns-v4#"}
+    root = ET.fromstring(response.content)
+    pages = root.findall(".//a:Page", ns)
+    assert [(page.get("WIDTH"), page.get("HEIGHT")) for page in pages] == [("400", "300"), ("410", "300")]
+    string = pages[0].find(".//a:String", ns)
+    assert string.get("CONTENT") == "Total 400 € & TVA"
+    assert (string.get("HPOS"), string.get("VPOS"), string.get("WIDTH"), string.get("HEIGHT")) == ("20", "10", "200", "30")
+    assert string.get("WC") == "0.93"
+
+
+def test_searchable_pdf_output(app_module):
+    pdfium = pytest.importorskip("pypdfium2")
+    with TestClient(app_module.app) as client:
+        response = post(client, "pdf", multipage_tiff([400, 410]))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-disposition"] == 'inline; filename="lot.pdf"'
+    pdf = pdfium.PdfDocument(response.content)
+    assert len(pdf) == 2
+    # 200 DPI -> points
+    assert pdf[1].get_size() == pytest.approx((410 * 72 / 200, 300 * 72 / 200), abs=0.01)
+    text = pdf[1].get_textpage().get_text_range()
+    assert "Total 410" in text and "TVA" in text
+
+
+def test_pdf_xref_offsets_point_to_objects(app_module):
+    writer = app_module.SearchablePDFWriter("doc.png")
+    page = {
+        "page": 1, "size": (100, 50), "lines": [],
+        "page_image": app_module.encode_page_image(Image.new("L", (100, 50), "white")),
+    }
+    data = writer.header() + writer.page(page) + writer.footer()
+
+    assert "page_image" not in page
+    xref = data[data.rindex(b"xref"):]
+    offsets = [int(entry[:10]) for entry in xref.split(b"\n")[3:] if entry.endswith(b" n ")]
+    for number, offset in enumerate(offsets, start=1):
+        assert data[offset:].startswith(f"{number} 0 obj".encode())
+
+
+def test_pages_are_sent_before_the_document_is_finished(app_module):
+    release = threading.Event()
+
+    class SlowSecondPage(_LinePaddleOCR):
+        calls = 0
+
+        def ocr(self, img, cls=False, **kwargs):
+            SlowSecondPage.calls += 1
+            if SlowSecondPage.calls == 2:
+                release.wait(5)
+            return super().ocr(img, cls, **kwargs)
+
+    async def scenario():
+        response = await app_module.stream_ocr(
+            SlowSecondPage(), multipage_tiff([400, 410]), None, {"profile": "printed"},
+            app_module.HOCRWriter("lot.tif"),
+        )
+        body = response.body_iterator
+        header = await body.__anext__()
+        first = await body.__anext__()
+        second_pending = not release.is_set()
+        release.set()
+        rest = b"".join([chunk async for chunk in body])
+        return header, first, second_pending, rest
+
+    header, first, second_pending, rest = asyncio.run(scenario())
+
+    assert header.startswith(b"<?xml")
+    assert b'id="page_1"' in first and second_pending
+    assert b'id="page_2"' in rest and rest.endswith(b"</html>\n")
+
+
+def test_document_errors_keep_their_status(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/ocr?output_format=pdf&first_page=5", files={"file": ("lot.tif", multipage_tiff([400]), "image/tiff")}
+        )
+
+    assert response.status_code == 400
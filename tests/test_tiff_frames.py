@@ -0,0 +1,60 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _WidthReadingPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], (f"largeur-{Image.open(img).width}", 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_WidthReadingPaddleOCR)
+
+
+def multipage_tiff(widths) -> bytes:
+    frames = [Image.new("L", (width, 50), "white") for width in widths]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format="TIFF", save_all=True, append_images=frames[1:])
+    return buffer.getvalue()
+
+
+def test_tiff_frames_are_opened_lazily(app_module):
+    document = app_module.open_document(multipage_tiff([120, 130, 140]))
+
+    assert document.kind == "image"
+    assert document.page_count == 3
+    assert document.page_sizes == [(120, 50), (130, 50), (140, 50)]
+    assert document.page_size == (140, 50)
+    # Pages décodées dans un ordre quelconque, chacune indépendante du fichier
+    third, first = document.load(3), document.load(1)
+    assert (third.width, first.width) == (140, 120)
+
+
+def test_tiff_respects_max_pages(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "MAX_PAGES", 2)
+
+    document = app_module.open_document(multipage_tiff([120, 130, 140, 150]))
+
+    assert document.total_pages == 4
+    assert document.page_count == 2
+    assert document.page_sizes == [(120, 50), (130, 50)]
+
+
+def test_every_tiff_page_is_recognized(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/ocr",
+            params={"output_format": "json"},
+            files={"file": ("fax.tiff", multipage_tiff([120, 130, 140]), "image/tiff")},
+        )
+
+    payload = response.json()
+    assert payload["metadata"]["total_pages"] == 3
+    assert [page["lines"][0]["text"] for page in payload["results"]] == [
+        "largeur-120", "largeur-130", "largeur-140"
+    ]
@@ -0,0 +1,71 @@
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+
+class _BarDetectingPaddleOCR:
+    """Détecte les barres noires horizontales; le texte reflète la largeur vue."""
+
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, det=True, **kwargs):
+        ink = np.asarray(Image.open(img).convert("L")) < 128
+        if not det:
+            cols = np.flatnonzero(ink.any(axis=0))
+            return [[("x" * ((int(cols[-1]) + 1 - int(cols[0])) // 10), 0.95)]]
+        lines = []
+        rows = np.flatnonzero(ink.any(axis=1))
+        if rows.size == 0:
+            return [None]
+        runs = np.split(rows, np.flatnonzero(np.diff(rows) > 1) + 1)
+        for run in runs:
+            cols = np.flatnonzero(ink[run].any(axis=0))
+            x0, x1, y0, y1 = int(cols[0]), int(cols[-1]) + 1, int(run[0]), int(run[-1]) + 1
+            lines.append([[[x0, y0], [x1, y0], [x1, y1], [x0, y1]], ("x" * ((x1 - x0) // 10), 0.9)])
+        return [lines]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_BarDetectingPaddleOCR)
+
+
+@pytest.fixture(autouse=True)
+def small_tiles(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "TILE_PIXEL_THRESHOLD", 100_000)
+    monkeypatch.setattr(app_module, "TILE_SIZE", 256)
+    monkeypatch.setattr(app_module, "TILE_OVERLAP", 96)
+
+
+def test_tile_spans_cover_axis_with_disjoint_cores(app_module):
+    spans = app_module._tile_spans(600)
+
+    assert spans[0][0] == 0 and spans[-1][1] == 600
+    assert all(end - start == 256 for start, end, _, _ in spans)
+    cores = [(core_start, core_end) for _, _, core_start, core_end in spans]
+    assert cores[0][0] == 0 and cores[-1][1] == 600
+    assert all(a[1] == b[0] for a, b in zip(cores, cores[1:]))
+
+
+def test_large_page_is_tiled_and_border_lines_deduplicated(app_module):
+    page = Image.new("RGB", (600, 400), "white")
+    draw = ImageDraw.Draw(page)
+    draw.rectangle([20, 40, 139, 49], fill="black")   # entièrement dans une tuile
+    draw.rectangle([120, 200, 219, 209], fill="black")  # à cheval sur la frontière verticale
+    draw.rectangle([100, 300, 399, 309], fill="black")  # plus longue que le recouvrement
+    engine = _BarDetectingPaddleOCR()
+
+    result = app_module.process_single_page((1, page, None, engine, {"profile": "printed"}))
+
+    assert result["status"] == "success"
+    bboxes = [line["bbox"] for line in result["lines"]]
+    assert bboxes == [
+        [[20, 40], [140, 40], [140, 50], [20, 50]],
+        [[120, 200], [220, 200], [220, 210], [120, 210]],
+        [[100, 300], [400, 300], [400, 310], [100, 310]],
+    ]
+    assert result["lines"][2]["text"] == "x" * 30
+    stats = app_module.ocr_stats["tiling"]
+    assert stats["pages"] == 1
+    assert stats["duplicates_removed"] == 1
+    assert stats["tiles"] == len(app_module._tile_spans(600)) * len(app_module._tile_spans(400))
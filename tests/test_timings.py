@@ -0,0 +1,110 @@
+import io
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+class _BusyPaddleOCR:
+    def __init__(self, *args, **kwargs):
+        self.use_angle_cls = False
+
+    def ocr(self, img, cls=False, **kwargs):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], ("ligne", 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_BusyPaddleOCR)
+
+
+def png_upload():
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 40), "white").save(buffer, format="PNG")
+    return {"file": ("page.png", buffer.getvalue(), "image/png")}
+
+
+def test_debug_timings_reports_page_and_request_stages(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/ocr", params={"output_format": "json", "debug_timings": "true"}, files=png_upload()
+        )
+
+    assert response.status_code == 200
+    payload = response.json()
+    page_timings = payload["results"][0]["timings"]
+    assert {"rasterize", "orientation", "encode", "inference"} <= set(page_timings)
+    assert page_timings["inference"] >= 0.05
+    metadata_timings = payload["metadata"]["timings"]
+    assert {"open_document", "memory_wait", "pipeline", "pages.inference", "total"} <= set(metadata_timings)
+
+
+def test_timings_omitted_by_default(app_module):
+    with TestClient(app_module.app) as client:
+        payload = client.post("/ocr", params={"output_format": "json"}, files=png_upload()).json()
+
+    assert payload["results"][0]["timings"] is None
+    assert payload["metadata"]["timings"] is None
+
+
+def test_cpu_profile_requires_admin_token(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "OCR_ADMIN_TOKEN", "secret")
+
+    with TestClient(app_module.app) as client:
+        denied = client.post("/ocr", params={"profile_cpu": "true"}, files=png_upload())
+        text_output = client.post(
+            "/ocr", params={"profile_cpu": "true"}, headers={"X-Admin-Token": "secret"}, files=png_upload()
+        )
+        allowed = client.post(
+            "/ocr",
+            params={"output_format": "json", "profile_cpu": "true"},
+            headers={"X-Admin-Token": "secret"},
+            files=png_upload(),
+        )
+
+    assert denied.status_code == 403
+    assert text_output.status_code == 400
+    assert allowed.status_code == 200
+    folded = allowed.json()["metadata"]["cpu_profile"]
+    # Format folded: "thread;frame;...;frame count"
+    lines = folded.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any(line.startswith("ocr-infer;") and "ocr (test_timings.py" in line for line in lines)
+
+
+def test_sampler_ignores_threads_waiting_on_a_lock(app_module):
+    sampler = app_module.StackSampler(interval=0.002)
+    held = threading.Lock()
+    held.acquire()
+    stop = threading.Event()
+
+    def blocked_on_lock():
+        sampler.add_current_thread()
+        with held:
+            pass
+
+    def spinning():
+        sampler.add_current_thread()
+        while not stop.is_set():
+            pass
+
+    threads = [
+        threading.Thread(target=blocked_on_lock, name="waiter-0"),
+        threading.Thread(target=spinning, name="spinner-0"),
+    ]
+    for thread in threads:
+        thread.start()
+    sampler.start()
+    time.sleep(0.2)
+    folded = sampler.stop()
+    stop.set()
+    held.release()
+    for thread in threads:
+        thread.join()
+
+    stacks = folded.splitlines()
+    assert any(line.startswith("spinner;") for line in stacks)
+    assert not any(line.startswith("waiter;") for line in stacks)
@@ -0,0 +1,68 @@
+import io
+import json
+import time
+
+import pytest
+from PIL import Image
+
+import tune_profiles
+
+
+class _TunablePaddleOCR:
+    """Plus rapide avec plus de threads; perd du texte si det_limit_side_len est trop petit"""
+
+    def __init__(self, *args, cpu_threads=1, det_limit_side_len=960, **kwargs):
+        self.use_angle_cls = False
+        self.delay = 0.02 / cpu_threads
+        self.truncate = det_limit_side_len < 960
+
+    def ocr(self, img, cls=False, **kwargs):
+        time.sleep(self.delay)
+        text = "Article premier: le bail est conclu pour neuf années"
+        if self.truncate:
+            text = text[:10]
+        return [[[[[0, 0], [10, 0], [10, 10], [0, 10]], (text, 0.9)]]]
+
+
+pytestmark = pytest.mark.fake_engine.with_args(_TunablePaddleOCR)
+
+
+@pytest.fixture()
+def corpus(tmp_path):
+    directory = tmp_path / "corpus"
+    directory.mkdir()
+    for index in range(3):
+        Image.new("L", (200, 100), "white").save(directory / f"page{index}.png")
+    (directory / "notes.txt").write_text("ignoré")
+    return directory
+
+
+def test_tuning_picks_fastest_settings_within_drift(app_module, monkeypatch, corpus):
+    monkeypatch.setattr(tune_profiles, "app", app_module)
+    grid = {"cpu_threads": [1, 4], "det_limit_side_len": [640, 960]}
+
+    result = tune_profiles.tune(str(corpus), ["printed"], grid, max_drift=0.05, log=lambda message: None)
+
+    tuned = result["profiles"]["printed"]
+    assert result["corpus_pages"] == 3
+    assert tuned["settings"] == {"cpu_threads": 4, "det_limit_side_len": 960}
+    assert tuned["drift"] == 0.0
+    assert tuned["pages_per_second"] > tuned["baseline_pages_per_second"]
+
+
+def test_tuned_file_is_applied_to_profiles(app_module, tmp_path):
+    path = tmp_path / "tuned.json"
+    path.write_text(json.dumps({
+        "host": {"cpu_count": 1},
+        "profiles": {
+            "legal": {"settings": {"cpu_threads": 4, "enable_mkldnn": True, "lang": "en"}},
+            "inconnu": {"settings": {"cpu_threads": 2}},
+        },
+    }))
+
+    applied = app_module.load_tuned_profiles(str(path))
+
+    assert applied == {"legal": {"cpu_threads": 4, "enable_mkldnn": True}}
+    assert app_module.OCR_PROFILE_CONFIGS["legal"]["cpu_threads"] == 4
+    assert app_module.OCR_PROFILE_CONFIGS["legal"]["lang"] == "fr"
+    assert app_module.create_ocr_engine("legal").delay == pytest.approx(0.005)
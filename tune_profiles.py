@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Calibration CPU des profils OCR pour Symplissime OCR API
+
+Pour chaque profil, traite un corpus d'exemple avec chaque combinaison d'une grille de
+réglages CPU de PaddleOCR (threads, MKL-DNN, taille des lots de reconnaissance, côté
+maximal en détection), mesure le débit (pages/s) et l'écart du texte reconnu par
+rapport à une exécution de référence (profil sans calibration), puis écrit les
+réglages les plus rapides dont l'écart reste sous le seuil. L'API charge ce fichier
+au démarrage (OCR_TUNED_PROFILES, défaut tuned_profiles.json).
+
+    python tune_profiles.py corpus/ --profiles printed legal --max-drift 0.02
+    python tune_profiles.py corpus/ --grid grille.json --output tuned_profiles.json
+
+Grille (--grid): objet JSON {réglage: [valeurs]}, par exemple
+    {"cpu_threads": [2, 4, 8], "enable_mkldnn": [false, true], "rec_batch_num": [6, 16]}
+"""
+import argparse
+import difflib
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import app
+
+DEFAULT_GRID = {
+    "cpu_threads": sorted({1, 2, 4, os.cpu_count() or 1}),
+    "enable_mkldnn": [False, True],
+    "rec_batch_num": [6, 16],
+    "det_limit_side_len": [960, 1280],
+}
+CORPUS_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"}
+WARMUP_PAGES = 1   # pages traitées avant la mesure (chargement paresseux, caches)
+
+
+def load_corpus(directory: str, max_pages: int) -> List:
+    """Pages décodées du corpus (au plus max_pages), dans l'ordre des fichiers"""
+    pages = []
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() not in CORPUS_EXTENSIONS:
+            continue
+        document = app.open_document(path.read_bytes())
+        try:
+            for page_num in range(1, document.page_count + 1):
+                pages.append(document.load(page_num).convert("RGB"))
+                if len(pages) >= max_pages:
+                    return pages
+        finally:
+            document.close()
+    return pages
+
+
+def grid_settings(grid: Dict[str, List]) -> List[Dict]:
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def run_trial(profile: str, settings: Dict, pages: List) -> Dict:
+    """Traite le corpus avec un moteur configuré; renvoie le débit et le texte par page"""
+    # Référence: réglages du profil hors calibration antérieure (fichier déjà chargé par app)
+    base = {k: v for k, v in app.OCR_PROFILE_CONFIGS[profile].items() if k not in app.TUNABLE_ENGINE_SETTINGS}
+    config = {**base, **settings}
+    engine = app.load_ocr_engine(config)
+    use_cls = bool(config.get("use_angle_cls"))
+    for page in pages[:WARMUP_PAGES]:
+        app.recognize_page(engine, page, use_cls)
+    texts = []
+    started = time.perf_counter()
+    for page in pages:
+        texts.append("\n".join(line["text"] for line in app.recognize_page(engine, page, use_cls)))
+    elapsed = time.perf_counter() - started
+    return {"settings": settings, "pages_per_second": len(pages) / elapsed if elapsed else float("inf"), "texts": texts}
+
+
+def text_drift(reference: List[str], texts: List[str]) -> float:
+    """Écart moyen (0 = identique, 1 = sans rapport) entre deux exécutions, page par page"""
+    if not reference:
+        return 0.0
+    ratios = [difflib.SequenceMatcher(None, ref, text).ratio() if ref or text else 1.0
+              for ref, text in zip(reference, texts)]
+    return 1.0 - sum(ratios) / len(ratios)
+
+
+def tune_profile(profile: str, pages: List, grid: Dict[str, List], max_drift: float, log=print) -> Dict:
+    """Réglages les plus rapides du profil dont l'écart à la référence reste sous max_drift"""
+    reference = run_trial(profile, {}, pages)
+    log(f"[{profile}] référence: {reference['pages_per_second']:.2f} pages/s")
+    best = {**reference, "drift": 0.0}
+    for settings in grid_settings(grid):
+        try:
+            trial = run_trial(profile, settings, pages)
+        except Exception as error:  # réglage non supporté par cette version de PaddleOCR
+            log(f"[{profile}] {settings}: échec ({error})")
+            continue
+        trial["drift"] = text_drift(reference["texts"], trial["texts"])
+        accepted = trial["drift"] <= max_drift
+        log(f"[{profile}] {settings}: {trial['pages_per_second']:.2f} pages/s, "
+            f"écart {trial['drift']:.3f}{'' if accepted else ' (rejeté)'}")
+        if accepted and trial["pages_per_second"] > best["pages_per_second"]:
+            best = trial
+    return {
+        "settings": best["settings"],
+        "pages_per_second": round(best["pages_per_second"], 3),
+        "baseline_pages_per_second": round(reference["pages_per_second"], 3),
+        "drift": round(best["drift"], 4),
+    }
+
+
+def tune(corpus: str, profiles: List[str], grid: Dict[str, List], max_drift: float,
+         max_pages: int = 20, log=print) -> Dict:
+    pages = load_corpus(corpus, max_pages)
+    if not pages:
+        raise SystemExit(f"Aucune page exploitable dans {corpus}")
+    log(f"{len(pages)} page(s) de calibration")
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"cpu_count": os.cpu_count(), "machine": platform.machine(), "processor": platform.processor()},
+        "corpus_pages": len(pages),
+        "max_drift": max_drift,
+        "profiles": {profile: tune_profile(profile, pages, grid, max_drift, log) for profile in profiles},
+    }
+
+
+def paddle_profiles() -> List[str]:
+    """Profils servis par PaddleOCR, seuls concernés par les réglages calibrables"""
+    return [profile for profile in app.OCR_PROFILE_CONFIGS
+            if app.profile_backend(profile) == app.DEFAULT_ENGINE_BACKEND]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calibration CPU des profils OCR")
+    parser.add_argument("corpus", help="Répertoire des documents d'exemple")
+    parser.add_argument("--profiles", nargs="+", default=paddle_profiles())
+    parser.add_argument("--grid", default=None, help="Fichier JSON de la grille de réglages")
+    parser.add_argument("--max-drift", type=float, default=0.02, help="Écart de texte toléré (0-1)")
+    parser.add_argument("--max-pages", type=int, default=20, help="Pages du corpus utilisées au maximum")
+    parser.add_argument("--output", default=app.OCR_TUNED_PROFILES or "tuned_profiles.json")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.profiles) - set(app.OCR_PROFILE_CONFIGS)
+    if unknown:
+        parser.error(f"Profils inconnus: {sorted(unknown)}")
+    untunable = set(args.profiles) - set(paddle_profiles())
+    if untunable:
+        parser.error(f"Profils sans moteur PaddleOCR, non calibrables: {sorted(untunable)}")
+    grid = json.loads(Path(args.grid).read_text(encoding="utf-8")) if args.grid else DEFAULT_GRID
+    unsupported = set(grid) - app.TUNABLE_ENGINE_SETTINGS
+    if unsupported:
+        parser.error(f"Réglages non calibrables: {sorted(unsupported)}")
+
+    result = tune(args.corpus, args.profiles, grid, args.max_drift, args.max_pages)
+    Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"Réglages écrits dans {args.output}")
+    for profile, tuned in result["profiles"].items():
+        print(f"  {profile}: {tuned['settings']} ({tuned['baseline_pages_per_second']} → "
+              f"{tuned['pages_per_second']} pages/s, écart {tuned['drift']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())